@@ -1,7 +1,20 @@
+import importlib
+
 import streamlit as st
-from app import render_datasets_page
-from benchmark import render_benchmarks_page
-from actu import render_actu_page  # Nouvel import
+
+import data_sources
+import tracing
+import warmup
+
+
+def lazy_page(module_name, function_name):
+    """
+    Fonction d'affichage d'une page dont le module (et ses dépendances : datasets, plotly, eventregistry...)
+    n'est importé qu'à la première visite de la page.
+    """
+    def render():
+        return getattr(importlib.import_module(module_name), function_name)()
+    return render
 
 def render_accueil_page():
     st.markdown("<h1 style='text-align: center; color: #FFD700;'>Bienvenue sur HuggingFace Explorer</h1>", unsafe_allow_html=True)
@@ -72,9 +85,9 @@ def main():
     
     pages = {
         "🏠 Accueil": render_accueil_page,
-        "🔍 Modèles": render_datasets_page,
-        "📊 Benchmarks": render_benchmarks_page,
-        "📰 Actualités": render_actu_page  # Nouvelle page
+        "🔍 Modèles": lazy_page("app", "render_datasets_page"),
+        "📊 Benchmarks": lazy_page("benchmark", "render_benchmarks_page"),
+        "📰 Actualités": lazy_page("actu", "render_actu_page")  # Nouvelle page
     }
     
     for page_name in pages:
@@ -89,8 +102,21 @@ def main():
     
     st.sidebar.markdown("</div>", unsafe_allow_html=True)
 
-    # Afficher la page active
-    pages[st.session_state["active_page"]]()
+    # Préchargement des sources en arrière-plan (une seule fois par processus), sans bloquer la page
+    warmup.start()
+    if data_sources.DATA_MODE != "live":
+        st.sidebar.caption(f"💾 Mode des données : {data_sources.DATA_MODE} (copies livrées dans Data_csv)")
+    refreshing = warmup.refreshing()
+    if refreshing:
+        st.sidebar.caption(f"🔄 Données en cours de rafraîchissement : {', '.join(refreshing)}")
+
+    # Afficher la page active (durée, lignes et cache de chaque étape, visibles dans le panneau de mesures)
+    with tracing.page_trace(st.session_state["active_page"].split(" ", 1)[-1]) as trace:
+        try:
+            pages[st.session_state["active_page"]]()
+        finally:
+            # Y compris quand la page échoue : les étapes déjà mesurées restent consultables
+            tracing.render_debug_panel(trace)
 
 if __name__ == "__main__":
     st.set_page_config(
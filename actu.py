@@ -1,95 +1,157 @@
 import pandas as pd
-import re
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-from eventregistry import *
 import os
 from dotenv import load_dotenv
 
-# Charger les variables d'environnement
-load_dotenv()
-
-# Remplacer la section de chargement de la clé API par:
-try:
-    api_key = st.secrets["EVENT_REGISTRY_API_KEY"]
-except Exception as e:
-    # Fallback pour le développement local
-    api_key = os.getenv('EVENT_REGISTRY_API_KEY', "6d15fe13-b16a-4080-bbff-dc81f97f3d0d")
+import data_sources
+import data_store
+import snapshot_cache
+import tracing
+from aggregations import AggregateCube, cube_rollup
+from article_ingest import (ARTICLES_SOURCE, EventRegistrySource, read_articles, read_articles_csv, store_age,
+                            store_version, update_articles)
+from filter_engine import between, get_filter_engine, isin
+from search_index import get_search_index
+
+def find_api_key():
+    """
+    Clé EventRegistry (secrets Streamlit, sinon fichier .env), ou None.
+    """
+    # Charger les variables d'environnement
+    load_dotenv()
+    try:
+        return st.secrets["EVENT_REGISTRY_API_KEY"]
+    except Exception as e:
+        # Fallback pour le développement local
+        return os.getenv('EVENT_REGISTRY_API_KEY', "6d15fe13-b16a-4080-bbff-dc81f97f3d0d") or None
+
+def load_api_key():
+    """
+    Clé EventRegistry, lue à l'affichage de la page (et non à l'import du module).
+    """
+    api_key = find_api_key()
     if not api_key:
         st.error("Clé API non trouvée. Veuillez configurer EVENT_REGISTRY_API_KEY dans les secrets Streamlit ou le fichier .env")
         st.stop()
+    return api_key
 
 
-def render_actu_page():
-    # Titre avec le style Hugging Face
-    st.markdown("<h1 style='text-align: center; color: #FFD700;'>Actualités des LLMs</h1>", unsafe_allow_html=True)
-    
-    # Modifier la gestion de la clé API
-    try:
-        api_key = st.secrets["EVENT_REGISTRY_API_KEY"]
-    except:
-        st.error("Clé API non trouvée. Veuillez configurer EVENT_REGISTRY_API_KEY dans les secrets Streamlit.")
-        st.stop()
-    
-    if not api_key:
-        st.error("La clé API EVENT_REGISTRY_API_KEY n'est pas configurée dans le fichier .env")
-        return
+# Nombre maximum d'articles récupérés par mise à jour
+MAX_ARTICLES = int(os.getenv("HF_EXPLORER_MAX_ARTICLES", 2500))
+# Âge (en secondes) au-delà duquel les nouveaux articles sont récupérés en arrière-plan
+ARTICLES_REFRESH_INTERVAL = 3600
 
-    # Fonction pour récupérer les articles
-    @st.cache_data
-    def get_articles():
-        er = EventRegistry(apiKey=api_key)
+# Fonction pour récupérer les articles
+def refresh_articles(api_key):
+    """
+    Ajoute au stockage local les articles publiés depuis le dernier jour déjà stocké.
+    """
+    return update_articles(EventRegistrySource(api_key), max_items=MAX_ARTICLES)
 
-        # Colonnes à inclure
-        columns_to_include = [
-            'lang', 'url', 'sentiment', 'date', 'relevance', 'title', 'location', 'sim'
-        ]
+# Libellé des articles dont la localisation ne donne pas de pays
+UNKNOWN_COUNTRY = "Non localisé"
 
-        articles = []
-        q = QueryArticlesIter(keywords=QueryItems.AND(["LLM", "model"]), lang="eng")
-
-        # Exécuter la requête et récupérer tous les résultats
-        for art in q.execQuery(er,
-                               returnInfo=ReturnInfo(
-                                   articleInfo=ArticleInfoFlags(
-                                       concepts=True, 
-                                       categories=True, 
-                                       location=True, 
-                                       image=True, 
-                                       links=True, 
-                                       videos=True
-                                   ))):
-            article_data = {col: art.get(col, None) for col in columns_to_include}
-            articles.append(article_data)
-        
-        return pd.DataFrame(articles)
+def prepare_articles(df_articles):
+    # Prétraitement des données (les doublons signalés par EventRegistry sont écartés)
+    df_articles = df_articles[~df_articles['isDuplicate']].drop(columns=['isDuplicate'])
+    df_articles['date'] = pd.to_datetime(df_articles['date'])
+    # Le pays est extrait à l'ingestion ; les articles sans pays sont conservés sous un libellé dédié
+    df_articles['country'] = df_articles['country'].cat.add_categories([UNKNOWN_COUNTRY]).fillna(UNKNOWN_COUNTRY)
+    return df_articles
+
+def load_articles(api_key):
+    """
+    Articles lus depuis le stockage local et prétraités une seule fois par version du stockage (lecture seule).
+    Seul le tout premier chargement attend le téléchargement ; ensuite seuls les articles récents sont
+    récupérés, en arrière-plan. En mode snapshot, seuls les articles de Data_csv/df_articles.csv sont
+    utilisés ; en mode hybrid, ils sont servis tant que le premier téléchargement n'est pas terminé.
+    """
+    if data_sources.DATA_MODE == "snapshot":
+        return _read_bundled_articles()
+    if store_version() is None and data_sources.DATA_MODE == "hybrid":
+        snapshot_cache.run_in_background((ARTICLES_SOURCE, "refresh"), lambda: refresh_articles(api_key))
+        return _read_bundled_articles()
+    if store_version() is None:
+        with st.spinner("Chargement des articles..."):
+            # Si le préchargement est déjà en train de remplir le stockage, on l'attend
+            snapshot_cache.run_exclusive((ARTICLES_SOURCE, "refresh"), lambda: refresh_articles(api_key))
+            if store_version() is None:
+                refresh_articles(api_key)
+    elif store_age() > ARTICLES_REFRESH_INTERVAL:
+        snapshot_cache.run_in_background((ARTICLES_SOURCE, "refresh"), lambda: refresh_articles(api_key))
+    return _read_articles_store(store_version())
+
+def _read_articles_store(version):
+    # Une seule copie prétraitée en lecture seule par version du stockage, partagée entre les sessions
+    return data_store.shared_table(ARTICLES_SOURCE, version, lambda: prepare_articles(read_articles()))
+
+def _read_bundled_articles():
+    # Articles livrés dans Data_csv, convertis une seule fois en colonnes typées (pays déjà extrait)
+    return data_sources.shared_bundled_table(ARTICLES_SOURCE, read_articles_csv, prepare_articles)
+
+def warm_articles(ahead=0):
+    """
+    Préchargement hors session (warmup) : récupère les nouveaux articles si le stockage est vide ou expire
+    dans moins de `ahead` secondes, puis le charge dans le cache partagé.
+    """
+    if data_sources.DATA_MODE == "snapshot":
+        _read_bundled_articles()
+        return
+    api_key = find_api_key()
+
+    def refresh():
+        if api_key and (store_version() is None or store_age() > ARTICLES_REFRESH_INTERVAL - ahead):
+            refresh_articles(api_key)
+
+    snapshot_cache.run_exclusive((ARTICLES_SOURCE, "refresh"), refresh)
+    if store_version() is not None:
+        _read_articles_store(store_version())
+
+
+def article_stats_cube(df_articles):
+    """
+    Cube (pays, date, sentiment) des articles : nombre d'articles et somme des sentiments de chaque cellule.
+    Le sentiment d'EventRegistry ne prend que quelques centaines de valeurs : c'est une dimension exacte.
+    """
+    return AggregateCube(df_articles[['country', 'date', 'sentiment']].assign(sentiment_total=df_articles['sentiment']),
+                         ["country", "date", "sentiment"], sums=["sentiment_total"])
+
+def article_stats(df_articles, by, filters, df_found=None):
+    """
+    Nombre d'articles et sentiment moyen par `by` ('country' ou 'date'), repliés depuis le cube des articles
+    (calculé une fois par version du stockage) pour les `filters` (isin, between) de la barre latérale.
+    Les résultats d'une recherche dans les titres `df_found` (hors dimensions du cube) sont agrégés directement.
+    """
+    if df_found is not None:
+        stats = article_stats_cube(df_found).rollup([by])
+    else:
+        stats = cube_rollup(lambda: article_stats_cube(df_articles), snapshot_cache.snapshot_id(df_articles),
+                            "article_stats", [by], *filters)
+    return pd.DataFrame({
+        by: stats[by],
+        'num_articles': stats['count'],
+        'avg_sentiment': stats['sentiment_total'] / stats['count'],
+    })
 
-    # Charger les articles
-    df_articles = get_articles()
 
-    # Prétraitement des données
-    df_articles['date'] = pd.to_datetime(df_articles['date'])
+def render_actu_page():
+    # Titre avec le style Hugging Face
+    st.markdown("<h1 style='text-align: center; color: #FFD700;'>Actualités des LLMs</h1>", unsafe_allow_html=True)
     
-    def extract_country_from_object(location_entry):
-        if isinstance(location_entry, dict):
-            return location_entry.get('country', {}).get('label', {}).get('eng', None)
-        elif isinstance(location_entry, str):
-            match = re.search(r"'country': \{.*?'label': \{'eng': '(.*?)'\}", location_entry)
-            if match:
-                return match.group(1)
-        return None
-
-    df_articles['country'] = df_articles['location'].apply(extract_country_from_object)
-    df_articles.drop(columns=['location'], inplace=True)
-    df_articles = df_articles.dropna(subset=['country'])
-    df_articles_llm = df_articles.copy()
+    # Clé API : secrets Streamlit, sinon fichier .env
+    api_key = load_api_key()
+
+    # Articles prétraités, partagés entre toutes les sessions
+    with tracing.stage("fetch", cached=True) as span:
+        df_articles_llm = span.out(load_articles(api_key))
 
     # Sidebar filters
     st.sidebar.markdown("### 🔍 Filtres")
     
     # Filtres existants avec style mis à jour
-    countries = df_articles_llm['country'].dropna().unique()
+    countries = df_articles_llm['country'].unique().tolist()
     selected_countries = st.sidebar.multiselect(
         "Pays",
         options=countries,
@@ -114,13 +176,21 @@ def render_actu_page():
     )
 
     # Appliquer les filtres
-    df_filtered = df_articles_llm[
-        (df_articles_llm['country'].isin(selected_countries)) &
-        (df_articles_llm['date'] >= pd.to_datetime(selected_dates[0])) &
-        (df_articles_llm['date'] <= pd.to_datetime(selected_dates[1])) &
-        (df_articles_llm['sentiment'] >= sentiment_range[0]) &
-        (df_articles_llm['sentiment'] <= sentiment_range[1])
-    ]
+    date_range = (pd.to_datetime(selected_dates[0]), pd.to_datetime(selected_dates[1]))
+    # Les mêmes filtres, sur les dimensions du cube des statistiques
+    cube_filters = ((("country", tuple(sorted(selected_countries))),),
+                    (("date", date_range), ("sentiment", tuple(sentiment_range))))
+    # Lignes retenues mémorisées par état des filtres et partagées entre les sessions (les filtres par
+    # défaut retiennent tout le stockage, sans calcul)
+    with tracing.stage("filter", df_articles_llm, cached=True) as span:
+        filter_engine = get_filter_engine(df_articles_llm, snapshot_cache.snapshot_id(df_articles_llm))
+        clauses = [
+            isin('country', selected_countries),
+            between('date', *date_range),
+            between('sentiment', *sentiment_range),
+        ]
+        filters = filter_engine.mask(clauses)
+        df_filtered = span.out(filter_engine.select(clauses))
 
     # Calculate pagination values first
     articles_per_page = 1
@@ -150,12 +220,20 @@ def render_actu_page():
         )
     
     # Apply search filter after pagination calculation
+    df_found = None
     if search_query:
-        temp_df = df_filtered[df_filtered['title'].str.contains(search_query, case=False, na=False)]
-        if len(temp_df) == 0:
+        # Index des titres construit une fois par version du stockage (résultats classés par pertinence)
+        with tracing.stage("search_index", df_articles_llm, cached=True):
+            search_index = get_search_index(df_articles_llm['title'], df_articles_llm['relevance'],
+                                            snapshot_cache.snapshot_id(df_articles_llm), 'title')
+        with tracing.stage("search", df_filtered) as span:
+            positions, fuzzy = span.out(search_index.search(search_query, filters))
+        if len(positions) == 0:
             st.warning(f"Aucun article trouvé pour : '{search_query}'")
         else:
-            df_filtered = temp_df
+            if fuzzy:
+                st.info(f"Aucun titre ne contient « {search_query} » : affichage des résultats approchants.")
+            df_found = df_filtered = df_articles_llm.iloc[positions]
             
         # Recalculate pagination after search
         total_articles = len(df_filtered)
@@ -222,7 +300,7 @@ def render_actu_page():
     with col1:
         st.metric("Total Articles", f"{len(df_articles_llm):,}")
     with col2:
-        st.metric("Pays Couverts", f"{df_articles_llm['country'].nunique():,}")
+        st.metric("Pays Couverts", f"{df_articles_llm['country'].loc[lambda c: c != UNKNOWN_COUNTRY].nunique():,}")
     with col3:
         avg_sentiment = df_articles_llm['sentiment'].mean()
         st.metric("Sentiment Moyen", f"{avg_sentiment:.2f}")
@@ -234,130 +312,132 @@ def render_actu_page():
     st.markdown("<h2 style='color:#FFD700;'>Distribution Géographique</h2>", unsafe_allow_html=True)
     st.markdown("Cette carte montre la quantité et le sentiment global des articles sur les LLM dans le monde.")
 
-    # Calcul du nombre d'articles et du sentiment moyen par pays
-    country_stats = df_filtered.groupby('country').agg(
-        num_articles=('country', 'size'),
-        avg_sentiment=('sentiment', 'mean')
-    ).reset_index()
-
-    # Créer le graphique avec des cercles représentant le nombre d'articles et le sentiment moyen
-    fig_map = px.scatter_geo(
-        country_stats,
-        locations='country',
-        locationmode='country names',
-        hover_name='country',
-        size='num_articles',
-        size_max=40,
-        color='avg_sentiment',
-        color_continuous_scale='RdYlGn',  # Rouge à Jaune à Vert
-        title=False,
-        hover_data={
-            'num_articles': True,
-            'avg_sentiment': ':.2f'
-        }
-    )
+    # Calcul du nombre d'articles et du sentiment moyen par pays (hors articles non localisés)
+    with tracing.stage("chart_map", df_filtered) as span:
+        by_country = article_stats(df_articles_llm, 'country', cube_filters, df_found)
+        located = (by_country['country'] != UNKNOWN_COUNTRY).to_numpy()
+        country_stats = by_country[located].reset_index(drop=True)
+        unlocated = by_country.loc[~located, 'num_articles'].sum()
+        if unlocated:
+            st.caption(f"{unlocated:,} article(s) sans pays identifié ne figurent pas sur la carte ni dans la répartition par pays.")
+        span.out(country_stats)
+
+        # Créer le graphique avec des cercles représentant le nombre d'articles et le sentiment moyen
+        fig_map = px.scatter_geo(
+            country_stats,
+            locations='country',
+            locationmode='country names',
+            hover_name='country',
+            size='num_articles',
+            size_max=40,
+            color='avg_sentiment',
+            color_continuous_scale='RdYlGn',  # Rouge à Jaune à Vert
+            title=False,
+            hover_data={
+                'num_articles': True,
+                'avg_sentiment': ':.2f'
+            }
+        )
 
-    # Mise à jour du layout de la carte
-    fig_map.update_geos(
-        showcountries=True,
-        countrycolor="Gray",
-        showcoastlines=True,
-        coastlinecolor="Gray",
-        showland=True,
-        landcolor="Black",
-        showocean=True,
-        oceancolor="Black",
-        projection_type="equirectangular",
-        bgcolor='rgba(0,0,0,0)'
-    )
+        # Mise à jour du layout de la carte
+        fig_map.update_geos(
+            showcountries=True,
+            countrycolor="Gray",
+            showcoastlines=True,
+            coastlinecolor="Gray",
+            showland=True,
+            landcolor="Black",
+            showocean=True,
+            oceancolor="Black",
+            projection_type="equirectangular",
+            bgcolor='rgba(0,0,0,0)'
+        )
 
-    # Mise à jour du layout général
-    fig_map.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        geo=dict(
-            bgcolor='rgba(0,0,0,0)',
-        ),
-        margin=dict(l=0, r=0, t=0, b=0)
-    )
+        # Mise à jour du layout général
+        fig_map.update_layout(
+            paper_bgcolor='rgba(0,0,0,0)',
+            geo=dict(
+                bgcolor='rgba(0,0,0,0)',
+            ),
+            margin=dict(l=0, r=0, t=0, b=0)
+        )
 
-    st.plotly_chart(fig_map, use_container_width=True)
+        st.plotly_chart(fig_map, use_container_width=True)
 
     st.markdown("<h2 style='color:#FFD700;'>Tendances Temporelles</h2>", unsafe_allow_html=True)
 
     st.markdown("Ce graphique montre le nombre d'articles et le sentiment moyen au cours du temps.")
 
-    time_stats = df_filtered.groupby('date').agg(
-        num_articles=('sentiment', 'size'),
-        avg_sentiment=('sentiment', 'mean')
-    ).reset_index().sort_values('date')
-
-    fig_time = go.Figure()
-
-    # Nombre d'articles
-    fig_time.add_trace(go.Bar(
-        x=time_stats['date'],
-        y=time_stats['num_articles'],
-        name='Nombre d\'articles',
-        marker_color='skyblue',
-        yaxis='y1'
-    ))
-
-    # Sentiment moyen
-    fig_time.add_trace(go.Scatter(
-        x=time_stats['date'],
-        y=time_stats['avg_sentiment'],
-        name='Sentiment Moyen',
-        marker_color='firebrick',
-        yaxis='y2',
-        mode='lines+markers'
-    ))
-
-    # Mise à jour des axes
-    fig_time.update_layout(
-        xaxis=dict(title='Date'),
-        yaxis=dict(
-            title='Nombre d\'articles',
-            titlefont=dict(color='skyblue'),
-            tickfont=dict(color='skyblue'),
-            anchor='x',
-            side='left'
-        ),
-        yaxis2=dict(
-            title='Sentiment Moyen',
-            titlefont=dict(color='firebrick'),
-            tickfont=dict(color='firebrick'),
-            overlaying='y',
-            side='right'
-        ),
-        legend=dict(x=0.1, y=1.1, orientation='h'),
-        title= "",
-        hovermode='x unified'
-    )
+    with tracing.stage("chart_time", df_filtered) as span:
+        time_stats = article_stats(df_articles_llm, 'date', cube_filters, df_found)
+        span.out(time_stats)
+
+        fig_time = go.Figure()
+
+        # Nombre d'articles
+        fig_time.add_trace(go.Bar(
+            x=time_stats['date'],
+            y=time_stats['num_articles'],
+            name='Nombre d\'articles',
+            marker_color='skyblue',
+            yaxis='y1'
+        ))
+
+        # Sentiment moyen
+        fig_time.add_trace(go.Scatter(
+            x=time_stats['date'],
+            y=time_stats['avg_sentiment'],
+            name='Sentiment Moyen',
+            marker_color='firebrick',
+            yaxis='y2',
+            mode='lines+markers'
+        ))
+
+        # Mise à jour des axes
+        fig_time.update_layout(
+            xaxis=dict(title='Date'),
+            yaxis=dict(
+                title=dict(text='Nombre d\'articles', font=dict(color='skyblue')),
+                tickfont=dict(color='skyblue'),
+                anchor='x',
+                side='left'
+            ),
+            yaxis2=dict(
+                title=dict(text='Sentiment Moyen', font=dict(color='firebrick')),
+                tickfont=dict(color='firebrick'),
+                overlaying='y',
+                side='right'
+            ),
+            legend=dict(x=0.1, y=1.1, orientation='h'),
+            title= "",
+            hovermode='x unified'
+        )
 
-    st.plotly_chart(fig_time, use_container_width=True)
+        st.plotly_chart(fig_time, use_container_width=True)
 
     st.markdown("<h2 style='color:#FFD700;'>Répartition par Pays</h2>", unsafe_allow_html=True)
 
     st.markdown("Ce graphique montre quel pays produit le plus d'articles sur les LLM dans notre base.")
 
     # Calculer le nombre d'articles par pays
-    country_counts = df_filtered['country'].value_counts().reset_index()
-    country_counts.columns = ['country', 'num_articles']
-
-    # Créer le camembert avec une palette de couleurs qualitative
-    fig_pie = px.pie(
-        country_counts,
-        names='country',
-        values='num_articles',
-        title= False,
-        hole=0.4,  # Optionnel : crée un "donut chart"
-        color_discrete_sequence=px.colors.qualitative.Set3  # Palette qualitative avec des couleurs différenciées
-    )
+    with tracing.stage("chart_countries", country_stats) as span:
+        country_counts = country_stats.sort_values('num_articles', ascending=False, kind='stable')[['country', 'num_articles']]
+        span.out(country_counts)
+
+        # Créer le camembert avec une palette de couleurs qualitative
+        fig_pie = px.pie(
+            country_counts,
+            names='country',
+            values='num_articles',
+            title= False,
+            hole=0.4,  # Optionnel : crée un "donut chart"
+            color_discrete_sequence=px.colors.qualitative.Set3  # Palette qualitative avec des couleurs différenciées
+        )
 
-    # Personnaliser le style du camembert
-    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+        # Personnaliser le style du camembert
+        fig_pie.update_traces(textposition='inside', textinfo='percent+label')
 
-    st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(fig_pie, use_container_width=True)
 
     st.progress(current_page / total_pages)
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import tracing
+
+
+def _first_max_per_group(group_codes, values):
+    """
+    Returns the positions of the maximum of `values` within each group of `group_codes`.
+    Ties keep the first position, like `Series.idxmax`. NaN values are ignored.
+    """
+    valid = np.flatnonzero((group_codes >= 0) & ~np.isnan(values))
+    if valid.size == 0:
+        return valid
+
+    # Sort by group, then by decreasing value, then by position: the head of each group is its max
+    order = valid[np.lexsort((valid, -values[valid], group_codes[valid]))]
+    sorted_groups = group_codes[order]
+    heads = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    return order[heads]
+
+
+def top_performers_per_period(df, metrics, freq, date_column="submission_date",
+                              id_columns=("model_name", "type")):
+    """
+    For every metric and every time period, keeps the row with the best value of that metric.
+
+    Equivalent to melting `metrics` to (benchmark_metric, metric_value) and taking `idxmax` per
+    (benchmark_metric, time_period), without materializing the long frame. Returns the columns
+    `date_column`, *id_columns, benchmark_metric, metric_value and time_period (as timestamps).
+    """
+    periods = pd.to_datetime(df[date_column]).dt.to_period(freq)
+    period_codes, period_values = pd.factorize(periods, sort=True)
+
+    positions, metric_names, metric_values = [], [], []
+    for metric in metrics:
+        values = pd.to_numeric(df[metric], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        best = _first_max_per_group(period_codes, values)
+        positions.append(best)
+        metric_names.append(np.full(best.size, metric, dtype=object))
+        metric_values.append(values[best])
+
+    # Gather all winners at once rather than one frame per metric
+    positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.intp)
+    top = df.iloc[positions][[date_column, *id_columns]].reset_index(drop=True)
+    top["benchmark_metric"] = np.concatenate(metric_names) if metric_names else np.empty(0, dtype=object)
+    top["metric_value"] = np.concatenate(metric_values) if metric_values else np.empty(0)
+    top["time_period"] = period_values.to_timestamp()[period_codes[positions]]
+    return top
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_top_performers(_df, snapshot, filter_key, metrics, freq):
+    """
+    Cached `top_performers_per_period`. `_df` is not hashed: the frame must be fully determined
+    by the data `snapshot` it comes from and the `filter_key` applied to it.
+    """
+    tracing.cache_miss()
+    return top_performers_per_period(_df, list(metrics), freq)
+
+
+class AggregateCube:
+    """
+    Measures of a frame pre-aggregated once per combination of its `dimensions` (author, precision,
+    type, country, period...), so that filtered views are rolled up from the cells instead of
+    re-scanning the rows.
+
+    Each cell holds its row count, the sum of every `sums` column and, for every `maxima` column, its
+    highest value with the position (in the frame given here) of the row holding it, ties keeping the
+    first row. Missing dimension values form cells of their own. Dimensions are stored as codes into
+    their sorted distinct values, so that filters and roll-ups work on integer arrays.
+    """
+
+    def __init__(self, df, dimensions, sums=(), maxima=()):
+        self.dimensions = list(dimensions)
+        self.sums = list(sums)
+        self.maxima = list(maxima)
+
+        grouped = df.reset_index(drop=True).groupby(self.dimensions, observed=True, dropna=False, sort=False)
+        codes = grouped.ngroup().to_numpy()
+        cells = grouped.size().rename("count").reset_index()
+        for column in self.sums:
+            cells[column] = grouped[column].sum().to_numpy()
+        for column in self.maxima:
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            best = _first_max_per_group(codes, values)
+            rows = np.full(len(cells), -1)
+            rows[codes[best]] = best
+            cells[column] = np.where(rows >= 0, values[rows], np.nan)
+            cells[f"{column}_row"] = rows
+        self.cells = cells
+
+        # Dimension -> (code of each cell, -1 when missing; sorted distinct values)
+        self.levels = {dimension: pd.factorize(cells[dimension], sort=True) for dimension in self.dimensions}
+
+    def rollup(self, by, isin=(), between=()):
+        """
+        Aggregates the cells whose dimensions pass the filters by the `by` dimensions (missing `by`
+        values dropped, like a groupby of the rows), sorted by `by`. `isin` is a sequence of
+        (dimension, allowed values) pairs and `between` of (dimension, (low, high)) pairs, bounds
+        included. Returns `count`, the sums and, for each maximum, its value and `<column>_row`.
+        """
+        by = list(by)
+        keep = np.ones(len(self.cells), dtype=bool)
+        for dimension, values in isin:
+            codes, levels = self.levels[dimension]
+            allowed = levels.get_indexer(list(values))
+            keep &= np.isin(codes, allowed[allowed >= 0])
+        for dimension, (low, high) in between:
+            codes, levels = self.levels[dimension]
+            keep &= np.isin(codes, np.flatnonzero((levels >= low) & (levels <= high)))
+        for dimension in by:
+            keep &= self.levels[dimension][0] >= 0
+        cells = np.flatnonzero(keep)
+
+        # One code per combination of `by` values, in the order of the sorted values
+        shape = [len(self.levels[dimension][1]) for dimension in by]
+        combined = np.ravel_multi_index([self.levels[dimension][0][cells] for dimension in by], shape)
+        groups, group_codes = np.unique(combined, return_inverse=True)
+        positions = np.unravel_index(groups, shape)
+        result = pd.DataFrame({dimension: self.levels[dimension][1].take(position)
+                               for dimension, position in zip(by, positions)})
+        result["count"] = np.bincount(group_codes, weights=self.cells["count"].to_numpy()[cells],
+                                      minlength=len(groups)).astype(np.int64)
+        for column in self.sums:
+            result[column] = np.bincount(group_codes, weights=self.cells[column].to_numpy(dtype=float)[cells],
+                                         minlength=len(groups))
+        # Groups without any value of a maximum are dropped
+        found = np.ones(len(groups), dtype=bool)
+        for column in self.maxima:
+            # Best cell of each group: highest value, then first row
+            values = self.cells[column].to_numpy()[cells]
+            rows = self.cells[f"{column}_row"].to_numpy()[cells]
+            valid = np.flatnonzero(rows >= 0)
+            order = valid[np.lexsort((rows[valid], -values[valid], group_codes[valid]))]
+            heads = order[np.r_[True, group_codes[order][1:] != group_codes[order][:-1]]] if len(order) else order
+            best_values = np.full(len(groups), np.nan)
+            best_rows = np.full(len(groups), -1)
+            best_values[group_codes[heads]] = values[heads]
+            best_rows[group_codes[heads]] = rows[heads]
+            result[column] = best_values
+            result[f"{column}_row"] = best_rows
+            found &= best_rows >= 0
+        return result if found.all() else result[found].reset_index(drop=True)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_cube(_build, snapshot, name):
+    """
+    Cube `name` of a snapshot, built once with `_build()` and shared by all sessions. `_build` is not
+    hashed: the cube must be fully determined by `snapshot` and `name`.
+    """
+    tracing.cache_miss()
+    return _build()
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_rollup(_cube, snapshot, name, by, isin=(), between=()):
+    """
+    Cached `AggregateCube.rollup` of cube `name` of `snapshot` (least recently used views evicted
+    first). The filters must be hashable: tuples of (dimension, tuple of values or bounds).
+    """
+    tracing.cache_miss()
+    return _cube.rollup(by, isin, between)
+
+
+def cube_rollup(build, snapshot, name, by, isin=(), between=()):
+    """
+    Roll-up of the shared cube `name` of `snapshot` (built with `build()` on first use), measured as one
+    cached stage: a miss when the cube or the view had to be computed.
+    """
+    with tracing.stage(f"cube_{name}", cached=True) as span:
+        return span.out(cached_rollup(get_cube(build, snapshot, name), snapshot, name, tuple(by), isin, between))
@@ -5,35 +5,74 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 
-@st.cache_data(ttl=3600)
-def fetch_models_data():
-    response = requests.get(
-        "https://huggingface.co/api/models",
-        params={"limit": 10000, "full": "True", "config": "True"}
-    )
-    if response.status_code == 200:
-        data = response.json()
-        models_data = []
-        for model in data:
-            models_data.append({
-                "ID": model.get("id"),
-                "Auteur": model.get("author"),
-                "Gated": model.get("gated"),
-                "Inference": model.get("inference"),
-                "Dernière modification": model.get("lastModified"),
-                "Likes": model.get("likes"),
-                "Trending Score": model.get("trendingScore"),
-                "Privé": model.get("private"),
-                "Téléchargements": model.get("downloads"),
-                "Tags": model.get("tags"),
-                "Library": model.get("library_name"),
-                "Date de création": model.get("createdAt"),
-            })
-        return pd.DataFrame(models_data)
-    else:
-        st.error(f"Erreur de chargement des données ({response.status_code})")
+import data_sources
+import snapshot_cache
+import tracing
+from aggregations import AggregateCube, cube_rollup
+from compact import decode_tags
+from filter_engine import get_filter_engine, has_tags, isin
+from hf_catalog import CATALOG_SOURCE, MAX_MODELS, read_bundled_models, read_models_snapshot, refresh_catalog
+from search_index import get_search_index
+from tag_index import get_tag_index
+
+# Âge (en secondes) au-delà duquel le catalogue est rafraîchi en arrière-plan
+CATALOG_REFRESH_INTERVAL = 3600
+
+def fetch_models_data(max_models=MAX_MODELS):
+    """
+    Catalogue des modèles, servi depuis la copie locale.
+
+    Le premier chargement télécharge le catalogue complet ; ensuite, quand la copie a plus d'une heure,
+    seuls les modèles modifiés depuis la dernière mise à jour sont récupérés, en arrière-plan.
+    En mode snapshot, seul le catalogue livré dans Data_csv est utilisé ; en mode hybrid, il est servi
+    tant que le premier téléchargement n'est pas terminé.
+    """
+    if data_sources.DATA_MODE == "snapshot":
+        return read_bundled_models()
+    try:
+        latest = snapshot_cache.latest_snapshot_key(CATALOG_SOURCE)
+        if latest is None and data_sources.DATA_MODE == "hybrid":
+            snapshot_cache.run_in_background((CATALOG_SOURCE, "refresh"), lambda: refresh_catalog(max_models))
+            return read_bundled_models()
+        if latest is None:
+            with st.spinner("Chargement du catalogue des modèles..."):
+                # Si le préchargement est déjà en train de télécharger le catalogue, on l'attend
+                snapshot_cache.run_exclusive((CATALOG_SOURCE, "refresh"), lambda: refresh_catalog(max_models))
+                latest = snapshot_cache.latest_snapshot_key(CATALOG_SOURCE) or refresh_catalog(max_models)
+        elif snapshot_cache.snapshot_age(CATALOG_SOURCE, latest) > CATALOG_REFRESH_INTERVAL:
+            snapshot_cache.run_in_background((CATALOG_SOURCE, "refresh"), lambda: refresh_catalog(max_models))
+        return read_models_snapshot(latest)
+    except requests.RequestException as e:
+        status = getattr(e.response, "status_code", None)
+        st.error(f"Erreur de chargement des données ({status or e})")
         return pd.DataFrame()
 
+def warm_models_data(ahead=0, max_models=MAX_MODELS):
+    """
+    Préchargement hors session (warmup) : met à jour le catalogue s'il est absent ou expire dans moins de
+    `ahead` secondes, puis le charge dans le cache partagé.
+    """
+    if data_sources.DATA_MODE == "snapshot":
+        read_bundled_models()
+        return
+
+    def refresh():
+        latest = snapshot_cache.latest_snapshot_key(CATALOG_SOURCE)
+        if latest is None or snapshot_cache.snapshot_age(CATALOG_SOURCE, latest) > CATALOG_REFRESH_INTERVAL - ahead:
+            refresh_catalog(max_models)
+
+    snapshot_cache.run_exclusive((CATALOG_SOURCE, "refresh"), refresh)
+    latest = snapshot_cache.latest_snapshot_key(CATALOG_SOURCE)
+    if latest is not None:
+        read_models_snapshot(latest)
+
+def monthly_likes_cube(df):
+    """
+    Cube (auteur, mois de création) du catalogue : nombre de modèles et modèle le plus liké de chaque cellule.
+    """
+    return AggregateCube(df[['Auteur', 'Likes']].assign(Mois=df['Date de création'].dt.to_period('M')),
+                         ["Auteur", "Mois"], maxima=["Likes"])
+
 def render_datasets_page():
     # Titre principal
     st.markdown("<h1 style='text-align: center; color: #FFD700;'>Catalogue des Modèles Hugging Face</h1>", unsafe_allow_html=True)
@@ -43,12 +82,10 @@ def render_datasets_page():
         unsafe_allow_html=True
     )
 
-    df = fetch_models_data()
+    with tracing.stage("fetch", cached=True) as span:
+        df = span.out(fetch_models_data())
     if not df.empty:
-        df['Likes'] = pd.to_numeric(df['Likes'], errors='coerce')
-        df['Téléchargements'] = pd.to_numeric(df['Téléchargements'], errors='coerce')
-        df['Date de création'] = pd.to_datetime(df['Date de création'], errors='coerce')
-
+        # Les colonnes sont déjà typées à l'ingestion (hf_catalog) et compactées à la lecture (compact)
         # Metrics Section
         col1, col2, col3 = st.columns(3)  # Suppression d'une colonne
         with col1:
@@ -58,110 +95,148 @@ def render_datasets_page():
         with col3:
             st.metric("Total Téléchargements", f"{df['Téléchargements'].sum():,}")
 
+        # Index inversé des tags, construit une seule fois par version du catalogue
+        with tracing.stage("tag_index", df, cached=True):
+            tag_index = get_tag_index(df['Tags'], snapshot_cache.snapshot_id(df))
+        # Index de recherche des IDs (résultats classés par nombre de likes)
+        with tracing.stage("search_index", df, cached=True):
+            search_index = get_search_index(df['ID'], df['Likes'], snapshot_cache.snapshot_id(df), 'ID')
+
         # Sidebar filters
         st.sidebar.markdown("### Filtres")
         auteur_filter = st.sidebar.multiselect("Auteur", options=df['Auteur'].dropna().unique())
-        tags_filter = st.sidebar.multiselect("Tags", options=pd.Series([tag for sublist in df['Tags'].dropna() for tag in sublist]).unique())
-
-        # Apply Filters
-        filtered_df = df.copy()
-        if auteur_filter:
-            filtered_df = filtered_df[filtered_df['Auteur'].isin(auteur_filter)]
-        if tags_filter:
-            filtered_df = filtered_df[filtered_df['Tags'].apply(lambda x: any(tag in tags_filter for tag in (x or [])))]
+        tags_filter = st.sidebar.multiselect("Tags", options=tag_index.tags_by_frequency())
+        tags_mode = st.sidebar.radio(
+            "Combinaison des tags",
+            options=["any", "all"],
+            format_func=lambda mode: "Au moins un tag (OU)" if mode == "any" else "Tous les tags (ET)",
+            horizontal=True,
+        )
 
         # Search Bar
         search_query = st.text_input("Rechercher un modèle", value="", placeholder="Par exemple : GPT, LLAMA, MISTRAL ...")
+
+        # Apply Filters (lignes retenues mémorisées par état des filtres et partagées entre les sessions)
+        with tracing.stage("filter", df, cached=True) as span:
+            filter_engine = get_filter_engine(df, snapshot_cache.snapshot_id(df), {'Tags': tag_index})
+            clauses = []
+            if auteur_filter:
+                clauses.append(isin('Auteur', auteur_filter))
+            if tags_filter:
+                clauses.append(has_tags('Tags', tags_filter, tags_mode))
+            mask = filter_engine.mask(clauses)
+            span.out(int(mask.sum()))
         if search_query:
-            filtered_df = filtered_df[filtered_df['ID'].str.contains(search_query, case=False, na=False)]
+            with tracing.stage("search", int(mask.sum())) as span:
+                positions, fuzzy = span.out(search_index.search(search_query, mask))
+            if fuzzy and len(positions):
+                st.info(f"Aucun modèle ne contient « {search_query} » : affichage des résultats approchants.")
+            mask = search_index.mask(positions)
+            filtered_df = df.iloc[positions]
+        else:
+            filtered_df = filter_engine.select(clauses)
 
         # Titre visualisation
         st.markdown("<h2 style='color: #FFD700;'>Modèle le Plus Populaire par Mois</h2>", unsafe_allow_html=True)
         st.markdown("Ce graphique montre le modèle le plus liké chaque mois.")
 
         # Préparation des données
-        timeline_df = filtered_df.copy()
-        timeline_df['Mois'] = pd.to_datetime(timeline_df['Date de création']).dt.to_period('M')
-        
-        # Trouver le top modèle par mois
-        top_monthly = timeline_df.sort_values('Likes', ascending=False).groupby('Mois').first().reset_index()
-        top_monthly['Mois'] = top_monthly['Mois'].astype(str)
+        # (uniquement les colonnes utiles, sans copie de tout le catalogue filtré)
+        with tracing.stage("chart_top_monthly", filtered_df) as span:
+            # Top modèle par mois, replié depuis le cube (auteur, mois) calculé une fois par version du
+            # catalogue ; les tags et la recherche (hors dimensions du cube) agrègent les lignes retenues
+            if tags_filter or search_query:
+                source_df = filtered_df
+                monthly = monthly_likes_cube(filtered_df).rollup(["Mois"])
+            else:
+                source_df = df
+                authors = (("Auteur", tuple(sorted(auteur_filter))),) if auteur_filter else ()
+                monthly = cube_rollup(lambda: monthly_likes_cube(df), snapshot_cache.snapshot_id(df),
+                                      "monthly_likes", ["Mois"], authors)
+            top_monthly = pd.DataFrame({
+                'Mois': monthly['Mois'].astype(str),
+                'ID': source_df['ID'].to_numpy()[monthly['Likes_row']],
+                'Likes': source_df['Likes'].to_numpy()[monthly['Likes_row']],
+            })
+            span.out(top_monthly)
         
-        # Créer la visualisation
-        fig = go.Figure()
+            # Créer la visualisation
+            fig = go.Figure()
         
-        # Ajouter les points pour les top modèles
-        fig.add_trace(go.Scatter(
-            x=pd.to_datetime(top_monthly['Mois']),
-            y=top_monthly['Likes'],
-            mode='markers+text',
-            marker=dict(
-                color='#FFD700',
-                size=8,
-                symbol='circle',
-            ),
-            text=top_monthly['ID'].apply(lambda x: x.split('/')[-1]),  # Juste le nom du modèle
-            textposition="top center",
-            hovertemplate="<b>%{text}</b><br>" +
-                         "Likes: %{y}<br>" +
-                         "Date: %{x|%B %Y}<br>" +
-                         "<extra></extra>"
-        ))
+            # Ajouter les points pour les top modèles
+            fig.add_trace(go.Scatter(
+                x=pd.to_datetime(top_monthly['Mois']),
+                y=top_monthly['Likes'],
+                mode='markers+text',
+                marker=dict(
+                    color='#FFD700',
+                    size=8,
+                    symbol='circle',
+                ),
+                text=top_monthly['ID'].apply(lambda x: x.split('/')[-1]),  # Juste le nom du modèle
+                textposition="top center",
+                hovertemplate="<b>%{text}</b><br>" +
+                             "Likes: %{y}<br>" +
+                             "Date: %{x|%B %Y}<br>" +
+                             "<extra></extra>"
+            ))
         
-        # Ajouter des lignes entre les points
-        fig.add_trace(go.Scatter(
-            x=pd.to_datetime(top_monthly['Mois']),
-            y=top_monthly['Likes'],
-            mode='lines',
-            line=dict(color='#FFD700', width=1, dash='dot'),
-            hoverinfo='skip'
-        ))
+            # Ajouter des lignes entre les points
+            fig.add_trace(go.Scatter(
+                x=pd.to_datetime(top_monthly['Mois']),
+                y=top_monthly['Likes'],
+                mode='lines',
+                line=dict(color='#FFD700', width=1, dash='dot'),
+                hoverinfo='skip'
+            ))
         
-        # Mise en page
-        fig.update_layout(
-            title="Modèle le Plus Populaire par Mois",
-            xaxis_title="Date",
-            yaxis_title="Nombre de Likes",
-            template="plotly_dark",
-            showlegend=False,
-            height=400,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            yaxis=dict(gridcolor='rgba(128,128,128,0.2)'),
-            xaxis=dict(gridcolor='rgba(128,128,128,0.2)'),
-            hoverlabel=dict(
-                bgcolor="black",
-                font_size=12
+            # Mise en page
+            fig.update_layout(
+                title="Modèle le Plus Populaire par Mois",
+                xaxis_title="Date",
+                yaxis_title="Nombre de Likes",
+                template="plotly_dark",
+                showlegend=False,
+                height=400,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                yaxis=dict(gridcolor='rgba(128,128,128,0.2)'),
+                xaxis=dict(gridcolor='rgba(128,128,128,0.2)'),
+                hoverlabel=dict(
+                    bgcolor="black",
+                    font_size=12
+                )
             )
-        )
         
-        # Afficher le graphique
-        st.plotly_chart(fig, use_container_width=True)
+            # Afficher le graphique
+            st.plotly_chart(fig, use_container_width=True)
 
         # Tags Word Cloud
         st.markdown("<h2 style='color: #FFD700;'>Camembert des Tags</h2>", unsafe_allow_html=True)
         st.markdown("Cette visualisation représente les tags les plus fréquents dans les modèles.")
 
-        tags_series = pd.Series([tag for sublist in filtered_df['Tags'].dropna() for tag in sublist])
-        if not tags_series.empty:
-            tag_counts = tags_series.value_counts().reset_index(name="count")
-            fig_tags = px.pie(
-                tag_counts.head(10),
-                names="index",
-                values="count",
-                title="Top 10 Tags",
-                color_discrete_sequence=px.colors.sequential.Sunset
-            )
-            st.plotly_chart(fig_tags, use_container_width=True)
-            st.markdown("**Interprétation :** Ce camembert montre les thèmes dominants parmi les modèles disponibles.")
+        with tracing.stage("chart_tags", filtered_df):
+            # Sans filtre ni recherche, les comptes sont lus directement dans la taille des listes de l'index
+            tag_counts = tag_index.top(10, mask if clauses or search_query else None)
+            if not tag_counts.empty:
+                fig_tags = px.pie(
+                    tag_counts,
+                    names="tag",
+                    values="count",
+                    title="Top 10 Tags",
+                    color_discrete_sequence=px.colors.sequential.Sunset
+                )
+                st.plotly_chart(fig_tags, use_container_width=True)
+                st.markdown("**Interprétation :** Ce camembert montre les thèmes dominants parmi les modèles disponibles.")
 
         # Liste des modèles
         st.markdown("<h2 style='color: #FFD700;'>Liste des Modèles</h2>", unsafe_allow_html=True)
         st.markdown("Ce tableau affiche les modèles disponibles après application des filtres et critères de recherche.")
-        st.dataframe(filtered_df[[
-            "ID", "Auteur", "Gated", "Inference", "Dernière modification",
-            "Likes", "Trending Score", "Téléchargements", "Tags", "Library", "Date de création"
-        ]])  # Suppression de la colonne "Privé"
+        with tracing.stage("table", filtered_df):
+            st.dataframe(filtered_df.assign(Tags=decode_tags(filtered_df['Tags']))[[
+                "ID", "Auteur", "Gated", "Inference", "Dernière modification",
+                "Likes", "Trending Score", "Téléchargements", "Tags", "Library", "Date de création"
+            ]])  # Suppression de la colonne "Privé"
     else:
         st.error("Aucune donnée disponible.")
 
@@ -0,0 +1,259 @@
+import os
+import re
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import snapshot_cache
+import tracing
+
+ARTICLES_SOURCE = "articles"
+
+# Only the fields used by the Actualités page are requested and stored
+ARTICLE_SCHEMA = pa.schema([
+    ("lang", pa.string()),
+    ("url", pa.string()),
+    ("sentiment", pa.float64()),
+    ("date", pa.timestamp("ns")),
+    ("relevance", pa.float64()),
+    ("title", pa.string()),
+    ("country", pa.dictionary(pa.int32(), pa.string())),
+    ("isDuplicate", pa.bool_()),
+    ("sim", pa.float64()),
+])
+ARTICLE_COLUMNS = ARTICLE_SCHEMA.names
+# Raw API fields read to build the stored columns
+ARTICLE_FIELDS = [column for column in ARTICLE_COLUMNS if column != "country"] + ["location"]
+
+# Country label of a stringified location (as saved in Data_csv/df_articles.csv): either the
+# `country` of a place, or the label of a location which is itself a country
+_COUNTRY_PATTERN = re.compile(
+    r"^\{'type': 'country', 'label': \{'eng': ['\"](?P<own>.*?)['\"]\}"
+    r"|'country': \{.*?'label': \{'eng': ['\"](?P<nested>.*?)['\"]\}"
+)
+
+
+class EventRegistrySource:
+    """
+    Articles about LLMs from the EventRegistry API, newest first.
+    """
+
+    def __init__(self, api_key, keywords=("LLM", "model"), lang="eng"):
+        self.api_key = api_key
+        self.keywords = list(keywords)
+        self.lang = lang
+
+    def iter_articles(self, max_items, date_start=None):
+        # Imported here so that the offline sources do not need the eventregistry client
+        from eventregistry import ArticleInfoFlags, EventRegistry, QueryArticlesIter, QueryItems, ReturnInfo
+
+        er = EventRegistry(apiKey=self.api_key)
+        q = QueryArticlesIter(
+            keywords=QueryItems.AND(self.keywords),
+            lang=self.lang,
+            dateStart=date_start.date() if date_start is not None else None,
+            isDuplicateFilter="skipDuplicates",
+        )
+        # No body, concepts, categories, images, links or videos: only basic info, sentiment and location
+        return_info = ReturnInfo(articleInfo=ArticleInfoFlags(
+            bodyLen=0, body=False, authors=False, eventUri=False, image=False,
+            concepts=False, categories=False, links=False, videos=False,
+            sentiment=True, location=True,
+        ))
+        return q.execQuery(er, sortBy="date", returnInfo=return_info, maxItems=max_items)
+
+
+class CsvReplaySource:
+    """
+    Offline stand-in for `EventRegistrySource` replaying a saved export such as Data_csv/df_articles.csv.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def iter_articles(self, max_items, date_start=None):
+        df = pd.read_csv(self.path)
+        if date_start is not None:
+            df = df[pd.to_datetime(df["date"]) >= date_start]
+        df = df.sort_values("date", ascending=False, kind="stable")
+        if max_items is not None and max_items >= 0:
+            df = df.head(max_items)
+        df = df.astype(object).where(df.notna(), None)
+        return iter(df.to_dict("records"))
+
+
+def extract_countries(locations):
+    """
+    English country name of each location, or None when it has none (missing location, or a place
+    without a country). Locations are dicts as returned by the API or their textual form as saved in
+    Data_csv/df_articles.csv: the dicts are flattened once with `json_normalize` and the strings
+    parsed with a single vectorized `str.extract`.
+    """
+    locations = pd.Series(locations, dtype=object).reset_index(drop=True)
+    countries = pd.Series(None, index=locations.index, dtype=object)
+    kinds = locations.map(type)
+
+    is_dict = (kinds == dict).to_numpy()
+    if is_dict.any():
+        flat = pd.json_normalize(locations[is_dict].tolist())
+        nested = flat.get("country.label.eng", pd.Series(None, index=flat.index, dtype=object))
+        own = flat.get("label.eng", pd.Series(None, index=flat.index, dtype=object))
+        own = own.where(flat.get("type", pd.Series(None, index=flat.index, dtype=object)) == "country")
+        countries[is_dict] = nested.where(nested.notna(), own).to_numpy()
+
+    is_str = (kinds == str).to_numpy()
+    if is_str.any():
+        matches = locations[is_str].astype(str).str.extract(_COUNTRY_PATTERN)
+        countries[is_str] = matches["nested"].where(matches["nested"].notna(), matches["own"]).to_numpy()
+
+    return countries.where(countries.notna(), None)
+
+
+def articles_to_frame(articles):
+    """
+    Typed frame of a batch of article dicts, restricted to ARTICLE_COLUMNS. The raw location objects
+    are reduced to their `country` (categorical, missing when the article is not located).
+    """
+    df = pd.DataFrame([{field: article.get(field) for field in ARTICLE_FIELDS} for article in articles],
+                      columns=ARTICLE_FIELDS)
+    df["country"] = pd.Categorical(extract_countries(df.pop("location")))
+    df = df[ARTICLE_COLUMNS]
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    for column in ("sentiment", "relevance", "sim"):
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df["isDuplicate"] = df["isDuplicate"].map(lambda flag: flag in (True, "True", "true", 1)).astype(bool)
+    return df
+
+
+@tracing.traced("read_csv")
+def read_articles_csv(path):
+    """
+    Typed article frame of a saved export such as Data_csv/df_articles.csv, with the same columns and the
+    same url deduplication as the store.
+    """
+    df = articles_to_frame(list(CsvReplaySource(path).iter_articles(None)))
+    return df.dropna(subset=["url", "date"]).drop_duplicates("url").reset_index(drop=True)
+
+
+def iter_article_batches(source, max_items, batch_size=200, date_start=None):
+    """
+    Streams the articles of `source` (published on or after `date_start`) as typed frame batches
+    of `batch_size` rows.
+    """
+    batch = []
+    for article in source.iter_articles(max_items, date_start):
+        batch.append(article)
+        if len(batch) == batch_size:
+            yield articles_to_frame(batch)
+            batch = []
+    if batch:
+        yield articles_to_frame(batch)
+
+
+def store_dir():
+    """
+    Directory of the article store: one `day=YYYY-MM-DD` partition per publication date.
+    """
+    # v2: `country` extracted at ingestion instead of the raw `location` (older stores are rebuilt)
+    return snapshot_cache.CACHE_DIR / ARTICLES_SOURCE / "store-v2"
+
+
+def _version_file():
+    return store_dir() / "VERSION"
+
+
+def store_version():
+    """
+    Identifier of the last completed update of the store, or None if the store is empty.
+    """
+    try:
+        return _version_file().read_text().strip() or None
+    except OSError:
+        return None
+
+
+def store_age():
+    """
+    Seconds elapsed since the last completed update of the store.
+    """
+    return time.time() - _version_file().stat().st_mtime
+
+
+def _partitions(since=None):
+    partitions = sorted(store_dir().glob("day=*"))
+    if since is not None:
+        partitions = [path for path in partitions if path.name[len("day="):] >= since.strftime("%Y-%m-%d")]
+    return partitions
+
+
+def latest_article_date():
+    """
+    Most recent publication day in the store (read from the partition names), or None.
+    """
+    partitions = _partitions()
+    return pd.Timestamp(partitions[-1].name[len("day="):]) if partitions else None
+
+
+def _read_partitions(partitions, columns=None):
+    files = [path for partition in partitions for path in sorted(partition.glob("*.parquet"))]
+    if not files:
+        return ARTICLE_SCHEMA.empty_table().select(columns or ARTICLE_COLUMNS).to_pandas()
+    return pq.ParquetDataset(files, schema=ARTICLE_SCHEMA, partitioning=None).read(columns=columns).to_pandas()
+
+
+def _write_partitions(batch, run, number):
+    for day, rows in batch.groupby(batch["date"].dt.strftime("%Y-%m-%d")):
+        partition = store_dir() / f"day={day}"
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / f"part-{run}-{number:05d}.parquet"
+        # Write then rename, so that readers never see a half-written part
+        tmp_path = partition / f".{path.name}.tmp"
+        pq.write_table(pa.Table.from_pandas(rows, schema=ARTICLE_SCHEMA, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+
+
+@tracing.traced("download")
+def update_articles(source, max_items=2500, batch_size=200):
+    """
+    Fetches the articles published since the latest day already stored and appends them to the store,
+    batch by batch, as they arrive. Articles are deduplicated on `url` against the store and within the
+    download; articles without a url or a date are skipped. Returns the number of articles added.
+    """
+    since = latest_article_date()
+    # The API only filters by day, and the same url can be republished under another date:
+    # dedup against every stored url (a single column read)
+    known_urls = set(_read_partitions(_partitions(), columns=["url"])["url"])
+
+    # Microseconds: two updates within the same second must not overwrite each other's parts
+    run = pd.Timestamp.now().strftime("%Y%m%dT%H%M%S%f")
+    added = 0
+    for number, batch in enumerate(iter_article_batches(source, max_items, batch_size, date_start=since)):
+        batch = batch.dropna(subset=["url", "date"]).drop_duplicates("url")
+        batch = batch[~batch["url"].isin(known_urls)]
+        if batch.empty:
+            continue
+        known_urls.update(batch["url"])
+        _write_partitions(batch, run, number)
+        added += len(batch)
+
+    version_file = _version_file()
+    version_file.parent.mkdir(parents=True, exist_ok=True)
+    if added or store_version() is None:
+        version_file.write_text(run)
+    else:
+        # Nothing new: keep the version (and the shared in-memory copy), only record the check
+        os.utime(version_file)
+    return added
+
+
+@tracing.traced("read_store")
+def read_articles(since=None):
+    """
+    Reads the article store (only the days from `since` on, if given).
+    """
+    df = _read_partitions(_partitions(since))
+    df.attrs["snapshot_id"] = f"{ARTICLES_SOURCE}@{store_version()}"
+    return df
@@ -1,73 +1,366 @@
+import re
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-from datasets import load_dataset
-from bs4 import BeautifulSoup
+import plotly.graph_objects as go
+
+import charts
+import data_sources
+import data_store
+import snapshot_cache
+import tracing
+from compact import compact_leaderboard_frame
+from filter_engine import get_filter_engine, isin
+from hf_catalog import available_catalog
+from query_engine import get_backend
+from aggregations import AggregateCube, cached_top_performers, cube_rollup
+from efficiency import cached_efficiency, top_efficient
+from model_join import get_join_index, joined_frame
+from similarity import PROFILE_COLUMNS, get_similarity_index, similar_models
+from table_view import render_paginated_table
+
+LEADERBOARD_DATASET = "open-llm-leaderboard/contents"
+LEADERBOARD_SOURCE = "leaderboard"
+
+# First <a href="...">text</a> of a leaderboard cell; anything fancier is left to BeautifulSoup
+_MODEL_LINK_PATTERN = re.compile(
+    r'<a\b[^>]*?\bhref=(?P<quote>["\'])(?P<link>.*?)(?P=quote)[^>]*>(?P<text>[^<&]*)</a>',
+    re.IGNORECASE | re.DOTALL,
+)
+
+def extract_model_info(html):
+    """
+    Extracts the display text and link of the first anchor of an HTML cell with BeautifulSoup.
+    """
+    if not isinstance(html, str):
+        return html, ''
+    # Only needed for the cells the regex cannot parse
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    first_link = soup.find('a')
+    if first_link:
+        model_link = first_link.get('href', '')
+        model_text = first_link.get_text()
+        return model_text, model_link
+    else:
+        return html, ''  # Return the original text if no link found
 
-def fetch_leaderboard_data():
+@tracing.traced("model_links")
+def extract_model_links(html):
     """
-    Fetches data from the Hugging Face Open LLM Leaderboard dataset.
+    Vectorized version of `extract_model_info` over a whole column.
+    Returns a (model_name, model_link) pair of Series aligned on `html`.
+    """
+    html = html.astype(object)
+    extracted = html.str.extract(_MODEL_LINK_PATTERN)
+    names = extracted['text'].astype(object)
+    links = extracted['link'].astype(object)
+
+    # Cells without any anchor keep their original text and an empty link
+    no_anchor = ~html.str.contains('<a', case=False, na=False, regex=False)
+    names[no_anchor] = html[no_anchor]
+    links[no_anchor] = ''
+
+    # Malformed cells, entities or nested tags: fall back to BeautifulSoup
+    fallback = names.isna() & ~no_anchor
+    if fallback.any():
+        with tracing.stage("beautifulsoup", int(fallback.sum())):
+            parsed = html[fallback].map(extract_model_info)
+        names[fallback] = parsed.str[0]
+        links[fallback] = parsed.str[1]
+
+    return names, links
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_leaderboard_revision():
     """
+    Returns the current commit hash of the leaderboard dataset, or None if the hub is unreachable.
+    """
+    from huggingface_hub import HfApi
+
     try:
-        dataset = load_dataset("open-llm-leaderboard/contents", split="train")
-        df = dataset.to_pandas()
-
-        # Rename columns to match expected names
-        df = df.rename(columns={
-            "Type": "type",
-            "Model": "model_name_html",
-            "Submission Date": "submission_date",
-            "Average ⬆️": "score",
-            "Precision": "precision",
-            "IFEval": "IFEval",
-            "BBH": "BBH",
-            "CO₂ cost (kg)": "co2_cost_kg",
-            "#Params (B)": "params_b",
-            "MATH Lvl 5": "MATH Lvl 5",
-            "GPQA": "GPQA",
-            "MUSR": "MUSR",
-            "MMLU-PRO": "MMLU-PRO",
-        })
-
-        # Process 'model_name_html' to extract link and display text
-        def extract_model_info(html):
-            soup = BeautifulSoup(html, 'html.parser')
-            first_link = soup.find('a')
-            if first_link:
-                model_link = first_link['href']
-                model_text = first_link.get_text()
-                return model_text, model_link
-            else:
-                return html, ''  # Return the original text if no link found
+        return HfApi().dataset_info(LEADERBOARD_DATASET).sha
+    except Exception:
+        return None
 
-        df['model_name'], df['model_link'] = zip(*df['model_name_html'].apply(extract_model_info))
-        
-        # Simplify model names to only show the last part after the last slash
-        df['model_name'] = df['model_name'].apply(lambda x: x.split('/')[-1] if isinstance(x, str) and '/' in x else x)
+def build_leaderboard_frame(revision=None):
+    """
+    Downloads the leaderboard dataset at `revision` and normalizes it into the frame used by the page.
+    """
+    # Imported here: the datasets stack is only needed when a new revision has to be downloaded
+    from datasets import load_dataset
 
-        # Ensure required columns exist
-        required_columns = ["precision", "type", "model_name", "submission_date", "score", "model_link", "co2_cost_kg", "params_b"]
-        benchmark_metric_columns = ["IFEval", "BBH", "MATH Lvl 5", "GPQA", "MUSR", "MMLU-PRO"]
-        required_columns.extend(benchmark_metric_columns)
+    with tracing.stage("load_dataset") as span:
+        df = span.out(load_dataset(LEADERBOARD_DATASET, split="train", revision=revision).to_pandas())
+    return normalize_leaderboard_frame(df)
 
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        for col in missing_columns:
-            df[col] = None  # Handle missing columns appropriately
+@tracing.traced("read_csv")
+def read_leaderboard_csv(path):
+    """
+    Leaderboard frame of a CSV export of the page (such as Data_csv/benchmark.csv), normalized like a download.
+    """
+    df = pd.read_csv(path).rename(columns={"MATH_Lvl_5": "MATH Lvl 5", "MMLU_PRO": "MMLU-PRO"})
+    return normalize_leaderboard_frame(df)
 
-        # Convert data types
-        df["submission_date"] = pd.to_datetime(df["submission_date"], errors='coerce')
-        df["score"] = pd.to_numeric(df["score"], errors='coerce')
-        df["co2_cost_kg"] = pd.to_numeric(df["co2_cost_kg"], errors='coerce')
-        df["params_b"] = pd.to_numeric(df["params_b"], errors='coerce')
+@tracing.traced("normalize")
+def normalize_leaderboard_frame(df):
+    """
+    Normalizes the raw leaderboard columns into the frame used by the page.
+    """
+    # Rename columns to match expected names
+    df = df.rename(columns={
+        "Type": "type",
+        "Model": "model_name_html",
+        "Submission Date": "submission_date",
+        "Average ⬆️": "score",
+        "Precision": "precision",
+        "IFEval": "IFEval",
+        "BBH": "BBH",
+        "CO₂ cost (kg)": "co2_cost_kg",
+        "#Params (B)": "params_b",
+        "MATH Lvl 5": "MATH Lvl 5",
+        "GPQA": "GPQA",
+        "MUSR": "MUSR",
+        "MMLU-PRO": "MMLU-PRO",
+    })
+
+    # Process 'model_name_html' to extract link and display text
+    df['model_name'], df['model_link'] = extract_model_links(df['model_name_html'])
+
+    # Simplify model names to only show the last part after the last slash
+    df['model_name'] = df['model_name'].str.rsplit('/', n=1).str[-1]
+
+    # Ensure required columns exist
+    required_columns = ["precision", "type", "model_name", "submission_date", "score", "model_link", "co2_cost_kg", "params_b"]
+    benchmark_metric_columns = ["IFEval", "BBH", "MATH Lvl 5", "GPQA", "MUSR", "MMLU-PRO"]
+    required_columns.extend(benchmark_metric_columns)
+
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    for col in missing_columns:
+        df[col] = None  # Handle missing columns appropriately
+
+    # Convert data types
+    df["submission_date"] = pd.to_datetime(df["submission_date"], errors='coerce')
+    df["score"] = pd.to_numeric(df["score"], errors='coerce')
+    df["co2_cost_kg"] = pd.to_numeric(df["co2_cost_kg"], errors='coerce')
+    df["params_b"] = pd.to_numeric(df["params_b"], errors='coerce')
+
+    for col in benchmark_metric_columns:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    return df
+
+def _read_leaderboard_snapshot(key):
+    # One read-only copy per snapshot, shared by every session
+    return data_store.shared_table(
+        LEADERBOARD_SOURCE, key,
+        lambda: compact_leaderboard_frame(snapshot_cache.read_snapshot(LEADERBOARD_SOURCE, key)),
+    )
 
-        for col in benchmark_metric_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+def _read_bundled_leaderboard():
+    # Data_csv/benchmark.csv, normalized once into a typed Parquet copy
+    return data_sources.shared_bundled_table(LEADERBOARD_SOURCE, read_leaderboard_csv, compact_leaderboard_frame)
+
+def _build_leaderboard_snapshot(revision):
+    snapshot_cache.run_exclusive(
+        (LEADERBOARD_SOURCE, revision),
+        lambda: snapshot_cache.write_snapshot(LEADERBOARD_SOURCE, revision, build_leaderboard_frame(revision)),
+    )
+    if not snapshot_cache.has_snapshot(LEADERBOARD_SOURCE, revision):
+        # The build we waited for failed: retry here so that the error is reported
+        snapshot_cache.write_snapshot(LEADERBOARD_SOURCE, revision, build_leaderboard_frame(revision))
 
-        return df
+def warm_leaderboard_data(ahead=0):
+    """
+    Warm-up outside of any session: builds the snapshot of the current leaderboard revision if it is
+    missing, then loads it into the shared cache. Snapshots are keyed by revision and never expire,
+    so `ahead` is not used.
+    """
+    if data_sources.DATA_MODE == "snapshot":
+        _read_bundled_leaderboard()
+        return
+    revision = get_leaderboard_revision()
+    if revision is not None and not snapshot_cache.has_snapshot(LEADERBOARD_SOURCE, revision):
+        _build_leaderboard_snapshot(revision)
+    key = revision if snapshot_cache.has_snapshot(LEADERBOARD_SOURCE, revision) else \
+        snapshot_cache.latest_snapshot_key(LEADERBOARD_SOURCE)
+    if key is not None:
+        _read_leaderboard_snapshot(key)
+
+def fetch_leaderboard_data():
+    """
+    Fetches data from the Hugging Face Open LLM Leaderboard dataset.
+
+    The normalized frame is stored on disk as a Parquet snapshot keyed by the dataset revision:
+    reruns and new sessions read it back from the cache, a new upstream revision is built in the
+    background while the previous snapshot keeps being served, and the last good snapshot is used
+    when the hub is unreachable. In snapshot mode only Data_csv/benchmark.csv is used; in hybrid mode
+    it is served until the first download has completed.
+    """
+    if data_sources.DATA_MODE == "snapshot":
+        return _read_bundled_leaderboard()
+    try:
+        revision = get_leaderboard_revision()
+        latest = snapshot_cache.latest_snapshot_key(LEADERBOARD_SOURCE)
+
+        if latest is None and data_sources.DATA_MODE == "hybrid":
+            if revision is not None:
+                snapshot_cache.refresh_in_background(
+                    LEADERBOARD_SOURCE, revision, lambda: build_leaderboard_frame(revision)
+                )
+            return _read_bundled_leaderboard()
+
+        if revision is None and latest is None:
+            st.error("Impossible de joindre le Hub Hugging Face et aucune copie locale du leaderboard n'est disponible.")
+            return pd.DataFrame()
+
+        if revision is not None and not snapshot_cache.has_snapshot(LEADERBOARD_SOURCE, revision):
+            if latest is None:
+                # First run: nothing to serve yet, build the snapshot synchronously
+                # (or wait for the warm-up if it is already building it)
+                with st.spinner("Chargement du leaderboard..."):
+                    _build_leaderboard_snapshot(revision)
+                latest = revision
+            else:
+                snapshot_cache.refresh_in_background(
+                    LEADERBOARD_SOURCE, revision, lambda: build_leaderboard_frame(revision)
+                )
+        elif revision is not None:
+            latest = revision
+
+        return _read_leaderboard_snapshot(latest)
     except Exception as e:
         st.error(f"Error fetching leaderboard data: {e}")
         return pd.DataFrame()
 
+def co2_cube(df):
+    """
+    Cube (precision, type, submission date) of the CO₂ cost of the submissions reporting one.
+    """
+    return AggregateCube(df.dropna(subset=['submission_date', 'co2_cost_kg']),
+                         ["precision", "type", "submission_date"], sums=["co2_cost_kg"])
+
+def timeline_figure(top_performers):
+    """
+    Line chart of the best value of each metric per period; long daily series are downsampled (LTTB).
+    """
+    data = charts.downsample(top_performers, "time_period", "metric_value", group="benchmark_metric")
+    return px.line(
+        data,
+        x="time_period",
+        y="metric_value",
+        color='benchmark_metric',
+        title=False,
+        labels={
+            "time_period": "Période",
+            "metric_value": "Valeur Métrique",
+            "benchmark_metric": "Métrique"
+        },
+        markers=len(data) <= charts.MAX_MARKER_POINTS,
+        render_mode=charts.render_mode(len(data)),
+    )
+
+def types_figure(type_counts):
+    """
+    Donut of the model types from their (type, count) rows: the figure holds one value per type
+    instead of one label per model (types in order of first appearance, which sets their colors).
+    """
+    return px.pie(
+        type_counts,
+        names="type",
+        values="count",
+        title="Distribution des Types de Modèles",
+        hole=0.4,
+    )
+
+def co2_figure(co2_df):
+    """
+    Cumulative CO₂ cost per submission date, downsampled (LTTB) when there are many dates.
+    """
+    data = charts.downsample(co2_df, 'submission_date', 'cumulative_co2')
+    return px.line(
+        data,
+        x='submission_date',
+        y='cumulative_co2',
+        title='Coût CO₂ Cumulé au Fil du Temps',
+        labels={
+            'submission_date': 'Date de Soumission',
+            'cumulative_co2': 'Coût CO₂ Cumulé (kg)'
+        },
+        markers=len(data) <= charts.MAX_MARKER_POINTS,
+        render_mode=charts.render_mode(len(data)),
+    )
+
+def efficiency_figure(analysis_df, selected_benchmark):
+    """
+    Performance vs CO₂ cost scatter (size: parameters, color: type) of an efficiency frame, drawn with
+    WebGL when large, with the models of the Pareto front marked by stars.
+    """
+    fig_analysis = px.scatter(
+        analysis_df,
+        x='co2_cost_kg',
+        y=selected_benchmark,
+        size='params_b',
+        color='type',
+        hover_name='model_name',
+        title=False,
+        labels={
+            'co2_cost_kg': 'Coût CO₂ (kg)',
+            selected_benchmark: 'Performance',
+            'params_b': 'Paramètres (B)',
+            'type': 'Type de Modèle'
+        },
+        size_max=45,
+        render_mode=charts.render_mode(len(analysis_df)),
+    )
+
+    # Update hover template to include all relevant information
+    fig_analysis.update_traces(
+        hovertemplate="<b>%{hovertext}</b><br>" +
+                     "Performance: %{y:.2f}<br>" +
+                     "CO₂: %{x:.2f} kg<br>" +
+                     "Paramètres: %{marker.size:.1f}B<br>" +
+                     "Type: %{marker.color}<br>" +
+                     "<extra></extra>"
+    )
+
+    front = analysis_df[analysis_df['pareto']]
+    fig_analysis.add_trace(go.Scatter(
+        x=front['co2_cost_kg'],
+        y=front[selected_benchmark],
+        mode='markers',
+        name='Front de Pareto',
+        marker=dict(symbol='star', size=14, color='#FFD700', line=dict(color='black', width=1)),
+        # The hover comes from the model's own point under the star: the overlay only sends its coordinates
+        hoverinfo='skip',
+    ))
+    return fig_analysis
+
+def popularity_figure(joined, selected_benchmark):
+    """
+    Performance vs downloads scatter (log scale, color: type) of the leaderboard models listed in the
+    catalog, from their joined rows.
+    """
+    fig_popularity = px.scatter(
+        joined,
+        x='Téléchargements',
+        y=selected_benchmark,
+        color='type',
+        hover_name='model_name',
+        hover_data={'Likes': True, 'precision': True},
+        log_x=True,
+        title=False,
+        labels={
+            'Téléchargements': 'Téléchargements',
+            selected_benchmark: 'Performance',
+            'type': 'Type de Modèle',
+            'precision': 'Précision',
+        },
+        render_mode=charts.render_mode(len(joined)),
+    )
+    return fig_popularity
+
 def render_benchmarks_page():
     if "active_page" not in st.session_state:
         st.session_state["active_page"] = "Accueil"
@@ -82,7 +375,8 @@ def render_benchmarks_page():
     st.markdown("<h5 style='color:#FFD700;'>Explorez les données de performance des modèles de langage :</h1>", unsafe_allow_html=True)
 
     # Fetch leaderboard data
-    df = fetch_leaderboard_data()
+    with tracing.stage("fetch", cached=True) as span:
+        df = span.out(fetch_leaderboard_data())
 
     if not df.empty:
         # Check for required columns
@@ -108,7 +402,12 @@ def render_benchmarks_page():
         )
 
         # Apply filters
-        filtered_df = df[df["precision"].isin(precision_filter) & df["type"].isin(model_type_filter)]
+        # (lignes retenues mémorisées par état des filtres et partagées entre les sessions)
+        with tracing.stage("filter", df, cached=True) as span:
+            filter_engine = get_filter_engine(df, snapshot_cache.snapshot_id(df))
+            base_clauses = [isin("precision", precision_filter), isin("type", model_type_filter)]
+            clauses = base_clauses
+            filtered_df = span.out(filter_engine.select(clauses))
 
         # Search box with real-time filtering and multi-select
         all_models = filtered_df["model_name"].unique()
@@ -118,8 +417,12 @@ def render_benchmarks_page():
             placeholder="Choisissez une option"
         )
         
-        if selected_models:  # Only filter if models are selected
-            filtered_df = filtered_df[filtered_df["model_name"].isin(selected_models)]
+        if selected_models:  # Only filter if models are selected (derived from the rows of the filters above)
+            clauses = clauses + [isin("model_name", selected_models)]
+            filtered_df = filter_engine.select(clauses)
+
+        # Hashable summary of the filters, used to key the cached aggregations
+        filter_key = (tuple(sorted(precision_filter)), tuple(sorted(model_type_filter)), tuple(sorted(selected_models)))
 
         # **Display Options**
         st.sidebar.header("Options d'Affichage")
@@ -144,22 +447,10 @@ def render_benchmarks_page():
         # Proceed with plotting
         if benchmark_metric_columns:
             # Prepare data for plotting
-            plot_columns = ['submission_date', 'model_name', 'type'] + benchmark_metric_columns + ['score']
-            filtered_df_for_plot = filtered_df.dropna(subset=['submission_date'])[plot_columns].copy()
-
-            # Melt the dataframe to long format
-            df_melted = pd.melt(
-                filtered_df_for_plot,
-                id_vars=['submission_date', 'model_name', 'type'],
-                value_vars=benchmark_metric_columns + ['score'],
-                var_name='benchmark_metric',
-                value_name='metric_value'
-            )
-
-            # Remove rows with NaN metric_value
-            df_melted = df_melted.dropna(subset=['metric_value'])
+            plot_metrics = benchmark_metric_columns + ['score']
+            filtered_df_for_plot = filtered_df[filtered_df['submission_date'].notna()]
 
-            if not df_melted.empty:
+            if filtered_df_for_plot[plot_metrics].notna().to_numpy().any():
                 st.markdown("<h2 style='color:#FFD700;'>Évolution des Performances par Type de Modèle</h2>", unsafe_allow_html=True)
                 col1, col2 = st.columns([2, 1])
                 st.markdown("""
@@ -179,34 +470,22 @@ def render_benchmarks_page():
                     'Mensuel': 'M',
                 }
 
-                # Use selected time interval
-                df_melted['time_period'] = df_melted['submission_date'].dt.to_period(interval_mapping[time_interval])
-
-                # Group by benchmark_metric and time_period
-                grouped = df_melted.groupby(['benchmark_metric', 'time_period'])
-
-                # Fix the syntax error here - replace curly braces with square brackets
-                top_performers = grouped.apply(lambda x: x.loc[x['metric_value'].idxmax()])
-                top_performers = top_performers.reset_index(drop=True)
-
-                # Convert time_period to timestamp for plotting
-                top_performers['time_period'] = top_performers['time_period'].dt.to_timestamp()
+                # Best model per metric and period, cached per (snapshot, filters, interval)
+                with tracing.stage("top_performers", filtered_df_for_plot, cached=True) as span:
+                    top_performers = span.out(cached_top_performers(
+                        filtered_df_for_plot,
+                        snapshot_cache.snapshot_id(df),
+                        filter_key,
+                        tuple(plot_metrics),
+                        interval_mapping[time_interval],
+                    ))
 
                 # Create the line plot with top performers
-                fig = px.line(
-                    top_performers.sort_values("time_period"),
-                    x="time_period",
-                    y="metric_value",
-                    color='benchmark_metric',
-                    title=False,
-                    labels={
-                        "time_period": "Période",
-                        "metric_value": "Valeur Métrique",
-                        "benchmark_metric": "Métrique"
-                    },
-                    markers=True,
-                )
-                st.plotly_chart(fig)
+                with tracing.stage("chart_timeline", top_performers, cached=True):
+                    st.plotly_chart(charts.cached_figure(
+                        lambda: timeline_figure(top_performers), snapshot_cache.snapshot_id(df), "timeline",
+                        (filter_key, interval_mapping[time_interval]),
+                    ))
             else:
                 st.write("No data available for the selected benchmark metrics.")
         else:
@@ -215,35 +494,30 @@ def render_benchmarks_page():
         if "type" in filtered_df.columns:
             st.markdown("<h2 style='color:#FFD700;'>Répartition des Architectures de Modèles</h2>", unsafe_allow_html=True)
             st.markdown("Ce graphique circulaire illustre la diversité des approches techniques utilisées dans le développement des modèles de langage.")
-            fig_pie = px.pie(
-                filtered_df,
-                names="type",
-                title="Distribution des Types de Modèles",
-                hole=0.4,
-            )
-            st.plotly_chart(fig_pie)
+            with tracing.stage("chart_types", filtered_df, cached=True):
+                st.plotly_chart(charts.cached_figure(
+                    lambda: types_figure(get_backend().value_counts(df, clauses, "type")),
+                    snapshot_cache.snapshot_id(df), "types", filter_key,
+                ))
 
         # **Cumulative CO₂ Cost Plot**
         st.markdown("<h2 style='color:#FFD700;'>Coût CO₂ Cumulé au Fil du Temps (en kg)</h2>", unsafe_allow_html=True)
         st.markdown("Cette courbe révèle l'évolution de l'empreinte carbone totale liée à l'entraînement des modèles, soulignant l'importance des considérations environnementales dans le développement de l'IA.")
 
         if 'submission_date' in filtered_df.columns and 'co2_cost_kg' in filtered_df.columns:
-            co2_df = filtered_df.dropna(subset=['submission_date', 'co2_cost_kg'])
-            co2_df = co2_df.sort_values('submission_date')
-            co2_df['cumulative_co2'] = co2_df['co2_cost_kg'].cumsum()
-
-            fig_co2 = px.line(
-                co2_df,
-                x='submission_date',
-                y='cumulative_co2',
-                title='Coût CO₂ Cumulé au Fil du Temps',
-                labels={
-                    'submission_date': 'Date de Soumission',
-                    'cumulative_co2': 'Coût CO₂ Cumulé (kg)'
-                },
-                markers=True
-            )
-            st.plotly_chart(fig_co2)
+            with tracing.stage("chart_co2", filtered_df, cached=True) as span:
+                # Daily CO₂ cost rolled up from the (precision, type, date) cube built once per snapshot;
+                # a selection of models (not a cube dimension) is aggregated from its own rows
+                if selected_models:
+                    daily_co2 = co2_cube(filtered_df).rollup(["submission_date"])
+                else:
+                    daily_co2 = cube_rollup(lambda: co2_cube(df), snapshot_cache.snapshot_id(df), "co2",
+                                            ["submission_date"], (("precision", filter_key[0]), ("type", filter_key[1])))
+                co2_df = daily_co2.assign(cumulative_co2=daily_co2['co2_cost_kg'].cumsum())
+                span.out(co2_df)
+                st.plotly_chart(charts.cached_figure(
+                    lambda: co2_figure(co2_df), snapshot_cache.snapshot_id(df), "co2", filter_key
+                ))
         else:
             st.write("Les données de coût CO₂ ne sont pas disponibles.")
 
@@ -286,69 +560,160 @@ def render_benchmarks_page():
         if missing_columns:
             st.write(f"Colonnes manquantes pour le graphique : {', '.join(missing_columns)}")
         else:
-            analysis_df = filtered_df.dropna(subset=required_columns_for_plot)
-            analysis_df['params_b'] = pd.to_numeric(analysis_df['params_b'], errors='coerce')
-
-            # Filter out non-positive or missing values
-            analysis_df = analysis_df[analysis_df['params_b'] > 0]
-            analysis_df = analysis_df.dropna(subset=['params_b'])
-
-            fig_analysis = px.scatter(
-                analysis_df,
-                x='co2_cost_kg',
-                y=selected_benchmark,
-                size='params_b',
-                color='type',
-                hover_name='model_name',
-                title=False,
-                labels={
-                    'co2_cost_kg': 'Coût CO₂ (kg)',
-                    selected_benchmark: 'Performance',
-                    'params_b': 'Paramètres (B)',
-                    'type': 'Type de Modèle'
-                },
-                size_max=45,
-            )
-
-            # Update hover template to include all relevant information
-            fig_analysis.update_traces(
-                hovertemplate="<b>%{hovertext}</b><br>" +
-                             "Performance: %{y:.2f}<br>" +
-                             "CO₂: %{x:.2f} kg<br>" +
-                             "Paramètres: %{marker.size:.1f}B<br>" +
-                             "Type: %{marker.color}<br>" +
-                             "<extra></extra>"
-            )
-
-            st.plotly_chart(fig_analysis)
+            # Indices d'efficacité et front de Pareto (coût CO₂, performance, paramètres), calculés une fois
+            # par (snapshot, filtres, métrique)
+            with tracing.stage("efficiency", filtered_df, cached=True) as span:
+                efficiency = span.out(cached_efficiency(filtered_df, snapshot_cache.snapshot_id(df), filter_key,
+                                                        selected_benchmark))
+            with tracing.stage("chart_efficiency", efficiency, cached=True):
+                st.plotly_chart(charts.cached_figure(
+                    lambda: efficiency_figure(efficiency, selected_benchmark), snapshot_cache.snapshot_id(df),
+                    "efficiency", (filter_key, selected_benchmark),
+                ))
             
             # Ajouter le conseil après le graphique
             st.markdown("""
-            💡 **Conseil:** Observez les modèles qui se démarquent par leur efficacité énergétique 
-            tout en maintenant de bonnes performances.
+            💡 **Conseil:** Les étoiles marquent le front de Pareto : aucun autre modèle n'y fait mieux à la fois
+            en performance, en coût CO₂ et en nombre de paramètres. Le classement ci-dessous liste les meilleurs
+            candidats selon le critère choisi.
             """)
 
-        # Add table section at the bottom with scrollable layout
-        st.markdown("<h2 style='color:#FFD700;'>Liste Complète des Modèles</h2>", unsafe_allow_html=True)
+            rankings = {
+                "pareto": "Front de Pareto (par performance)",
+                "per_kg": "Performance par kg de CO₂",
+                "per_billion": "Performance par milliard de paramètres",
+            }
+            col_ranking, col_count = st.columns([3, 1])
+            with col_ranking:
+                ranking = st.selectbox("Classer les modèles par", options=list(rankings), format_func=rankings.get,
+                                       key="efficiency_ranking")
+            with col_count:
+                top_count = st.number_input("Nombre de modèles", min_value=5, max_value=100, value=10, step=5,
+                                            key="efficiency_top_count")
+            with tracing.stage("efficiency_table", efficiency) as span:
+                top_models = span.out(top_efficient(efficiency, ranking, selected_benchmark, top_count))
+                st.dataframe(
+                    top_models.rename(columns={
+                        'model_name': 'Modèle',
+                        'model_link': 'Lien',
+                        'type': 'Type de Modèle',
+                        'precision': 'Précision',
+                        selected_benchmark: 'Performance',
+                        'co2_cost_kg': 'Coût CO₂ (kg)',
+                        'params_b': 'Paramètres (B)',
+                        'per_kg': 'Performance / kg CO₂',
+                        'per_billion': 'Performance / Md paramètres',
+                        'pareto': 'Front de Pareto',
+                    }),
+                    hide_index=True,
+                    column_config={"Lien": st.column_config.LinkColumn("Lien", display_text="🤗")},
+                )
 
-        # Prepare the DataFrame display
-        df_to_display = filtered_df[display_columns + ['model_link']].copy()
-        df_to_display['model_name'] = df_to_display.apply(
-            lambda row: f'<a href="{row["model_link"]}" target="_blank">{row["model_name"]}</a>' 
-            if pd.notnull(row["model_link"]) else row["model_name"],
-            axis=1
-        )
-        df_to_display = df_to_display.drop(columns=['model_link'])
+        # **Similar Models**
+        st.markdown("<h2 style='color:#FFD700;'>Modèles au Profil Similaire</h2>", unsafe_allow_html=True)
+        st.markdown("""
+        Retrouvez les modèles dont les résultats sur les six benchmarks ressemblent le plus à ceux d'un modèle
+        de référence, par exemple pour trouver une alternative plus légère. La distance est l'écart moyen, en
+        écarts-types, sur les métriques renseignées pour les deux modèles.
+        """)
 
-        # Convert DataFrame to HTML with custom styling
-        html_table = df_to_display.to_html(escape=False, index=False, classes=['dataframe'])
-        
-        # Create scrollable container with fixed height
+        # Construit à la demande : la liste des modèles de référence n'est envoyée au navigateur qu'une fois
+        # la section ouverte, et l'index des profils (libellés compris) est construit une fois par snapshot
+        if st.toggle("Rechercher des modèles similaires", key="similar_open"):
+            with tracing.stage("similarity_index", df, cached=True):
+                similarity_index = get_similarity_index(df, snapshot_cache.snapshot_id(df))
+            filtered_rows = filter_engine.rows(clauses)
+            reference_options = range(len(df)) if filtered_rows is None else filtered_rows.tolist()
+            if len(reference_options):
+                col_reference, col_size, col_count = st.columns([3, 2, 1])
+                with col_reference:
+                    reference = st.selectbox(
+                        "Modèle de référence",
+                        options=reference_options,
+                        format_func=similarity_index.labels.__getitem__,
+                        key="similar_reference",
+                    )
+                with col_size:
+                    max_params = st.number_input(
+                        "Taille maximale (milliards de paramètres, 0 = sans limite)",
+                        min_value=0.0, value=0.0, step=1.0, key="similar_max_params",
+                    )
+                with col_count:
+                    neighbour_count = st.number_input("Nombre de modèles", min_value=5, max_value=50, value=10, step=5,
+                                                      key="similar_count")
+                same_size = st.checkbox("Privilégier les modèles de taille proche", key="similar_size")
+
+                with tracing.stage("similar_models", filtered_df) as span:
+                    neighbours = span.out(similar_models(
+                        similarity_index, df, reference,
+                        ["model_name", "model_link", "type", "precision", "params_b"] + PROFILE_COLUMNS,
+                        k=neighbour_count,
+                        max_params=max_params or None,
+                        rows=filter_engine.rows(base_clauses),
+                        size_weight=1.0 if same_size else 0.0,
+                    ))
+                if neighbours.empty:
+                    st.write("Aucun modèle comparable avec ces critères.")
+                else:
+                    st.dataframe(
+                        neighbours.rename(columns={
+                            'model_name': 'Modèle',
+                            'model_link': 'Lien',
+                            'type': 'Type de Modèle',
+                            'precision': 'Précision',
+                            'params_b': 'Paramètres (B)',
+                            'distance': 'Distance',
+                        }),
+                        hide_index=True,
+                        column_config={"Lien": st.column_config.LinkColumn("Lien", display_text="🤗")},
+                    )
+
+        # **Popularity vs Performance**
+        st.markdown("<h2 style='color:#FFD700;'>Popularité vs Performance</h2>", unsafe_allow_html=True)
         st.markdown("""
-            <div style="height: 400px; overflow-y: scroll; margin: 10px 0px">
-                {}
-            </div>
-        """.format(html_table), unsafe_allow_html=True)
+        Les modèles du classement également présents dans le catalogue Hugging Face, avec leurs téléchargements
+        et leurs likes : les modèles les plus performants sont-ils aussi les plus utilisés ?
+        """)
+
+        # Jointure classement / catalogue sur l'identifiant canonique du modèle (org/nom), indexée une fois par
+        # couple de snapshots ; les clés de chaque source ne sont recalculées que lorsqu'elle est rafraîchie
+        # Seul un catalogue déjà disponible localement est utilisé : la page n'attend jamais son téléchargement
+        with tracing.stage("fetch_catalog", cached=True) as span:
+            catalog = span.out(available_catalog())
+        if catalog is None or catalog.empty or 'ID' not in catalog.columns:
+            st.caption("Le catalogue des modèles n'est pas encore disponible localement : cette section s'affichera "
+                       "une fois son chargement terminé.")
+        else:
+            with tracing.stage("join_index", df, cached=True):
+                join_index = get_join_index(catalog, df, snapshot_cache.snapshot_id(catalog),
+                                            snapshot_cache.snapshot_id(df))
+            matched_rows, _ = join_index.matches(filter_engine.rows(clauses))
+            st.caption(f"{len(matched_rows):,} modèle(s) sur {len(filtered_df):,} retrouvé(s) dans le catalogue "
+                       f"({len(catalog):,} modèles).")
+            if len(matched_rows):
+                with tracing.stage("chart_popularity", matched_rows, cached=True):
+                    st.plotly_chart(charts.cached_figure(
+                        lambda: popularity_figure(joined_frame(
+                            join_index, catalog, df, ['Téléchargements', 'Likes'],
+                            ['model_name', 'type', 'precision', selected_benchmark],
+                            rows=filter_engine.rows(clauses),
+                        ), selected_benchmark),
+                        snapshot_cache.snapshot_id(df), "popularity",
+                        (snapshot_cache.snapshot_id(catalog), filter_key, selected_benchmark),
+                    ))
+
+        # Add table section at the bottom with scrollable layout
+        st.markdown("<h2 style='color:#FFD700;'>Liste Complète des Modèles</h2>", unsafe_allow_html=True)
+
+        # Only the visible page of rows is rendered and sent to the browser
+        with tracing.stage("table", filtered_df):
+            render_paginated_table(
+                df,
+                key="benchmark_models",
+                columns=display_columns,
+                link=("model_name", "model_link"),
+                clauses=clauses,
+            )
 
         # Documentation des métriques d'évaluation
         st.markdown("""
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import tracing
+
+# Beyond this many points, a line is downsampled (LTTB) before being sent to the browser
+MAX_LINE_POINTS = 1500
+# Up to this many points, a line is sent as is: Plotly builds a few thousand points faster than the
+# sort and the LTTB pass would save
+DOWNSAMPLE_MIN_POINTS = 2 * MAX_LINE_POINTS
+# Beyond this many points, line markers are dropped (they hide the line and weigh on the payload)
+MAX_MARKER_POINTS = 500
+# Beyond this many points, scatter and line traces are drawn with WebGL (scattergl)
+WEBGL_MIN_POINTS = 1000
+
+
+def _as_float(values):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype("int64").to_numpy(dtype=float)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def lttb(x, y, threshold):
+    """
+    Positions of the `threshold` points of the series (`x` sorted, no missing value) that best keep its
+    shape, with the Largest-Triangle-Three-Buckets algorithm: the first and last points are kept, and
+    in each bucket the point forming the largest triangle with the previously kept point and the mean
+    of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+    # Buckets over the points 1 .. n-2, then the last point alone
+    edges = np.r_[np.linspace(1, n - 1, threshold - 1).astype(np.int64), n]
+    sizes = np.diff(edges)
+    means_x, means_y = np.add.reduceat(x, edges[:-1]) / sizes, np.add.reduceat(y, edges[:-1]) / sizes
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        mean_x, mean_y = means_x[bucket + 1], means_y[bucket + 1]
+        areas = np.abs((x[previous] - mean_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample(df, x, y, max_points=MAX_LINE_POINTS, group=None):
+    """
+    `df` unchanged up to DOWNSAMPLE_MIN_POINTS rows; beyond, its rows sorted by `x` and reduced to about
+    `max_points` with `lttb`: the points budget is shared between the `group` series (one per line
+    color) in proportion to their length.
+    """
+    if len(df) <= max(max_points, DOWNSAMPLE_MIN_POINTS):
+        return df
+    df = df.dropna(subset=[x, y]).sort_values(x, kind="stable")
+    if group is None:
+        return df.iloc[lttb(df[x], df[y], max_points)]
+    parts = []
+    for _, part in df.groupby(group, observed=True, sort=False):
+        parts.append(part.iloc[lttb(part[x], part[y], max(3, max_points * len(part) // len(df)))])
+    return pd.concat(parts)
+
+
+def render_mode(points):
+    """
+    `render_mode` of a Plotly Express line or scatter of `points` points: WebGL above WEBGL_MIN_POINTS.
+    """
+    return "webgl" if points > WEBGL_MIN_POINTS else "svg"
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _cached_figure(snapshot, name, view, _build):
+    tracing.cache_miss()
+    return _build()
+
+
+def cached_figure(build, snapshot, name, view):
+    """
+    Figure `name` of the data `snapshot` for the `view` (hashable filters and options), built with
+    `build()` once and shared by all sessions: reruns with the same filters skip the figure
+    construction. The figure must not be modified after it is returned.
+    """
+    return _cached_figure(snapshot, name, view, build)
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Low-cardinality text columns stored as categoricals
+MODEL_CATEGORY_COLUMNS = ["Auteur", "Library", "Inference", "Gated"]
+# Above this ratio of distinct values per row, a text column is not worth a categorical
+CATEGORY_MAX_RATIO = 0.5
+
+TAGS_DTYPE = pd.ArrowDtype(pa.list_(pa.dictionary(pa.int32(), pa.string())))
+
+
+def encode_tags(tags):
+    """
+    Dictionary-encodes a column of tag lists: each row becomes a list of int32 codes into a single
+    shared vocabulary (Arrow list<dictionary<int32, string>>), instead of a Python list of strings.
+    """
+    if tags.dtype == TAGS_DTYPE:
+        return tags
+    values = [None if value is None or (np.isscalar(value) and pd.isna(value)) else list(value)
+              for value in tags]
+    lists = pa.array(values, type=pa.list_(pa.string()))
+    encoded = pa.ListArray.from_arrays(lists.offsets, lists.values.dictionary_encode(), mask=lists.is_null())
+    return pd.Series(pd.arrays.ArrowExtensionArray(encoded), index=tags.index, name=tags.name)
+
+
+def decode_tags(tags):
+    """
+    Plain column of string arrays decoded from an encoded tag column, for display.
+    """
+    if tags.dtype != TAGS_DTYPE:
+        return tags
+    array = pa.array(tags.array).cast(pa.list_(pa.string()))
+    return pd.Series(array.to_pandas(), index=tags.index, name=tags.name)
+
+
+def tag_codes(tags):
+    """
+    (row positions, codes, vocabulary) of a column encoded with `encode_tags`, one entry per tag occurrence.
+    """
+    array = pa.array(tags.array)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    lengths = pc.list_value_length(array).fill_null(0).to_numpy(zero_copy_only=False)
+    flat = pc.list_flatten(array)
+    rows = np.repeat(np.arange(len(array)), lengths)
+    codes = flat.indices.to_numpy(zero_copy_only=False).astype(np.int64)
+    return rows, codes, flat.dictionary.to_numpy(zero_copy_only=False)
+
+
+def downcast_numeric(df, columns=None):
+    """
+    Downcasts integer columns to the smallest integer type holding their values and floats to float32.
+    """
+    columns = columns if columns is not None else df.select_dtypes("number").columns
+    for column in columns:
+        series = df[column]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            df[column] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            df[column] = pd.to_numeric(series, downcast="float")
+    return df
+
+
+def categorize(df, columns=None, max_ratio=CATEGORY_MAX_RATIO):
+    """
+    Converts `columns` to categoricals, or, when `columns` is None, every text column whose number of
+    distinct values is at most `max_ratio` times the number of rows.
+    """
+    if columns is None:
+        text_columns = [column for column in df.columns
+                        if pd.api.types.is_string_dtype(df[column]) and not isinstance(df[column].dtype, pd.ArrowDtype)]
+        columns = [column for column in text_columns
+                   if _is_scalar_column(df[column]) and df[column].nunique() <= max_ratio * max(len(df), 1)]
+    for column in columns:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def _is_scalar_column(series):
+    first = series.dropna()
+    return first.empty or isinstance(first.iloc[0], str)
+
+
+def compact_models_frame(df):
+    """
+    Compact in-memory representation of the models catalog (categoricals, encoded tags, downcast counts).
+    """
+    df = categorize(df, MODEL_CATEGORY_COLUMNS)
+    if "Tags" in df.columns:
+        df["Tags"] = encode_tags(df["Tags"])
+    return downcast_numeric(df)
+
+
+def compact_leaderboard_frame(df):
+    """
+    Compact in-memory representation of the leaderboard (categoricals for low-cardinality text columns
+    such as type and precision, downcast numerics). The raw `model_name_html` cells are dropped: the
+    page only uses the model_name / model_link extracted from them.
+    """
+    df = df.drop(columns=["model_name_html"], errors="ignore")
+    return downcast_numeric(categorize(df))
+
+
+def drop_unused_categories(df):
+    """
+    `df` with the categories absent from its rows dropped, e.g. before sending a few rows to the browser
+    (which would otherwise receive the whole dictionary of each categorical column).
+    """
+    return df.assign(**{column: df[column].cat.remove_unused_categories()
+                        for column in df.select_dtypes("category").columns})
+
+
+def memory_usage_mb(df):
+    """
+    Deep memory usage of `df` in MiB.
+    """
+    return df.memory_usage(deep=True).sum() / 2**20
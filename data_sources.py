@@ -0,0 +1,59 @@
+import os
+from pathlib import Path
+
+import data_store
+import snapshot_cache
+
+# live: data fetched from the upstream APIs (default)
+# snapshot: only the copies bundled in Data_csv, no network access at all
+# hybrid: the bundled copies are served until a first live download has completed in the background
+DATA_MODES = ("live", "snapshot", "hybrid")
+DATA_MODE = os.getenv("HF_EXPLORER_DATA_MODE", "live")
+if DATA_MODE not in DATA_MODES:
+    raise ValueError(f"HF_EXPLORER_DATA_MODE must be one of {', '.join(DATA_MODES)}, not {DATA_MODE!r}")
+
+DATA_DIR = Path(__file__).resolve().parent / "Data_csv"
+# Bundled CSV export of each source
+BUNDLED_FILES = {
+    "models": DATA_DIR / "models_data.csv",
+    "leaderboard": DATA_DIR / "benchmark.csv",
+    "articles": DATA_DIR / "df_articles.csv",
+}
+
+
+def bundled_source(source):
+    """
+    Name under which the columnar copy of the bundled CSV of `source` is cached.
+    """
+    return f"{source}-bundled"
+
+
+def bundled_key(source):
+    """
+    Version of the bundled CSV of `source` (changes whenever the file is replaced).
+    """
+    stat = BUNDLED_FILES[source].stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def bundled_snapshot(source, parse):
+    """
+    Key of the typed Parquet copy of the bundled CSV of `source`, converted with `parse(path)` the first
+    time (and again when the CSV changes): later loads read columns that are already typed, without
+    decoding tag lists or dates again.
+    """
+    name, key = bundled_source(source), bundled_key(source)
+    if not snapshot_cache.has_snapshot(name, key):
+        snapshot_cache.run_exclusive(
+            (name, key), lambda: snapshot_cache.write_snapshot(name, key, parse(BUNDLED_FILES[source]), keep=1)
+        )
+    return key
+
+
+def shared_bundled_table(source, parse, prepare=lambda df: df):
+    """
+    The bundled data of `source` as a read-only frame shared by every session (see `data_store`),
+    read from its columnar copy and passed through `prepare` once.
+    """
+    name, key = bundled_source(source), bundled_snapshot(source, parse)
+    return data_store.shared_table(name, key, lambda: prepare(snapshot_cache.read_snapshot(name, key)))
@@ -0,0 +1,32 @@
+import streamlit as st
+
+import tracing
+
+# Snapshots kept in memory per source (the current one and the one being replaced)
+MAX_SNAPSHOTS_PER_SOURCE = 2
+
+
+@st.cache_resource(show_spinner=False, max_entries=4 * MAX_SNAPSHOTS_PER_SOURCE)
+def _shared_table(source, key, _loader):
+    tracing.cache_miss()
+    df = _loader()
+    df.attrs["read_only"] = True
+    return df
+
+
+def shared_table(source, key, loader):
+    """
+    Returns the frame of snapshot `key` of `source`, loaded once with `loader()` and then shared by
+    every session of the process (one copy in memory whatever the number of viewers).
+
+    The frame is read-only by contract: pages select from it with masks, column subsets or `assign`,
+    which create new frames (copy-on-write), and never assign into it.
+    """
+    return _shared_table(source, key, loader)
+
+
+def clear():
+    """
+    Drops every shared table (they are reloaded on next access).
+    """
+    _shared_table.clear()
@@ -0,0 +1,90 @@
+import numpy as np
+import streamlit as st
+
+import tracing
+from compact import drop_unused_categories
+
+# Columns describing the models in the efficiency frame, before the metric, CO₂ cost and parameters
+MODEL_COLUMNS = ["model_name", "model_link", "type", "precision"]
+
+
+def pareto_front(co2, metric, params):
+    """
+    Boolean mask of the rows not dominated by any other row: none has a CO₂ cost and a number of
+    parameters lower or equal and a metric higher or equal, with at least one of them strictly better.
+
+    O(n log n): the rows are swept by increasing CO₂ cost (then decreasing metric, increasing
+    parameters), so that every row comes after the rows dominating it, and a Fenwick tree indexed by
+    the rank of the parameters keeps the best metric swept so far below each number of parameters.
+    Identical rows do not dominate each other: they are looked up before being inserted together.
+    """
+    co2, metric, params = (np.asarray(values, dtype=float) for values in (co2, metric, params))
+    n = len(co2)
+    front = np.zeros(n, dtype=bool)
+    if n == 0:
+        return front
+    order = np.lexsort((params, -metric, co2))
+    ranks = (np.unique(params, return_inverse=True)[1] + 1)[order].tolist()
+    metrics = metric[order].tolist()
+    keys = list(zip(co2[order].tolist(), metrics, params[order].tolist()))
+
+    best = [-np.inf] * (max(ranks) + 1)
+    start = 0
+    while start < n:
+        end = start + 1
+        while end < n and keys[end] == keys[start]:
+            end += 1
+        rank, value = ranks[start], metrics[start]
+        # Best metric among the rows swept so far with at most as many parameters
+        position, dominating = rank, -np.inf
+        while position > 0:
+            dominating = max(dominating, best[position])
+            position -= position & -position
+        if dominating < value:
+            front[order[start:end]] = True
+        position = rank
+        while position < len(best):
+            if best[position] < value:
+                best[position] = value
+            position += position & -position
+        start = end
+    return front
+
+
+def efficiency_frame(df, metric):
+    """
+    Rows of `df` with a `metric` value, a CO₂ cost and a positive number of parameters, with their
+    efficiency indexes: `per_kg` (metric per kg of CO₂, missing for a zero cost), `per_billion` (metric
+    per billion parameters) and `pareto` (on the front of CO₂ cost, metric and parameters).
+    """
+    analysis = df[[column for column in MODEL_COLUMNS if column in df.columns] + [metric, "co2_cost_kg", "params_b"]]
+    analysis = analysis[analysis[[metric, "co2_cost_kg", "params_b", "type"]].notna().all(axis=1)
+                        & (analysis["params_b"] > 0)]
+    values = analysis[metric].to_numpy(dtype=float)
+    co2 = analysis["co2_cost_kg"].to_numpy(dtype=float)
+    params = analysis["params_b"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_kg = np.where(co2 > 0, values / co2, np.nan)
+    return analysis.assign(per_kg=per_kg, per_billion=values / params, pareto=pareto_front(co2, values, params))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_efficiency(_df, snapshot, filter_key, metric):
+    """
+    `efficiency_frame`, cached per (snapshot, filters, metric). `_df` is not hashed: it must be fully
+    determined by the other arguments.
+    """
+    tracing.cache_miss()
+    return efficiency_frame(_df, metric)
+
+
+def top_efficient(efficiency, ranking, metric, k=10):
+    """
+    The `k` best rows of an efficiency frame for `ranking`: "pareto" (front rows by decreasing
+    metric), "per_kg" or "per_billion" (by decreasing index); ties keep the row order.
+    """
+    if ranking == "pareto":
+        top = efficiency[efficiency["pareto"]].sort_values(metric, ascending=False, kind="stable").head(k)
+    else:
+        top = efficiency.dropna(subset=[ranking]).sort_values(ranking, ascending=False, kind="stable").head(k)
+    return drop_unused_categories(top)
@@ -0,0 +1,228 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import tracing
+
+# Filter results kept per snapshot (row positions, at most 4 or 8 bytes per matching row)
+MAX_CACHED_FILTERS = 128
+
+# One condition of a filter state: `kind` is "isin", "between" or "tags"; `value` is the sorted tuple of
+# accepted values, the (low, high) bounds, or (mode, sorted tags)
+Clause = namedtuple("Clause", ["column", "kind", "value"])
+
+
+def _sorted_values(values):
+    return tuple(sorted(set(values), key=lambda value: (type(value).__name__, str(value))))
+
+
+def isin(column, values):
+    """
+    Rows whose `column` is one of `values`.
+    """
+    return Clause(column, "isin", _sorted_values(values))
+
+
+def between(column, low, high):
+    """
+    Rows whose `column` lies between `low` and `high` (inclusive).
+    """
+    return Clause(column, "between", (low, high))
+
+
+def has_tags(column, tags, mode="any"):
+    """
+    Rows carrying at least one of `tags` (mode="any") or all of them (mode="all"); `column` must have a
+    `TagIndex` given to the engine.
+    """
+    tags = _sorted_values(tags)
+    # With a single tag both modes select the same rows
+    return Clause(column, "tags", ("any" if len(tags) == 1 else mode, tags))
+
+
+def _implies(narrow, broad):
+    # Whether every row matching clause `narrow` also matches clause `broad`
+    if narrow.column != broad.column or narrow.kind != broad.kind:
+        return False
+    if narrow.kind == "isin":
+        return set(narrow.value) <= set(broad.value)
+    if narrow.kind == "between":
+        return broad.value[0] <= narrow.value[0] and narrow.value[1] <= broad.value[1]
+    (narrow_mode, narrow_tags), (broad_mode, broad_tags) = narrow.value, broad.value
+    if narrow_mode == broad_mode == "any":
+        return set(narrow_tags) <= set(broad_tags)
+    if narrow_mode == broad_mode == "all":
+        return set(broad_tags) <= set(narrow_tags)
+    return False
+
+
+class FilterEngine:
+    """
+    Memoized filtering of one snapshot frame, shared by all sessions.
+
+    A filter state (list of `Clause`) is first canonicalized: clauses are sorted, and those keeping every
+    row (e.g. all countries selected, a range covering the whole column) are dropped, so that the default
+    views all map to the empty state, i.e. the whole frame. The sorted row positions of each state are
+    kept in a bounded LRU; a state not seen yet is evaluated on the rows of the smallest cached state it
+    narrows (fewer values, tighter bounds, additional clauses) instead of on the whole frame.
+    """
+
+    def __init__(self, df, tag_indexes=None, max_entries=MAX_CACHED_FILTERS):
+        self.df = df
+        self.num_rows = len(df)
+        self.tag_indexes = tag_indexes or {}
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._domains = {}
+        self._arrays = {}
+        self.stats = {"hits": 0, "derived": 0, "computed": 0}
+
+    def _domain(self, column):
+        # (distinct values, min, max, has missing values) of a column, computed on first use
+        domain = self._domains.get(column)
+        if domain is None:
+            values = self.df[column]
+            present = values.dropna()
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                distinct = set(present.cat.remove_unused_categories().cat.categories)
+            else:
+                distinct = set(present.unique())
+            ordered = pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values)
+            bounds = (present.min(), present.max()) if ordered and len(present) else (None, None)
+            has_missing = len(present) < len(values)
+            domain = self._domains[column] = (distinct, *bounds, has_missing)
+        return domain
+
+    def _keeps_every_row(self, clause):
+        if clause.kind == "tags":
+            return not clause.value[1]
+        distinct, low, high, has_missing = self._domain(clause.column)
+        if has_missing:
+            return False
+        if clause.kind == "isin":
+            return distinct <= set(clause.value)
+        try:
+            return low is not None and clause.value[0] <= low and high <= clause.value[1]
+        except TypeError:
+            return False
+
+    def canonical(self, clauses):
+        """
+        Hashable canonical form of the filter state `clauses`.
+        """
+        kept = {clause for clause in clauses if not self._keeps_every_row(clause)}
+        return tuple(sorted(kept, key=lambda clause: (clause.column, clause.kind, repr(clause.value))))
+
+    def _array(self, column):
+        # Codes of a categorical column, values of a plain numeric or datetime column, kept for later
+        # evaluations (None for other columns, evaluated with pandas)
+        if column not in self._arrays:
+            values = self.df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                self._arrays[column] = values.cat.codes.to_numpy()
+            elif isinstance(values.dtype, np.dtype) and values.dtype.kind in "iufM":
+                self._arrays[column] = values.to_numpy()
+            else:
+                self._arrays[column] = None
+        return self._arrays[column]
+
+    def _evaluate(self, clause, positions):
+        # Which of the rows at `positions` (None: every row) match `clause`
+        if clause.kind == "tags":
+            mode, tags = clause.value
+            mask = self.tag_indexes[clause.column].mask(tags, mode)
+            return mask if positions is None else mask[positions]
+        series, array = self.df[clause.column], self._array(clause.column)
+        categorical = isinstance(series.dtype, pd.CategoricalDtype)
+        if array is None or (categorical and clause.kind == "between"):
+            values = series if positions is None else series.take(positions)
+            if clause.kind == "isin":
+                return values.isin(clause.value).to_numpy(dtype=bool, na_value=False)
+            low, high = clause.value
+            return ((values >= low) & (values <= high)).to_numpy(dtype=bool, na_value=False)
+        values = array if positions is None else array[positions]
+        if categorical:
+            # Lookup table over the category codes (missing values have code -1: the last slot)
+            accepted = np.zeros(len(series.cat.categories) + 1, dtype=bool)
+            accepted[:-1] = series.cat.categories.isin(clause.value)
+            return accepted[values]
+        if clause.kind == "isin":
+            return pd.Series(values).isin(clause.value).to_numpy()
+        low, high = clause.value
+        with np.errstate(invalid="ignore"):
+            return (values >= low) & (values <= high)
+
+    def _broadest_cached(self, key):
+        # Smallest cached result whose state is implied by `key` (each of its clauses by one of `key`)
+        best = None
+        with self._lock:
+            for cached_key, positions in self._results.items():
+                if all(any(_implies(clause, cached) for clause in key) for cached in cached_key):
+                    if best is None or len(positions) < len(best[1]):
+                        best = cached_key, positions
+        return best
+
+    def rows(self, clauses):
+        """
+        Sorted positions of the rows matching every clause of `clauses`, or None when they keep every row.
+        """
+        key = self.canonical(clauses)
+        if not key:
+            return None
+        with self._lock:
+            positions = self._results.get(key)
+            if positions is not None:
+                self._results.move_to_end(key)
+                self.stats["hits"] += 1
+                return positions
+
+        tracing.cache_miss()
+        base = self._broadest_cached(key)
+        positions, remaining = None, key
+        if base is not None:
+            positions = base[1]
+            remaining = [clause for clause in key if clause not in base[0]]
+        for clause in remaining:
+            matches = self._evaluate(clause, positions)
+            positions = np.flatnonzero(matches) if positions is None else positions[matches]
+        positions = positions.astype(np.int32 if self.num_rows < 2**31 else np.int64)
+        positions.flags.writeable = False
+
+        with self._lock:
+            self.stats["derived" if base is not None else "computed"] += 1
+            self._results[key] = positions
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return positions
+
+    def mask(self, clauses):
+        """
+        Boolean mask over the rows of the frame, see `rows`.
+        """
+        positions = self.rows(clauses)
+        if positions is None:
+            return np.ones(self.num_rows, dtype=bool)
+        mask = np.zeros(self.num_rows, dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def select(self, clauses):
+        """
+        The rows of the frame matching `clauses`; the frame itself when they keep every row.
+        """
+        positions = self.rows(clauses)
+        return self.df if positions is None else self.df.iloc[positions]
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_filter_engine(_df, snapshot, _tag_indexes=None):
+    """
+    Filter engine of a snapshot frame, shared by all sessions. `_df` (and `_tag_indexes`, column ->
+    `TagIndex`) are not hashed: they must be the frame of `snapshot` and indexes built from it.
+    """
+    return FilterEngine(_df, _tag_indexes)
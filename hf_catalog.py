@@ -0,0 +1,268 @@
+import ast
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import data_sources
+import data_store
+import snapshot_cache
+import tracing
+from compact import compact_models_frame
+
+logger = logging.getLogger(__name__)
+
+HF_API_URL = "https://huggingface.co/api/models"
+CATALOG_SOURCE = "models"
+WATERMARK_COLUMN = "Dernière modification"
+# Maximum number of models indexed from the API, the most recently modified ones (cursor pagination, no
+# 10,000 cap)
+MAX_MODELS = int(os.getenv("HF_EXPLORER_MAX_MODELS", 10000))
+# Walk order of the catalog downloads: most recently modified first
+RECENT_FIRST = {"sort": "lastModified", "direction": -1}
+
+# API field -> column of the models frame
+MODEL_COLUMNS = {
+    "id": "ID",
+    "author": "Auteur",
+    "gated": "Gated",
+    "inference": "Inference",
+    "lastModified": "Dernière modification",
+    "likes": "Likes",
+    "trendingScore": "Trending Score",
+    "private": "Privé",
+    "downloads": "Téléchargements",
+    "tags": "Tags",
+    "library_name": "Library",
+    "createdAt": "Date de création",
+}
+
+STRING_COLUMNS = ["Gated"]
+INTEGER_COLUMNS = ["Likes", "Téléchargements"]
+FLOAT_COLUMNS = ["Trending Score"]
+DATE_COLUMNS = ["Dernière modification", "Date de création"]
+
+
+def make_session(pool_size=8, retries=5, backoff_factor=0.5):
+    """
+    HTTP session with a connection pool and exponential backoff on transient errors and rate limits.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def empty_models_frame():
+    return page_to_frame([])
+
+
+def page_to_frame(models):
+    """
+    Converts one page of the /api/models JSON payload into a typed frame chunk.
+    """
+    columns = {column: [model.get(field) for model in models] for field, column in MODEL_COLUMNS.items()}
+    df = pd.DataFrame(columns, columns=list(MODEL_COLUMNS.values()))
+
+    # `gated` mixes booleans and strings ("auto", "manual")
+    for column in STRING_COLUMNS:
+        df[column] = df[column].astype("string")
+    for column in INTEGER_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+    for column in FLOAT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    for column in DATE_COLUMNS:
+        df[column] = pd.to_datetime(df[column], errors="coerce", utc=True).dt.tz_localize(None)
+    return df
+
+
+@tracing.traced("read_csv")
+def read_models_csv(path):
+    """
+    Typed catalog frame of a CSV export of the page (such as Data_csv/models_data.csv), parsed the same
+    way as the API pages: tag lists are decoded from their textual form and dates parsed.
+    """
+    df = pd.read_csv(path)
+    df = df.astype(object).where(df.notna(), None)
+    df["Tags"] = df["Tags"].map(lambda tags: ast.literal_eval(tags) if tags else None)
+    fields = {column: field for field, column in MODEL_COLUMNS.items()}
+    return page_to_frame(df.rename(columns=fields).to_dict("records"))
+
+
+def iter_model_pages(session, base_url=HF_API_URL, params=None, page_size=1000, max_models=None, timeout=30):
+    """
+    Walks the cursor pagination of the models API and yields pages (lists of model dicts).
+    Stops after `max_models` models when it is set.
+    """
+    url = base_url
+    if max_models is not None:
+        page_size = min(page_size, max_models)
+    query = {"limit": page_size, "full": "True", "config": "True", **(params or {})}
+    fetched = 0
+
+    while url:
+        response = session.get(url, params=query, timeout=timeout)
+        response.raise_for_status()
+        page = response.json()
+        if max_models is not None:
+            page = page[:max_models - fetched]
+        if not page:
+            return
+        fetched += len(page)
+        yield page
+
+        if max_models is not None and fetched >= max_models:
+            return
+        # The next page URL already carries the cursor and the query parameters
+        url = response.links.get("next", {}).get("url")
+        query = None
+
+
+def iter_model_chunks(max_models=10000, page_size=1000, max_workers=4, base_url=HF_API_URL, params=None,
+                      session=None):
+    """
+    Streams the model catalog as typed frame chunks, one per API page.
+
+    Pages have to be fetched one after the other (each one holds the cursor of the next), so the
+    concurrency is between the download of a page and the conversion of the previous ones, with at
+    most `max_workers` pages in flight. Raw JSON pages are released as soon as they are converted.
+    """
+    session = session or make_session(pool_size=max_workers)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for page in iter_model_pages(session, base_url, params, page_size, max_models):
+            pending.append(executor.submit(page_to_frame, page))
+            while len(pending) >= max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def ingest_models(max_models=10000, page_size=1000, max_workers=4, base_url=HF_API_URL, params=None,
+                  session=None):
+    """
+    Downloads up to `max_models` models and returns them as a single frame.
+    """
+    chunks = list(iter_model_chunks(max_models, page_size, max_workers, base_url, params, session))
+    if not chunks:
+        return empty_models_frame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def fetch_models_since(watermark, max_models=10000, page_size=1000, max_workers=1, base_url=HF_API_URL,
+                       session=None):
+    """
+    Downloads the models modified at or after `watermark`, most recent first.
+
+    The API has no "modified since" filter, so the catalog is walked by decreasing `lastModified`
+    and the walk stops at the first model older than the watermark. Returns (frame, complete):
+    `complete` is False when `max_models` was reached before getting back to the watermark.
+    Pages are not prefetched by default (`max_workers=1`) since the walk usually stops on the first one.
+    """
+    chunks, complete = [], False
+    for chunk in iter_model_chunks(max_models, page_size, max_workers, base_url, RECENT_FIRST, session):
+        newer = chunk[chunk[WATERMARK_COLUMN] >= watermark]
+        chunks.append(newer)
+        if len(newer) < len(chunk):
+            complete = True
+            break
+    else:
+        # The walk also ends when the API has no next page: the whole catalog has been seen
+        complete = sum(len(chunk) for chunk in chunks) < (max_models or float("inf"))
+
+    delta = pd.concat(chunks, ignore_index=True) if chunks else empty_models_frame()
+    return delta.drop_duplicates("ID", keep="first"), complete
+
+
+def merge_catalog(catalog, delta, max_models=None):
+    """
+    Upserts the rows of `delta` into `catalog` by `ID` (updated models move to the top), keeping at most
+    the first `max_models` rows: with both frames most recently modified first, the most recent models.
+    """
+    kept = catalog[~catalog["ID"].isin(delta["ID"])]
+    merged = pd.concat([delta, kept], ignore_index=True)
+    return merged if max_models is None else merged.head(max_models)
+
+
+def _watermark_key(df):
+    watermark = df[WATERMARK_COLUMN].max()
+    return "empty" if pd.isna(watermark) else watermark.strftime("%Y%m%dT%H%M%S")
+
+
+@tracing.traced("download")
+def refresh_catalog(max_models=10000, base_url=HF_API_URL, session=None):
+    """
+    Brings the on-disk catalog up to date and returns its snapshot key.
+
+    The catalog holds the `max_models` most recently modified models (all of them when None). The first
+    call (or a refresh that falls more than `max_models` changes behind) downloads it in full, most
+    recent first. Later calls only download the models modified since the stored `Dernière
+    modification` high-water mark, upsert them by `ID` at the top and drop the oldest models beyond
+    `max_models`, so that the catalog stays the same as a full download.
+    """
+    latest = snapshot_cache.latest_snapshot_key(CATALOG_SOURCE)
+    catalog = snapshot_cache.read_snapshot(CATALOG_SOURCE, latest) if latest else None
+
+    if catalog is None or catalog.empty:
+        catalog = ingest_models(max_models, base_url=base_url, params=RECENT_FIRST, session=session)
+    else:
+        delta, complete = fetch_models_since(catalog[WATERMARK_COLUMN].max(), max_models,
+                                             base_url=base_url, session=session)
+        if complete:
+            catalog = merge_catalog(catalog, delta, max_models)
+        else:
+            catalog = ingest_models(max_models, base_url=base_url, params=RECENT_FIRST, session=session)
+
+    key = _watermark_key(catalog)
+    snapshot_cache.write_snapshot(CATALOG_SOURCE, key, catalog)
+    return key
+
+
+def read_models_snapshot(key):
+    """
+    Catalog snapshot `key` as a compact read-only frame, loaded once and shared by every session.
+    """
+    return data_store.shared_table(
+        CATALOG_SOURCE, key,
+        lambda: compact_models_frame(snapshot_cache.read_snapshot(CATALOG_SOURCE, key)),
+    )
+
+
+def read_bundled_models():
+    """
+    Catalog bundled in Data_csv (snapshot and hybrid modes), converted once into typed columns.
+    """
+    return data_sources.shared_bundled_table(CATALOG_SOURCE, read_models_csv, compact_models_frame)
+
+
+def available_catalog(max_models=MAX_MODELS):
+    """
+    The catalog already available locally, for pages using it alongside their own data: never waits for
+    a download. Returns the latest snapshot (the bundled copy in snapshot mode, or in hybrid mode before
+    the first download), else None after starting the first download in the background. Errors reading
+    the local copies are logged and also give None.
+    """
+    try:
+        if data_sources.DATA_MODE == "snapshot":
+            return read_bundled_models()
+        latest = snapshot_cache.latest_snapshot_key(CATALOG_SOURCE)
+        if latest is not None:
+            return read_models_snapshot(latest)
+        snapshot_cache.run_in_background((CATALOG_SOURCE, "refresh"), lambda: refresh_catalog(max_models))
+        return read_bundled_models() if data_sources.DATA_MODE == "hybrid" else None
+    except Exception:
+        logger.warning("Local models catalog unavailable", exc_info=True)
+        return None
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import tracing
+from compact import drop_unused_categories
+
+# Prefix of the model links of the leaderboard (and of any Hub URL), removed from the keys
+_HUB_URL_PATTERN = r"^(?:https?://)?(?:www\.)?huggingface\.co/"
+# org/name (or a bare name for the models without an organization), before any /tree/main, ?query, #anchor
+_REPO_ID_PATTERN = r"^([^/?#\s]+(?:/[^/?#\s]+)?)"
+
+
+def model_keys(values):
+    """
+    Canonical keys of model references: the Hub repository id `org/name`, lowercased (the Hub resolves
+    ids case-insensitively), whether given as an id (catalog `ID`) or as a Hub URL (leaderboard
+    `model_link`); missing for missing or unparsable references.
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    keys = values.astype("str").str.strip().str.lower().str.replace(_HUB_URL_PATTERN, "", regex=True)
+    return keys.str.extract(_REPO_ID_PATTERN, expand=False).where(values.notna())
+
+
+def model_key(value):
+    """
+    Canonical key of a single model reference, see `model_keys` (None when it has none).
+    """
+    key = model_keys([value]).iloc[0]
+    return None if pd.isna(key) else key
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_model_keys(_values, snapshot, column):
+    """
+    Canonical keys (object array) of the `column` of a snapshot, shared by all sessions. `_values` is not
+    hashed: it must be the `column` of `snapshot`.
+    """
+    tracing.cache_miss()
+    keys = model_keys(_values).to_numpy(dtype=object, na_value=None)
+    keys.flags.writeable = False
+    return keys
+
+
+class JoinIndex:
+    """
+    Join of the leaderboard rows to the catalog models on their canonical key (see `model_keys`).
+
+    `catalog_rows[i]` is the catalog position of the model of leaderboard row `i` (-1 when the catalog
+    does not list it); several leaderboard rows (precisions, resubmissions) can point to the same model.
+    The keys of each side are computed once per snapshot (`get_model_keys`), so that when one side
+    refreshes only its own keys are computed again and probed against the other side's.
+    """
+
+    def __init__(self, catalog_keys, leaderboard_keys):
+        catalog_keys = pd.Index(catalog_keys)
+        # First catalog row of each key (ids only differing by case are the same model)
+        first = np.flatnonzero(~catalog_keys.duplicated() & catalog_keys.notna())
+        # Missing keys are not among them: their rows are not matched
+        found = catalog_keys[first].get_indexer(pd.Index(leaderboard_keys))
+        self.catalog_rows = np.where(found >= 0, first[np.maximum(found, 0)], -1)
+        self.matched = np.flatnonzero(self.catalog_rows >= 0)
+
+    def matches(self, rows=None):
+        """
+        (leaderboard positions, catalog positions) of the matched leaderboard rows among the positions
+        `rows` (None: every row), in row order.
+        """
+        leaderboard_rows = self.matched if rows is None else np.asarray(rows)[self.catalog_rows[rows] >= 0]
+        return leaderboard_rows, self.catalog_rows[leaderboard_rows]
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_join_index(_catalog, _leaderboard, catalog_snapshot, leaderboard_snapshot):
+    """
+    Join index of a catalog snapshot and a leaderboard snapshot, shared by all sessions. `_catalog` and
+    `_leaderboard` are not hashed: they must be the frames of `catalog_snapshot` and `leaderboard_snapshot`.
+    """
+    tracing.cache_miss()
+    return JoinIndex(get_model_keys(_catalog["ID"], catalog_snapshot, "ID"),
+                     get_model_keys(_leaderboard["model_link"], leaderboard_snapshot, "model_link"))
+
+
+def joined_frame(index, catalog, leaderboard, catalog_columns, leaderboard_columns, rows=None):
+    """
+    The `leaderboard_columns` of the matched leaderboard rows among `rows` (None: every row), next to the
+    `catalog_columns` of their model, read by position from both frames (no merge).
+    """
+    leaderboard_rows, catalog_rows = index.matches(rows)
+    return drop_unused_categories(pd.concat([
+        leaderboard.iloc[leaderboard_rows][list(leaderboard_columns)].reset_index(drop=True),
+        catalog.iloc[catalog_rows][list(catalog_columns)].reset_index(drop=True),
+    ], axis=1))
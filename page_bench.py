@@ -0,0 +1,244 @@
+"""
+End-to-end benchmarks of the three pages, rendered headlessly with Streamlit's AppTest.
+
+Each page is run in snapshot data mode on the Data_csv exports, repeated `scale` times with distinct
+keys (synthetic 10x / 100x data), through a first (cold) run and a few representative filter
+interactions. Every step records the rerun wall time, the peak Python memory allocated during the
+rerun (tracemalloc, measured in a second pass so that tracing does not skew the timings) and the size
+of what is sent to the browser (Plotly figure specs, HTML/markdown, dataframe payloads).
+
+Usage: python page_bench.py [--pages models benchmarks articles] [--scales 1 10 100]
+                            [--output report.json] [--compare previous.json] [--tolerance 1.5]
+
+With --compare, steps slower than `tolerance` times the previous report are listed and the exit
+status is 1.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import data_sources
+import data_store
+import snapshot_cache
+
+REPO_DIR = Path(__file__).resolve().parent
+
+
+def scale_bundled_file(source, scale, directory):
+    """
+    Writes the Data_csv export of `source` repeated `scale` times with distinct keys (model IDs, model
+    names, article urls) into `directory` and returns its path.
+    """
+    df = pd.read_csv(data_sources.BUNDLED_FILES[source])
+    copies = [df]
+    for copy in range(1, scale):
+        suffix = f"~{copy}"
+        if source == "models":
+            copies.append(df.assign(ID=df["ID"] + suffix))
+        elif source == "leaderboard":
+            copies.append(df.assign(
+                model_name_html=df["model_name_html"].str.replace("</a>", f"{suffix}</a>", n=1, regex=False),
+                model_name=df["model_name"] + suffix,
+                fullname=df["fullname"] + suffix,
+                eval_name=df["eval_name"] + suffix,
+            ))
+        else:
+            copies.append(df.assign(url=df["url"] + f"#{copy}"))
+    path = Path(directory) / f"{source}-x{scale}.csv"
+    pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def widget(at, kind, label):
+    """
+    The `kind` widget (selectbox, multiselect...) of `at` labelled `label`, in the main area or the sidebar.
+    """
+    for element in getattr(at, kind):
+        if element.label == label:
+            return element
+    raise KeyError(f"no {kind} labelled {label!r}")
+
+
+def set_value(kind, label, value):
+    return lambda at: widget(at, kind, label).set_value(value)
+
+
+# Page -> (module, render function, interactions as (step name, action on the AppTest))
+PAGES = {
+    "models": ("app", "render_datasets_page", [
+        ("tag filter", set_value("multiselect", "Tags", ["transformers"])),
+        ("all tags", lambda at: (widget(at, "multiselect", "Tags").set_value(["transformers", "safetensors"]),
+                                 widget(at, "radio", "Combinaison des tags").set_value("all"))),
+        ("search", set_value("text_input", "Rechercher un modèle", "llama")),
+    ]),
+    "benchmarks": ("benchmark", "render_benchmarks_page", [
+        ("daily interval", set_value("selectbox", "Sélectionner l'intervalle de temps", "Quotidien")),
+        ("type filter", lambda at: widget(at, "multiselect", "Type de Modèle").set_value(
+            widget(at, "multiselect", "Type de Modèle").options[:1])),
+        ("sort table", lambda at: at.selectbox(key="benchmark_models_sort").set_value("score")),
+        ("next table page", lambda at: at.number_input(key="benchmark_models_page").set_value(2)),
+    ]),
+    "articles": ("actu", "render_actu_page", [
+        ("search", lambda at: at.text_input(key="article_search").set_value("openai")),
+        ("sentiment filter", set_value("slider", "Sentiment", (0.0, 1.0))),
+        ("next article", lambda at: at.number_input(key="page_selector").set_value(2)),
+    ]),
+}
+
+SCRIPT = """
+import importlib
+getattr(importlib.import_module({module!r}), {function!r})()
+"""
+
+
+def payload_sizes(at):
+    """
+    Bytes sent to the browser for the figures, the HTML/markdown blocks and the dataframes of `at`.
+    """
+    return {
+        "figures": sum(len(chart.proto.spec) for chart in at.get("plotly_chart")),
+        "html": sum(len(block.proto.body) for block in at.markdown),
+        "tables": sum(len(table.proto.arrow_data.data) for table in at.dataframe),
+    }
+
+
+def _reset_caches(cache_dir):
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    Path(cache_dir).mkdir(parents=True)
+    snapshot_cache.CACHE_DIR = Path(cache_dir)
+    data_store.clear()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def run_page(page, cache_dir, trace_memory=False):
+    """
+    Runs the cold run and the interactions of `page` from empty caches and returns one measurement
+    per step: wall time, or, with `trace_memory`, the peak traced memory.
+    """
+    module, function, interactions = PAGES[page]
+    _reset_caches(cache_dir)
+    at = AppTest.from_string(SCRIPT.format(module=module, function=function), default_timeout=600)
+    at.secrets["EVENT_REGISTRY_API_KEY"] = "offline"
+
+    steps = []
+    for name, action in [("cold run", None)] + interactions:
+        if action is not None:
+            action(at)
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        step = {"step": name, "exceptions": [exception.message for exception in at.exception]}
+        if trace_memory:
+            step["peak_mib"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        else:
+            step["seconds"] = elapsed
+            step["payload_bytes"] = payload_sizes(at)
+        steps.append(step)
+    return steps
+
+
+def run(pages, scales):
+    """
+    Measures every page at every scale and returns the list of step results.
+    """
+    results = []
+    previous_cwd = os.getcwd()
+    # The pages read style.css relative to the working directory
+    os.chdir(REPO_DIR)
+    data_sources.DATA_MODE = "snapshot"
+    bundled_files = dict(data_sources.BUNDLED_FILES)
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            for scale in scales:
+                for source in data_sources.BUNDLED_FILES:
+                    data_sources.BUNDLED_FILES[source] = (bundled_files[source] if scale == 1
+                                                          else scale_bundled_file(source, scale, work_dir))
+                for page in pages:
+                    cache_dir = Path(work_dir) / "cache"
+                    timed = run_page(page, cache_dir)
+                    traced = run_page(page, cache_dir, trace_memory=True)
+                    for step, memory in zip(timed, traced):
+                        results.append({"page": page, "scale": scale, **step, "peak_mib": memory["peak_mib"]})
+                        print(f"{page:<10} x{scale:<4} {step['step']:<16} {step['seconds'] * 1000:9.1f} ms "
+                              f"{memory['peak_mib']:8.1f} MiB peak  "
+                              f"{sum(step['payload_bytes'].values()) / 1024:9.1f} KiB sent"
+                              + ("  (exception)" if step["exceptions"] else ""))
+    finally:
+        data_sources.BUNDLED_FILES.update(bundled_files)
+        os.chdir(previous_cwd)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous, tolerance):
+    """
+    Prints the steps more than `tolerance` times slower than in the `previous` report and returns them.
+    """
+    before = {(row["page"], row["scale"], row["step"]): row for row in previous["results"]}
+    regressions = []
+    for row in results:
+        old = before.get((row["page"], row["scale"], row["step"]))
+        if old is None:
+            continue
+        ratio = row["seconds"] / max(old["seconds"], 1e-9)
+        if ratio > tolerance:
+            regressions.append(row)
+            print(f"REGRESSION {row['page']} x{row['scale']} {row['step']}: "
+                  f"{old['seconds'] * 1000:.1f} ms -> {row['seconds'] * 1000:.1f} ms (x{ratio:.1f})")
+    print(f"compared with {previous.get('commit') or 'previous report'}: {len(regressions)} regression(s)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10])
+    parser.add_argument("--output", type=Path, help="write the JSON report to this file")
+    parser.add_argument("--compare", type=Path, help="previous JSON report to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args(argv)
+    # Page exceptions are recorded in the report: keep the console to the summary lines
+    logging.disable(logging.ERROR)
+
+    results = run(args.pages, args.scales)
+    report = {
+        "commit": git_commit(),
+        "date": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "streamlit": st.__version__,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.compare:
+        return 1 if compare(results, json.loads(args.compare.read_text()), args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
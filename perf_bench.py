@@ -0,0 +1,954 @@
+"""
+Micro-benchmarks and consistency checks for the data-processing hot paths.
+
+Usage: python perf_bench.py [name ...]   (runs every benchmark when no name is given)
+"""
+import ast
+import json
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent / "Data_csv"
+# Modules that must not be imported before a page that needs them is opened
+DEFERRED_MODULES = ["pandas", "datasets", "pyarrow", "eventregistry", "bs4", "plotly.express", "dotenv", "huggingface_hub", "duckdb"]
+
+
+def best_of(func, repeat=5):
+    """
+    Runs `func` `repeat` times and returns (best wall time in seconds, last result).
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(name, reference_time, candidate_time):
+    print(f"  {name}: {reference_time * 1000:.1f} ms -> {candidate_time * 1000:.1f} ms "
+          f"(x{reference_time / max(candidate_time, 1e-9):.1f})")
+
+
+def load_leaderboard_csv():
+    """
+    Leaderboard snapshot of Data_csv/benchmark.csv with the column names used by the page.
+    """
+    df = pd.read_csv(DATA_DIR / "benchmark.csv")
+    df = df.rename(columns={"MATH_Lvl_5": "MATH Lvl 5", "MMLU_PRO": "MMLU-PRO"})
+    df["submission_date"] = pd.to_datetime(df["submission_date"], errors="coerce")
+    return df
+
+
+def load_recorded_models(scale=1):
+    """
+    Rebuilds /api/models records from Data_csv/models_data.csv, repeated `scale` times with distinct IDs.
+    """
+    from hf_catalog import MODEL_COLUMNS
+
+    df = pd.read_csv(DATA_DIR / "models_data.csv")
+    df = df.astype(object).where(df.notna(), None)
+    df["Tags"] = df["Tags"].map(lambda tags: ast.literal_eval(tags) if tags else None)
+    fields = {column: field for field, column in MODEL_COLUMNS.items()}
+    records = [{fields[column]: value for column, value in row.items() if column in fields}
+               for row in df.to_dict("records")]
+    return [{**record, "id": f"{record['id']}~{copy}" if copy else record["id"]}
+            for copy in range(scale) for record in records]
+
+
+class ReplayModelsServer:
+    """
+    Local stand-in for https://huggingface.co/api/models serving recorded models with the same
+    cursor pagination (Link: <...>; rel="next") and `sort`/`direction` parameters.
+    """
+
+    def __init__(self, models):
+        self.models = models
+        self.requests = 0
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay.requests += 1
+                query = {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+                models = replay.models
+                if "sort" in query:
+                    models = sorted(models, key=lambda m: m.get(query["sort"]) or "",
+                                    reverse=query.get("direction") == "-1")
+                limit, start = int(query.get("limit", 1000)), int(query.get("cursor", 0))
+                body = json.dumps(models[start:start + limit]).encode()
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                if start + limit < len(models):
+                    next_query = "&".join(f"{k}={v}" for k, v in {**query, "cursor": start + limit}.items())
+                    self.send_header("Link", f'<{replay.url}?{next_query}>; rel="next"')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/models"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def bench_catalog_ingest():
+    """
+    Ingests the recorded catalog (x20, i.e. 20k models, past the former 10k cap) from a local replay
+    server and checks pagination, `max_models` and column types.
+    """
+    from hf_catalog import ingest_models
+
+    models = load_recorded_models(scale=20)
+    with ReplayModelsServer(models) as replay:
+        elapsed, df = best_of(lambda: ingest_models(max_models=None, page_size=1000, base_url=replay.url), repeat=1)
+        assert df["ID"].tolist() == [m["id"] for m in models], "catalog mismatch"
+        assert str(df["Likes"].dtype) == "Int64" and df["Date de création"].dtype.kind == "M"
+        print(f"catalog ingest ({len(df)} models, {replay.requests} pages, "
+              f"{df.memory_usage(deep=True).sum() / 2**20:.1f} MiB)")
+        print(f"  full catalog: {elapsed * 1000:.1f} ms")
+
+        capped = ingest_models(max_models=2500, page_size=1000, base_url=replay.url)
+        assert len(capped) == 2500 and capped["ID"].tolist() == df["ID"].tolist()[:2500]
+        print("  max_models=2500: ok")
+
+
+def bench_catalog_refresh():
+    """
+    Incremental catalog refresh against a local replay server: after a full load, 50 models are
+    updated and 50 created, and the refresh must only download those and upsert them by ID. With a
+    `max_models` cap, the refreshed catalog must stay the same as a full download.
+    """
+    import tempfile
+
+    import snapshot_cache
+    from hf_catalog import CATALOG_SOURCE, RECENT_FIRST, ingest_models, refresh_catalog
+
+    models = load_recorded_models(scale=20)
+    with tempfile.TemporaryDirectory() as cache_dir, ReplayModelsServer(models) as replay:
+        snapshot_cache.CACHE_DIR = Path(cache_dir)
+        full_time, _ = best_of(lambda: refresh_catalog(max_models=None, base_url=replay.url), repeat=1)
+        full_requests = replay.requests
+
+        changed = {model["id"] for model in models[:50]}
+        for model in models[:50]:
+            model.update(lastModified="2030-01-01T00:00:00.000Z", likes=-1)
+        models.extend({**model, "id": f"{model['id']}~new", "lastModified": "2030-01-02T00:00:00.000Z"}
+                      for model in models[50:100])
+
+        replay.requests = 0
+        incremental_time, key = best_of(lambda: refresh_catalog(max_models=None, base_url=replay.url), repeat=1)
+        catalog = snapshot_cache.read_snapshot(CATALOG_SOURCE, key)
+
+        assert len(catalog) == len(models) and catalog["ID"].is_unique
+        assert (catalog.loc[catalog["ID"].isin(changed), "Likes"] == -1).all()
+        print(f"catalog refresh ({len(catalog)} models, 100 changed)")
+        print(f"  full: {full_time * 1000:.1f} ms / {full_requests} pages -> "
+              f"incremental: {incremental_time * 1000:.1f} ms / {replay.requests} pages")
+
+    # Capped catalog: the `max_models` most recently modified models, which a refresh must keep equal to a
+    # full download (models changed inside and outside of it, new models evicting the oldest ones)
+    max_models = 5000
+    models = load_recorded_models(scale=20)
+    with tempfile.TemporaryDirectory() as cache_dir, ReplayModelsServer(models) as replay:
+        snapshot_cache.CACHE_DIR = Path(cache_dir)
+        key = refresh_catalog(max_models=max_models, base_url=replay.url)
+        first = snapshot_cache.read_snapshot(CATALOG_SOURCE, key)
+        expected = ingest_models(max_models, base_url=replay.url, params=RECENT_FIRST)
+        assert first["ID"].tolist() == expected["ID"].tolist()
+
+        inside = set(first["ID"])
+        changed = ([model for model in models if model["id"] in inside][:25]
+                   + [model for model in models if model["id"] not in inside][:25])
+        for model in changed:
+            model.update(lastModified="2030-01-01T00:00:00.000Z", likes=-1)
+        models.extend({**model, "id": f"{model['id']}~new", "lastModified": "2030-01-02T00:00:00.000Z"}
+                      for model in models[:50])
+
+        replay.requests = 0
+        incremental_time, key = best_of(lambda: refresh_catalog(max_models=max_models, base_url=replay.url),
+                                        repeat=1)
+        incremental_requests = replay.requests
+        catalog = snapshot_cache.read_snapshot(CATALOG_SOURCE, key)
+        expected = ingest_models(max_models, base_url=replay.url, params=RECENT_FIRST)
+        assert len(catalog) == max_models and catalog["ID"].tolist() == expected["ID"].tolist()
+        assert refresh_catalog(max_models=max_models, base_url=replay.url) == key, "an idle refresh changed the catalog"
+        print(f"capped catalog refresh ({max_models} of {len(models)} models, 100 changed): same as a full "
+              f"download, {incremental_time * 1000:.1f} ms / {incremental_requests} pages")
+
+
+def bench_memory():
+    """
+    Memory footprint of the models catalog (recorded data x10) and of the leaderboard before and
+    after the compact representation (compact.py).
+    """
+    from compact import compact_leaderboard_frame, compact_models_frame, memory_usage_mb
+    from hf_catalog import page_to_frame
+
+    frames = {
+        "models x10": (page_to_frame(load_recorded_models(scale=10)), compact_models_frame),
+        "leaderboard": (load_leaderboard_csv(), compact_leaderboard_frame),
+    }
+    print("memory (deep)")
+    for name, (df, compact) in frames.items():
+        before = memory_usage_mb(df)
+        after = memory_usage_mb(compact(df.copy()))
+        print(f"  {name} ({len(df)} rows): {before:.2f} MiB -> {after:.2f} MiB (-{1 - after / before:.0%})")
+
+
+def bench_article_ingest():
+    """
+    Fills the article store from Data_csv/df_articles.csv with the offline replay source, first with
+    the articles up to 2024-11-15 and then incrementally, and checks the url deduplication.
+    """
+    import tempfile
+
+    import snapshot_cache
+    from article_ingest import ARTICLE_COLUMNS, CsvReplaySource, read_articles, store_version, update_articles
+
+    expected = pd.read_csv(DATA_DIR / "df_articles.csv")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        snapshot_cache.CACHE_DIR = Path(cache_dir)
+        older = Path(cache_dir) / "older.csv"
+        expected[expected["date"] <= "2024-11-15"].to_csv(older, index=False)
+
+        full_time, first = best_of(lambda: update_articles(CsvReplaySource(older), max_items=None), repeat=1)
+        version = store_version()
+        source = CsvReplaySource(DATA_DIR / "df_articles.csv")
+        incremental_time, added = best_of(lambda: update_articles(source, max_items=None), repeat=1)
+        read_time, stored = best_of(read_articles)
+
+        assert list(stored.columns) == ARTICLE_COLUMNS and stored["url"].is_unique
+        assert isinstance(stored["country"].dtype, pd.CategoricalDtype)
+        assert len(stored) == first + added == expected["url"].nunique()
+        assert store_version() != version and update_articles(source, max_items=None) == 0
+        print(f"article store ({len(stored)} unique urls out of {len(expected)} rows, "
+              f"{stored['isDuplicate'].sum()} flagged isDuplicate)")
+        print(f"  initial: {first} articles in {full_time * 1000:.1f} ms, "
+              f"incremental: {added} articles in {incremental_time * 1000:.1f} ms, read: {read_time * 1000:.1f} ms")
+
+
+def bench_country_extraction():
+    """
+    Compares the vectorized country extraction done at ingestion with the former per-row parsing of
+    the Actualités page, on the locations of Data_csv/df_articles.csv (as strings and as API dicts).
+    """
+    import ast
+    import re
+
+    from article_ingest import extract_countries
+
+    def extract_country_from_object(location_entry):
+        if isinstance(location_entry, dict):
+            return location_entry.get('country', {}).get('label', {}).get('eng', None)
+        elif isinstance(location_entry, str):
+            match = re.search(r"'country': \{.*?'label': \{'eng': '(.*?)'\}", location_entry)
+            if match:
+                return match.group(1)
+        return None
+
+    strings = pd.read_csv(DATA_DIR / "df_articles.csv")["location"]
+    strings = strings.astype(object).where(strings.notna(), None)
+    dicts = strings.map(lambda location: None if location is None else ast.literal_eval(location))
+    for name, locations in (("strings", strings), ("dicts", dicts)):
+        per_row_time, per_row = best_of(lambda: locations.apply(extract_country_from_object))
+        vectorized_time, vectorized = best_of(lambda: extract_countries(locations))
+        # Same country wherever the per-row parsing found one; the vectorized version also reads
+        # the locations which are themselves a country
+        found = per_row.notna().to_numpy()
+        assert (vectorized[found].to_numpy() == per_row[found].to_numpy()).all()
+        assert vectorized.notna().sum() >= found.sum()
+        report(f"country extraction, {name} ({len(locations)} rows, {found.sum()} -> "
+               f"{vectorized.notna().sum()} located)", per_row_time, vectorized_time)
+
+
+def bench_search():
+    """
+    Compares the trigram search index with the `str.contains` scan on the recorded models repeated to
+    100k IDs, and on the article titles of Data_csv/df_articles.csv, checking both find the same rows.
+    """
+    from search_index import SearchIndex
+
+    models = pd.DataFrame(load_recorded_models(scale=100))
+    articles = pd.read_csv(DATA_DIR / "df_articles.csv")
+    cases = [
+        ("model IDs", models["id"], models["likes"], ["llama", "mistral-7b", "qwen2.5", "instruct", "gpt", "7b"]),
+        ("article titles", articles["title"], articles["relevance"], ["openai", "language model", "ai"]),
+    ]
+    for name, texts, scores, queries in cases:
+        build_time, index = best_of(lambda: SearchIndex(texts, scores), repeat=1)
+        print(f"search index over {len(texts)} {name}: built in {build_time * 1000:.0f} ms")
+        for query in queries:
+            scan_time, expected = best_of(lambda: np.logical_and.reduce(
+                [texts.str.contains(term, case=False, na=False, regex=False).to_numpy() for term in query.split()]))
+            search_time, (positions, fuzzy) = best_of(lambda: index.search(query))
+            assert not fuzzy and (index.mask(positions) == expected).all()
+            assert (np.diff(index.rank[positions]) > 0).all()
+            report(f"'{query}' ({len(positions)} matches)", scan_time, search_time)
+        typo_time, (positions, fuzzy) = best_of(lambda: index.search(queries[0][:-1] + "xx"))
+        print(f"  fuzzy '{queries[0][:-1]}xx': {len(positions)} matches in {typo_time * 1000:.2f} ms")
+
+    # Terms whose rarest trigram occurs near the end of the last text, longer than the padding after it
+    # (used to index past the end of the corpus)
+    end_cases = [
+        (pd.read_csv(DATA_DIR / "models_data.csv")["ID"], ["-es-gguf-loradex", "-es-gguf"]),
+        (articles["title"], ["upturnetworks", "turnintegr", "upturn"]),
+    ]
+    for texts, queries in end_cases:
+        index = SearchIndex(texts)
+        queries = queries + [texts.iloc[-1][-8:].lower() + "overrun"]
+        for query in queries:
+            positions, _ = index.search(query, fuzzy=False)
+            assert (index.mask(positions) == texts.str.contains(query, case=False, na=False, regex=False)).all(), query
+    print("  terms running past the end of the corpus: ok")
+
+
+def bench_tag_counts():
+    """
+    Top 10 tags of the recorded models repeated to 100k rows: counted over an all-rows mask, as the
+    unfiltered catalog page did, against read from the postings sizes, same counts.
+    """
+    from tag_index import TagIndex
+
+    index = TagIndex(pd.DataFrame(load_recorded_models(scale=100))["tags"])
+    everything = np.ones(index.num_rows, dtype=bool)
+    masked_time, expected = best_of(lambda: index.top(10, everything))
+    sizes_time, counts = best_of(lambda: index.top(10))
+    pd.testing.assert_frame_equal(expected, counts, check_dtype=False)
+    report(f"top 10 tags, unfiltered ({index.num_rows} rows)", masked_time, sizes_time)
+
+
+def import_times(module):
+    """
+    Imports `module` in a fresh interpreter with `-X importtime` and returns {module name: cumulative
+    import time in seconds} for every module it loaded.
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=Path(__file__).resolve().parent, capture_output=True, text=True, check=True)
+    times = {}
+    for line in output.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("| imported package"):
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def bench_startup():
+    """
+    Cold import cost of the router (what landing on the home page pays) and of each page module (paid
+    on first navigation), measured with `python -X importtime`. Fails if the router pulls in one of
+    DEFERRED_MODULES.
+    """
+    runs = [import_times("accueil") for _ in range(3)]
+    best = min(runs, key=lambda times: times["accueil"])
+    loaded = [module for module in DEFERRED_MODULES if module in best]
+    assert not loaded, f"imported at startup: {loaded}"
+    print(f"startup: accueil {best['accueil'] * 1000:.0f} ms, of which streamlit {best['streamlit'] * 1000:.0f} ms")
+    for page in ("app", "benchmark", "actu"):
+        times = min((import_times(page) for _ in range(3)), key=lambda times: times[page])
+        heavy = {module: times[module] for module in DEFERRED_MODULES if module in times}
+        print(f"  {page}: +{(times[page] - times['streamlit']) * 1000:.0f} ms on first navigation "
+              f"({', '.join(f'{module} {seconds * 1000:.0f} ms' for module, seconds in heavy.items()) or 'no deferred module'})")
+
+
+def bench_warmup():
+    """
+    Warms the three sources from offline stand-ins (replay server for the catalog, Data_csv for the
+    leaderboard and the articles), one after the other and then concurrently as at server start, and
+    checks that the first page loads are then served from the shared caches.
+    """
+    import tempfile
+
+    import actu
+    import app
+    import benchmark
+    import data_store
+    import hf_catalog
+    import snapshot_cache
+    import warmup
+    from article_ingest import CsvReplaySource
+
+    def wait_for_jobs():
+        while snapshot_cache.running_jobs():
+            time.sleep(0.01)
+
+    with ReplayModelsServer(load_recorded_models(scale=10)) as replay:
+        app.refresh_catalog = lambda max_models: hf_catalog.refresh_catalog(max_models, base_url=replay.url)
+        benchmark.get_leaderboard_revision = lambda: "csv"
+        benchmark.build_leaderboard_frame = lambda revision: load_leaderboard_csv()
+        actu.find_api_key = lambda: "offline"
+        actu.EventRegistrySource = lambda api_key: CsvReplaySource(DATA_DIR / "df_articles.csv")
+
+        timings = {}
+        for mode in ("sequential", "concurrent"):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                snapshot_cache.CACHE_DIR = Path(cache_dir)
+                data_store.clear()
+                start = time.perf_counter()
+                if mode == "sequential":
+                    for source in warmup.SOURCES:
+                        warmup.warm_source(source)
+                else:
+                    assert len(warmup.warm_all()) == len(warmup.SOURCES)
+                    wait_for_jobs()
+                timings[mode] = time.perf_counter() - start
+
+                pages = {
+                    "models": app.fetch_models_data,
+                    "leaderboard": benchmark.fetch_leaderboard_data,
+                    "articles": lambda: actu.load_articles("offline"),
+                }
+                loads = {name: best_of(load, repeat=1) for name, load in pages.items()}
+                assert all(not df.empty and df.attrs.get("read_only") for _, df in loads.values())
+        print("warm-up (offline stand-ins: CPU-bound here, concurrency mostly pays off on network waits)")
+        report("3 sources, sequential -> concurrent", timings["sequential"], timings["concurrent"])
+        print("  first page loads after warm-up: "
+              + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, (seconds, _) in loads.items()))
+
+
+def bench_data_modes():
+    """
+    Loads of the bundled Data_csv exports: parsing the CSV (tag lists, dates, locations, links) against
+    reading the typed Parquet copy made once by `data_sources`, then every page loader in snapshot
+    mode, which must not touch the network.
+    """
+    import tempfile
+
+    import actu
+    import app
+    import benchmark
+    import data_sources
+    import data_store
+    import snapshot_cache
+    from article_ingest import read_articles_csv
+    from hf_catalog import read_models_csv
+
+    parsers = {
+        "models": read_models_csv,
+        "leaderboard": benchmark.read_leaderboard_csv,
+        "articles": read_articles_csv,
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        snapshot_cache.CACHE_DIR = Path(cache_dir)
+        data_store.clear()
+        print("bundled data (CSV parse -> typed Parquet copy)")
+        for source, parse in parsers.items():
+            path = data_sources.BUNDLED_FILES[source]
+            parse_time, parsed = best_of(lambda: parse(path), repeat=3)
+            name, key = data_sources.bundled_source(source), data_sources.bundled_snapshot(source, parse)
+            read_time, copy = best_of(lambda: snapshot_cache.read_snapshot(name, key))
+            assert list(copy.columns) == list(parsed.columns) and len(copy) == len(parsed)
+            report(f"{source} ({len(copy)} rows)", parse_time, read_time)
+
+        def offline(*args, **kwargs):
+            raise AssertionError("network access in snapshot mode")
+
+        app.refresh_catalog = benchmark.get_leaderboard_revision = actu.update_articles = offline
+        data_sources.DATA_MODE = "snapshot"
+        loaders = {
+            "models": app.fetch_models_data,
+            "leaderboard": benchmark.fetch_leaderboard_data,
+            "articles": lambda: actu.load_articles("offline"),
+        }
+        for name, load in loaders.items():
+            load_time, df = best_of(load, repeat=1)
+            assert not df.empty and df.attrs.get("read_only")
+            print(f"  snapshot mode, {name} page data: {len(df)} rows in {load_time * 1000:.1f} ms")
+
+
+def bench_model_links():
+    """
+    Compares the vectorized model-link extraction with the per-row BeautifulSoup parsing
+    on Data_csv/benchmark.csv, and checks that both produce the same output.
+    """
+    from benchmark import extract_model_info, extract_model_links
+
+    html = pd.read_csv(DATA_DIR / "benchmark.csv")["model_name_html"]
+
+    reference_time, reference = best_of(lambda: list(zip(*html.apply(extract_model_info))), repeat=3)
+    candidate_time, (names, links) = best_of(lambda: extract_model_links(html))
+
+    assert list(reference[0]) == names.tolist(), "model_name mismatch"
+    assert list(reference[1]) == links.tolist(), "model_link mismatch"
+    print(f"model links ({len(html)} rows, identical output)")
+    report("BeautifulSoup -> vectorized", reference_time, candidate_time)
+
+
+def bench_top_performers():
+    """
+    Compares the argmax-per-group kernel with the melt + groupby.apply(idxmax) approach
+    for both time intervals of the "Évolution des Performances" chart.
+    """
+    from aggregations import top_performers_per_period
+
+    df = load_leaderboard_csv()
+    metrics = ["IFEval", "BBH", "MATH Lvl 5", "GPQA", "MUSR", "MMLU-PRO", "score"]
+    plot_df = df.dropna(subset=["submission_date"])[["submission_date", "model_name", "type"] + metrics]
+
+    def melt_groupby_apply(freq):
+        melted = pd.melt(plot_df, id_vars=["submission_date", "model_name", "type"], value_vars=metrics,
+                         var_name="benchmark_metric", value_name="metric_value").dropna(subset=["metric_value"])
+        melted["time_period"] = melted["submission_date"].dt.to_period(freq)
+        grouped = melted.groupby(["benchmark_metric", "time_period"])[["submission_date", "model_name", "type", "metric_value"]]
+        top = grouped.apply(lambda x: x.loc[x["metric_value"].idxmax()]).reset_index()
+        top["time_period"] = top["time_period"].dt.to_timestamp()
+        return top
+
+    print(f"top performers per period ({len(plot_df)} rows x {len(metrics)} metrics, identical output)")
+    for freq in ("D", "M"):
+        reference_time, reference = best_of(lambda: melt_groupby_apply(freq), repeat=3)
+        candidate_time, candidate = best_of(lambda: top_performers_per_period(plot_df, metrics, freq))
+
+        key = ["benchmark_metric", "time_period"]
+        columns = ["submission_date", "model_name", "type", "benchmark_metric", "metric_value", "time_period"]
+        pd.testing.assert_frame_equal(
+            reference.sort_values(key).reset_index(drop=True)[columns],
+            candidate.sort_values(key).reset_index(drop=True)[columns],
+            check_dtype=False,
+        )
+        report(f"freq={freq}", reference_time, candidate_time)
+
+
+def bench_cubes():
+    """
+    Chart aggregations of the three pages on the bundled data x20: recomputed from the filtered rows
+    on every rerun, as before, against rolled up from the cube built once per snapshot, with the same
+    results (top model per month, cumulative CO₂ per day, article counts and sentiment per country).
+    """
+    from actu import article_stats_cube, prepare_articles
+    from app import monthly_likes_cube
+    from article_ingest import read_articles_csv
+    from benchmark import co2_cube, read_leaderboard_csv
+    from hf_catalog import read_models_csv
+
+    def repeat(df, scale=20):
+        return pd.concat([df] * scale, ignore_index=True)
+
+    models = repeat(read_models_csv(DATA_DIR / "models_data.csv"))
+    leaderboard = repeat(read_leaderboard_csv(DATA_DIR / "benchmark.csv"))
+    articles = repeat(prepare_articles(read_articles_csv(DATA_DIR / "df_articles.csv")))
+    authors = tuple(models["Auteur"].value_counts().index[:20])
+    precisions = tuple(sorted(leaderboard["precision"].dropna().unique()))
+    countries = tuple(sorted(articles["country"].unique()))
+
+    def top_monthly_rows():
+        rows = models[models["Auteur"].isin(authors)]
+        timeline = rows[["ID", "Likes"]].assign(Mois=rows["Date de création"].dt.to_period("M"))
+        return timeline.sort_values("Likes", ascending=False, kind="stable").groupby("Mois").first()["Likes"]
+
+    def co2_rows():
+        rows = leaderboard[leaderboard["precision"].isin(precisions)].dropna(subset=["submission_date", "co2_cost_kg"])
+        return rows.sort_values("submission_date")["co2_cost_kg"].cumsum().groupby(rows["submission_date"]).last()
+
+    def country_rows():
+        rows = articles[articles["country"].isin(countries) & articles["sentiment"].between(0.0, 1.0)]
+        return rows.groupby("country", observed=True)["sentiment"].agg(["size", "mean"])
+
+    cases = [
+        ("models, top per month", len(models), lambda: monthly_likes_cube(models), top_monthly_rows,
+         lambda cube: cube.rollup(["Mois"], (("Auteur", authors),))["Likes"],
+         lambda expected, rolled: np.array_equal(expected.to_numpy(), rolled.to_numpy())),
+        ("leaderboard, cumulative CO2", len(leaderboard), lambda: co2_cube(leaderboard), co2_rows,
+         lambda cube: cube.rollup(["submission_date"], (("precision", precisions),))["co2_cost_kg"].cumsum(),
+         lambda expected, rolled: np.allclose(expected.to_numpy(), rolled.to_numpy())),
+        ("articles, per country", len(articles), lambda: article_stats_cube(articles), country_rows,
+         lambda cube: cube.rollup(["country"], (("country", countries),), (("sentiment", (0.0, 1.0)),)),
+         lambda expected, rolled: (np.array_equal(expected["size"].to_numpy(), rolled["count"].to_numpy())
+                                   and np.allclose(expected["mean"], rolled["sentiment_total"] / rolled["count"]))),
+    ]
+    print("aggregate cubes (bundled data x20, identical results)")
+    for name, rows, build, from_rows, from_cube, same in cases:
+        build_time, cube = best_of(build, repeat=3)
+        reference_time, expected = best_of(from_rows, repeat=3)
+        candidate_time, rolled = best_of(lambda: from_cube(cube))
+        assert same(expected, rolled), f"{name}: cube and rows disagree"
+        report(f"{name} ({rows} rows -> {len(cube.cells)} cells, built in {build_time * 1000:.0f} ms)",
+               reference_time, candidate_time)
+
+
+def bench_figures():
+    """
+    Leaderboard figures on the bundled data (as shipped) and x10 spread over ten years (a growing
+    leaderboard): built with every point as before, against downsampled / WebGL as now (the uncached
+    rerun), and served from the figure cache on a rerun; times include the JSON serialization done by
+    st.plotly_chart.
+    """
+    import plotly.express as px
+    import plotly.io as pio
+
+    from aggregations import top_performers_per_period
+    from benchmark import co2_cube, co2_figure, efficiency_figure, read_leaderboard_csv, timeline_figure
+    from charts import DOWNSAMPLE_MIN_POINTS, MAX_LINE_POINTS, lttb
+    from efficiency import efficiency_frame
+
+    x = np.arange(100_000)
+    y = np.sin(x / 500) + np.random.default_rng(0).normal(0, 0.1, len(x))
+    kept = lttb(x, y, MAX_LINE_POINTS)
+    assert len(kept) == MAX_LINE_POINTS and kept[0] == 0 and kept[-1] == len(x) - 1 and np.all(np.diff(kept) > 0)
+    assert y[kept].max() == y.max() and y[kept].min() == y.min(), "LTTB lost the extremes of a noisy series"
+
+    base = read_leaderboard_csv(DATA_DIR / "benchmark.csv")
+    metrics = ["IFEval", "BBH", "MATH Lvl 5", "GPQA", "MUSR", "MMLU-PRO", "score"]
+    for copies in (1, 10):
+        leaderboard = pd.concat([base.assign(submission_date=base["submission_date"] + pd.Timedelta(days=365 * copy),
+                                             model_name=base["model_name"] + f"~{copy}")
+                                 for copy in range(copies)], ignore_index=True)
+        top_performers = top_performers_per_period(leaderboard.dropna(subset=["submission_date"]), metrics, "D")
+        daily_co2 = co2_cube(leaderboard).rollup(["submission_date"])
+        co2_df = daily_co2.assign(cumulative_co2=daily_co2["co2_cost_kg"].cumsum())
+        analysis_df = efficiency_frame(leaderboard, "score")
+
+        cases = [
+            ("daily top performers", len(top_performers),
+             lambda: px.line(top_performers.sort_values("time_period"), x="time_period", y="metric_value",
+                             color="benchmark_metric", markers=True),
+             lambda: timeline_figure(top_performers)),
+            ("cumulative CO2", len(co2_df),
+             lambda: px.line(co2_df, x="submission_date", y="cumulative_co2", markers=True),
+             lambda: co2_figure(co2_df)),
+            # The stars of the Pareto front add their coordinates only (they take no hover of their own)
+            ("performance vs CO2", len(analysis_df) + int(analysis_df["pareto"].sum()),
+             lambda: px.scatter(analysis_df, x="co2_cost_kg", y="score", size="params_b", color="type",
+                                hover_name="model_name", size_max=45, render_mode="svg"),
+             lambda: efficiency_figure(analysis_df, "score")),
+        ]
+        print(f"leaderboard figures (bundled data{f' x{copies} over {copies} years' if copies > 1 else ''}, "
+              "build + JSON)")
+        for name, points, before, after in cases:
+            reference_time, reference = best_of(lambda: pio.to_json(before(), validate=False), repeat=5)
+            candidate_time, candidate = best_of(lambda: pio.to_json(after(), validate=False), repeat=5)
+            figure = after()
+            cached_time, _ = best_of(lambda: pio.to_json(figure, validate=False))
+            traces = {trace.type for trace in figure.data}
+            sent = sum(len(trace.x) for trace in figure.data)
+            if points <= DOWNSAMPLE_MIN_POINTS:
+                assert sent == points, f"{name}: a short trace was downsampled"
+            assert sent <= max(points, MAX_LINE_POINTS) + len(figure.data) * 3, f"{name}: too many points sent"
+            report(f"{name} ({points} -> {sent} points, {'/'.join(sorted(traces))}, "
+                   f"{len(reference) / 1024:.0f} -> {len(candidate) / 1024:.0f} KiB)", reference_time, candidate_time)
+            report(f"{name}, cached figure", reference_time, cached_time)
+
+
+def bench_filters():
+    """
+    Sidebar filters of the three pages on the bundled data x20, as boolean masks recomputed on every
+    rerun before, against the shared filter engine now: first evaluation, narrower state derived from
+    a cached broader one, and cached state (identical rows), plus the default views.
+    """
+    from actu import prepare_articles
+    from article_ingest import read_articles_csv
+    from benchmark import read_leaderboard_csv
+    from compact import compact_leaderboard_frame, compact_models_frame
+    from filter_engine import FilterEngine, between, has_tags, isin
+    from hf_catalog import read_models_csv
+    from tag_index import TagIndex
+
+    def repeat(df, scale=20):
+        return pd.concat([df] * scale, ignore_index=True)
+
+    models = compact_models_frame(repeat(read_models_csv(DATA_DIR / "models_data.csv")))
+    leaderboard = compact_leaderboard_frame(repeat(read_leaderboard_csv(DATA_DIR / "benchmark.csv")))
+    articles = repeat(prepare_articles(read_articles_csv(DATA_DIR / "df_articles.csv")))
+    tag_index = TagIndex(models["Tags"])
+    authors = list(models["Auteur"].value_counts().index[:30])
+    types = list(leaderboard["type"].dropna().unique())
+    precisions = list(leaderboard["precision"].dropna().unique())
+    countries = list(articles["country"].unique())
+    start, end = articles["date"].quantile(0.25), articles["date"].max()
+
+    cases = [
+        ("models, authors + tags", models, {"Tags": tag_index},
+         [isin("Auteur", authors)],
+         [isin("Auteur", authors[:10]), has_tags("Tags", ["transformers", "safetensors"], "all")],
+         lambda: (models["Auteur"].isin(authors[:10]).to_numpy()
+                  & tag_index.mask(["transformers", "safetensors"], "all"))),
+        ("leaderboard, precision/type + models", leaderboard, None,
+         [isin("precision", precisions), isin("type", types[:2])],
+         [isin("precision", precisions), isin("type", types[:1]),
+          isin("model_name", leaderboard["model_name"].iloc[:200:7])],
+         lambda: (leaderboard["precision"].isin(precisions) & leaderboard["type"].isin(types[:1])
+                  & leaderboard["model_name"].isin(leaderboard["model_name"].iloc[:200:7])).to_numpy()),
+        ("articles, countries/dates/sentiment", articles, None,
+         [isin("country", countries), between("date", start, end), between("sentiment", -1.0, 1.0)],
+         [isin("country", countries[:5]), between("date", start, end), between("sentiment", 0.0, 1.0)],
+         lambda: (articles["country"].isin(countries[:5]) & (articles["date"] >= start) & (articles["date"] <= end)
+                  & (articles["sentiment"] >= 0.0) & (articles["sentiment"] <= 1.0)).to_numpy()),
+    ]
+    print("filter engine (bundled data x20, identical rows)")
+    for name, df, tag_indexes, broad, narrow, reference in cases:
+        reference_time, expected = best_of(reference)
+
+        engine = FilterEngine(df, tag_indexes)
+        # Column summaries and arrays are computed on first use, once per snapshot
+        setup_time, _ = best_of(lambda: engine.rows(broad + narrow), repeat=1)
+
+        def new_state():
+            engine._results.clear()
+            return engine.rows(narrow)
+
+        cold_time, rows = best_of(new_state)
+        assert np.array_equal(rows, np.flatnonzero(expected)), f"{name}: engine and masks disagree"
+
+        engine._results.clear()
+        engine.stats["derived"] = 0
+        engine.rows(broad)
+        derived_time, derived = best_of(lambda: engine.rows(narrow), repeat=1)
+        assert engine.stats["derived"] == 1 and np.array_equal(derived, rows), f"{name}: wrong derivation"
+        cached_time, _ = best_of(lambda: engine.rows(narrow))
+        report(f"{name} ({len(df)} -> {len(rows)} rows, first use of the columns {setup_time * 1000:.0f} ms), "
+               "new state", reference_time, cold_time)
+        report(f"{name}, derived from the broader state", reference_time, derived_time)
+        report(f"{name}, cached", reference_time, cached_time)
+
+    defaults = [
+        (FilterEngine(leaderboard), [isin("precision", precisions), isin("type", types)],
+         lambda: leaderboard[leaderboard["precision"].isin(precisions) & leaderboard["type"].isin(types)]),
+        (FilterEngine(articles), [isin("country", countries), between("sentiment", -1.0, 1.0),
+                                  between("date", articles["date"].min(), articles["date"].max())],
+         lambda: articles[articles["country"].isin(countries) & articles["sentiment"].between(-1.0, 1.0)]),
+    ]
+    for engine, clauses, reference in defaults:
+        has_missing = engine.df[[clause.column for clause in clauses]].isna().any().any()
+        assert (engine.canonical(clauses) == ()) != has_missing, "default view not recognized"
+        reference_time, _ = best_of(reference)
+        engine.select(clauses)
+        default_time, selected = best_of(lambda: engine.select(clauses))
+        assert len(selected) == len(reference()), "default view rows differ"
+        report(f"default view ({len(selected)} rows)", reference_time, default_time)
+
+
+def bench_query_backends():
+    """
+    Leaderboard table queries (row count, sorted page of 50 rows, counts per type) on the bundled data
+    x100 written as a Parquet snapshot: pandas on the in-memory frame against DuckDB pushed down to the
+    Parquet file, for filter states not cached yet, with identical results. Skipped without duckdb.
+    """
+    import tempfile
+
+    import streamlit as st
+
+    import snapshot_cache
+    from benchmark import read_leaderboard_csv
+    from compact import compact_leaderboard_frame
+    from filter_engine import get_filter_engine, isin
+    from query_engine import DuckDBBackend, PandasBackend
+
+    try:
+        duckdb_backend = DuckDBBackend()
+    except ImportError:
+        print("query backends: duckdb is not installed, skipped")
+        return
+    pandas_backend = PandasBackend()
+    base = read_leaderboard_csv(DATA_DIR / "benchmark.csv")
+    leaderboard = pd.concat([base.assign(model_name=base["model_name"] + f"~{copy}") for copy in range(100)],
+                            ignore_index=True)
+    types = list(leaderboard["type"].dropna().unique())
+    precisions = list(leaderboard["precision"].dropna().unique())
+    columns = ["model_name", "score", "IFEval", "BBH", "co2_cost_kg", "model_link"]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        snapshot_cache.CACHE_DIR = Path(cache_dir)
+        snapshot_cache.write_snapshot("leaderboard", "x100", leaderboard)
+        df = compact_leaderboard_frame(snapshot_cache.read_snapshot("leaderboard", "x100"))
+        states = [[isin("precision", precisions[:1]), isin("type", types[:count])] for count in range(1, len(types))]
+
+        def run(backend, query):
+            # Every filter state once, with the filter and sort caches emptied first
+            st.cache_data.clear()
+            get_filter_engine.clear()
+            duckdb_backend._counts.clear()
+            return [query(backend, clauses) for clauses in states]
+
+        queries = {
+            "row count": lambda backend, clauses: backend.count(df, clauses),
+            "page 3 sorted by score": lambda backend, clauses: backend.page(
+                df, clauses, columns, "score", False, 100, 50)["model_name"].tolist(),
+            "counts per type": lambda backend, clauses: backend.value_counts(df, clauses, "type")["count"].tolist(),
+        }
+        print(f"query backends ({len(df)} rows, {len(states)} filter states, identical results)")
+        for name, query in queries.items():
+            reference_time, expected = best_of(lambda: run(pandas_backend, query), repeat=3)
+            candidate_time, result = best_of(lambda: run(duckdb_backend, query), repeat=3)
+            assert expected == result, f"{name}: pandas and DuckDB disagree"
+            report(f"{name}, pandas -> duckdb", reference_time / len(states), candidate_time / len(states))
+
+
+def bench_efficiency():
+    """
+    Pareto front of (CO₂ cost, metric, parameters) on the bundled leaderboard x1 and x10 with jittered
+    copies: the O(n log n) sweep against a pairwise dominance check by blocks, same front.
+    """
+    from benchmark import read_leaderboard_csv
+    from efficiency import efficiency_frame, pareto_front
+
+    def pairwise(co2, metric, params, block=512):
+        front = np.ones(len(co2), dtype=bool)
+        for start in range(0, len(co2), block):
+            c, m, p = (values[start:start + block, None] for values in (co2, metric, params))
+            weakly = (co2 <= c) & (metric >= m) & (params <= p)
+            strictly = (co2 < c) | (metric > m) | (params < p)
+            front[start:start + block] = ~(weakly & strictly).any(axis=1)
+        return front
+
+    base = read_leaderboard_csv(DATA_DIR / "benchmark.csv")
+    rng = np.random.default_rng(0)
+    print("Pareto front (CO2 cost, score, parameters), identical front")
+    for scale in (1, 10):
+        leaderboard = pd.concat([base] + [base.assign(co2_cost_kg=base["co2_cost_kg"] * rng.uniform(0.8, 1.2, len(base)),
+                                                      score=base["score"] * rng.uniform(0.9, 1.1, len(base)))
+                                          for _ in range(scale - 1)], ignore_index=True)
+        analysis = efficiency_frame(leaderboard, "score")
+        columns = [analysis[column].to_numpy(dtype=float) for column in ("co2_cost_kg", "score", "params_b")]
+        reference_time, expected = best_of(lambda: pairwise(*columns), repeat=1)
+        candidate_time, front = best_of(lambda: pareto_front(*columns), repeat=3)
+        assert np.array_equal(expected, front), f"x{scale}: fronts differ"
+        report(f"x{scale} ({len(analysis)} models, {front.sum()} on the front)", reference_time, candidate_time)
+
+
+def bench_similarity():
+    """
+    10 nearest profiles of 200 models on the bundled leaderboard x1 and x10 with jittered copies and 10%
+    missing metrics: the index (matrix products over the candidates) against a NaN-aware distance computed
+    row by row with pandas, same neighbours.
+    """
+    from benchmark import read_leaderboard_csv
+    from similarity import MIN_SHARED_METRICS, PROFILE_COLUMNS, SimilarityIndex
+
+    def row_by_row(index, position, k):
+        profiles = pd.DataFrame(np.where(index.present, index.profiles, np.nan)[:, :len(PROFILE_COLUMNS)])
+        squares = (profiles - profiles.iloc[position]) ** 2
+        distances = np.sqrt(squares.mean(axis=1)).where(squares.count(axis=1) >= MIN_SHARED_METRICS)
+        distances = distances[index.models != index.models[position]].dropna()
+        return distances.sort_values(kind="stable").index[:k].to_numpy()
+
+    base = read_leaderboard_csv(DATA_DIR / "benchmark.csv")
+    rng = np.random.default_rng(0)
+    print("Similar models (10 nearest profiles of 200 models), identical neighbours")
+    for scale in (1, 10):
+        leaderboard = pd.concat([base] + [base.assign(model_link=base["model_link"] + f"-{copy}",
+                                                      **{column: base[column] * rng.uniform(0.9, 1.1, len(base))
+                                                         for column in PROFILE_COLUMNS})
+                                          for copy in range(scale - 1)], ignore_index=True)
+        for column in PROFILE_COLUMNS:
+            leaderboard.loc[rng.random(len(leaderboard)) < 0.1, column] = np.nan
+        index = SimilarityIndex(leaderboard)
+        queries = rng.choice(len(leaderboard), 200, replace=False)
+        reference_time, expected = best_of(lambda: [row_by_row(index, q, 10) for q in queries], repeat=1)
+        candidate_time, found = best_of(lambda: [index.neighbours(q, 10)[0] for q in queries], repeat=3)
+        assert all(np.array_equal(a, b) for a, b in zip(expected, found)), f"x{scale}: neighbours differ"
+        report(f"x{scale} ({len(leaderboard)} models), per query", reference_time / len(queries),
+               candidate_time / len(queries))
+
+
+def bench_model_join():
+    """
+    Leaderboard rows next to the downloads and likes of their catalog model, on the bundled data x1 and
+    x20 (copies with suffixed ids and links): canonical keys and merge recomputed on every rerun, against
+    read by position through the join index built once per pair of snapshots, same rows. Also the
+    rebuild after a leaderboard refresh, the catalog keys being reused.
+    """
+    from benchmark import read_leaderboard_csv
+    from hf_catalog import read_models_csv
+    from model_join import JoinIndex, joined_frame, model_keys
+
+    base_models = read_models_csv(DATA_DIR / "models_data.csv")
+    base_leaderboard = read_leaderboard_csv(DATA_DIR / "benchmark.csv")
+    leaderboard_columns, catalog_columns = ["model_name", "type", "score"], ["Téléchargements", "Likes"]
+    print("Leaderboard x catalog join, identical rows")
+    for scale in (1, 20):
+        models = pd.concat([base_models.assign(ID=base_models["ID"] + f"-{copy}") for copy in range(scale)],
+                           ignore_index=True)
+        leaderboard = pd.concat([base_leaderboard.assign(model_link=base_leaderboard["model_link"] + f"-{copy}")
+                                 for copy in range(scale)], ignore_index=True)
+
+        def merged():
+            catalog = models[catalog_columns].assign(key=model_keys(models["ID"])).drop_duplicates("key")
+            rows = leaderboard[leaderboard_columns].assign(key=model_keys(leaderboard["model_link"]))
+            return rows.merge(catalog.dropna(subset=["key"]), on="key").drop(columns="key")
+
+        catalog_keys = model_keys(models["ID"]).to_numpy(dtype=object, na_value=None)
+        index = JoinIndex(catalog_keys, model_keys(leaderboard["model_link"]).to_numpy(dtype=object, na_value=None))
+        reference_time, expected = best_of(merged)
+        candidate_time, joined = best_of(lambda: joined_frame(index, models, leaderboard, catalog_columns,
+                                                              leaderboard_columns))
+        pd.testing.assert_frame_equal(expected, joined, check_dtype=False)
+        report(f"x{scale} ({len(joined)} of {len(leaderboard)} rows), per rerun", reference_time, candidate_time)
+        refresh_time, _ = best_of(lambda: JoinIndex(
+            catalog_keys, model_keys(leaderboard["model_link"]).to_numpy(dtype=object, na_value=None)))
+        report(f"x{scale}, leaderboard refresh (index rebuilt) vs merge", reference_time, refresh_time)
+
+
+def bench_tracing():
+    """
+    Overhead of a traced stage (timer, counters and page record) and consistency of its records:
+    nesting, rows in/out, cache hit/miss and the Prometheus export.
+    """
+    import tracing
+
+    calls = 10000
+    df = pd.DataFrame({"x": np.arange(1000)})
+
+    def traced_stages():
+        for _ in range(calls):
+            with tracing.stage("bench_overhead", df) as span:
+                span.out(df)
+
+    with tracing.page_trace("bench") as trace:
+        elapsed, _ = best_of(traced_stages, repeat=3)
+        with tracing.stage("outer", df, cached=True) as outer:
+            with tracing.stage("inner", df) as inner:
+                tracing.cache_miss()
+                inner.out(df[df["x"] < 10])
+    assert len(trace) == 3 * calls + 2, "missing page records"
+    assert (inner.depth, outer.depth, inner.rows_out, outer.rows_in) == (1, 0, 10, 1000)
+    assert outer.cache == "miss" and inner.cache is None, "cache miss not attributed to the cached stage"
+    exported = tracing.prometheus_text()
+    assert 'hf_explorer_stage_cache_total{page="bench",stage="outer",result="miss"} 1' in exported
+    print(f"tracing: {elapsed / calls * 1e6:.1f} µs per stage")
+
+
+BENCHMARKS = {
+    "model_links": bench_model_links,
+    "top_performers": bench_top_performers,
+    "catalog_ingest": bench_catalog_ingest,
+    "catalog_refresh": bench_catalog_refresh,
+    "memory": bench_memory,
+    "article_ingest": bench_article_ingest,
+    "country_extraction": bench_country_extraction,
+    "search": bench_search,
+    "tag_counts": bench_tag_counts,
+    "startup": bench_startup,
+    "warmup": bench_warmup,
+    "data_modes": bench_data_modes,
+    "tracing": bench_tracing,
+    "cubes": bench_cubes,
+    "figures": bench_figures,
+    "filters": bench_filters,
+    "query_backends": bench_query_backends,
+    "efficiency": bench_efficiency,
+    "similarity": bench_similarity,
+    "model_join": bench_model_join,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -0,0 +1,204 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import snapshot_cache
+import tracing
+from filter_engine import get_filter_engine
+
+logger = logging.getLogger(__name__)
+
+# pandas: filters, sorts and groupbys run on the shared in-memory frames (default)
+# duckdb: they are pushed down as SQL to an in-process DuckDB reading the Parquet snapshots, and only
+#         the rows of the visible table page or the aggregated groups come back (needs `pip install duckdb`)
+QUERY_BACKENDS = ("pandas", "duckdb")
+QUERY_BACKEND = os.getenv("HF_EXPLORER_QUERY_BACKEND", "pandas")
+if QUERY_BACKEND not in QUERY_BACKENDS:
+    raise ValueError(f"HF_EXPLORER_QUERY_BACKEND must be one of {', '.join(QUERY_BACKENDS)}, not {QUERY_BACKEND!r}")
+
+# Row counts kept per backend, per (snapshot, filter state)
+MAX_CACHED_COUNTS = 256
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def sort_positions(_values, snapshot, filter_key, column, ascending):
+    """
+    Row positions ordering `_values` (missing values last), cached per (snapshot, filters, column, direction).
+    `_values` is not hashed: it must be fully determined by the other arguments.
+    """
+    tracing.cache_miss()
+    order = _values.reset_index(drop=True).sort_values(ascending=ascending, na_position="last", kind="stable")
+    return order.index.to_numpy()
+
+
+class PandasBackend:
+    """
+    Queries answered on the shared snapshot frame, with the filter engine and cached sort orders.
+
+    Every query takes the snapshot frame `df` and the filter `clauses` (see `filter_engine`).
+    """
+
+    name = "pandas"
+
+    def count(self, df, clauses):
+        """
+        Number of rows of `df` matching `clauses`.
+        """
+        rows = get_filter_engine(df, snapshot_cache.snapshot_id(df)).rows(clauses)
+        return len(df) if rows is None else len(rows)
+
+    def page(self, df, clauses, columns, order_by=None, ascending=True, offset=0, limit=None):
+        """
+        `columns` of the rows matching `clauses`, ordered by `order_by` (missing values last, ties in
+        row order; row order when None), from `offset` on, at most `limit` of them.
+        """
+        engine = get_filter_engine(df, snapshot_cache.snapshot_id(df))
+        rows = engine.rows(clauses)
+        positions = np.arange(len(df)) if rows is None else rows
+        if order_by is not None:
+            with tracing.stage("sort", len(positions), cached=True):
+                values = df[order_by] if rows is None else df[order_by].iloc[rows]
+                positions = positions[sort_positions(values, snapshot_cache.snapshot_id(df),
+                                                     engine.canonical(clauses), order_by, ascending)]
+        end = None if limit is None else offset + limit
+        return df.iloc[positions[offset:end]][list(columns)]
+
+    def value_counts(self, df, clauses, column):
+        """
+        (`column`, count) of the rows matching `clauses`, values in order of first appearance, missing
+        values left out.
+        """
+        values = get_filter_engine(df, snapshot_cache.snapshot_id(df)).select(clauses)[column]
+        codes, uniques = pd.factorize(values)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return pd.DataFrame({column: np.asarray(uniques, dtype=object), "count": counts})
+
+
+def _quote(column):
+    return '"' + str(column).replace('"', '""') + '"'
+
+
+def _parameter(value):
+    # Numpy scalars (e.g. from a categorical) as plain Python values
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _where(clauses):
+    """
+    SQL condition of the filter `clauses` and its parameters.
+    """
+    conditions, parameters = [], []
+    for clause in clauses:
+        column = _quote(clause.column)
+        if clause.kind == "isin":
+            if not clause.value:
+                conditions.append("false")
+                continue
+            conditions.append(f"list_contains(?, {column})")
+            parameters.append([_parameter(value) for value in clause.value])
+        elif clause.kind == "between":
+            conditions.append(f"{column} BETWEEN ? AND ?")
+            parameters += [_parameter(value) for value in clause.value]
+        else:
+            mode, tags = clause.value
+            conditions.append(f"list_has_{mode}({column}, ?)")
+            parameters.append(list(tags))
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters
+
+
+class DuckDBBackend:
+    """
+    Queries pushed down to an in-process DuckDB database reading the Parquet file of the snapshot the
+    frame comes from: filters, sorts, limits and groupbys run in DuckDB and only their result is
+    converted to pandas. Frames without a Parquet snapshot (ad-hoc frames, the article store) are
+    answered by the pandas backend.
+
+    The Parquet snapshot holds the rows of the frame in the same order (the shared frames only change
+    its dtypes), which is used to break ties and order groups like pandas does.
+    """
+
+    name = "duckdb"
+
+    def __init__(self):
+        import duckdb
+
+        self._connection = duckdb.connect()
+        self._fallback = PandasBackend()
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _run(self, sql, parameters):
+        # One cursor per query: each Streamlit session runs in its own thread
+        with tracing.stage("sql"):
+            return self._connection.cursor().execute(sql, parameters).df()
+
+    def _query(self, df, clauses):
+        # (Parquet file, canonical filter state, SQL source with its WHERE, parameters), or None
+        path = snapshot_cache.snapshot_file(snapshot_cache.snapshot_id(df))
+        if path is None:
+            return None
+        key = get_filter_engine(df, snapshot_cache.snapshot_id(df)).canonical(clauses)
+        where, parameters = _where(key)
+        return path, key, f"FROM read_parquet(?, file_row_number = true){where}", [str(path)] + parameters
+
+    def count(self, df, clauses):
+        query = self._query(df, clauses)
+        if query is None:
+            return self._fallback.count(df, clauses)
+        path, key, source, parameters = query
+        with self._lock:
+            count = self._counts.get((path, key))
+            if count is not None:
+                self._counts.move_to_end((path, key))
+                return count
+        count = int(self._run(f"SELECT count(*) AS n {source}", parameters)["n"].iloc[0])
+        with self._lock:
+            self._counts[path, key] = count
+            while len(self._counts) > MAX_CACHED_COUNTS:
+                self._counts.popitem(last=False)
+        return count
+
+    def page(self, df, clauses, columns, order_by=None, ascending=True, offset=0, limit=None):
+        query = self._query(df, clauses)
+        if query is None:
+            return self._fallback.page(df, clauses, columns, order_by, ascending, offset, limit)
+        _, _, source, parameters = query
+        order = "file_row_number"
+        if order_by is not None:
+            order = f"{_quote(order_by)} {'ASC' if ascending else 'DESC'} NULLS LAST, file_row_number"
+        selected = ", ".join(_quote(column) for column in columns)
+        limit_sql = "" if limit is None else f" LIMIT {int(limit)}"
+        return self._run(f"SELECT {selected} {source} ORDER BY {order}{limit_sql} OFFSET {int(offset)}", parameters)
+
+    def value_counts(self, df, clauses, column):
+        query = self._query(df, clauses)
+        if query is None:
+            return self._fallback.value_counts(df, clauses, column)
+        _, key, source, parameters = query
+        # Missing values are left out: one more condition on top of the filters
+        source += (" AND " if key else " WHERE ") + f"{_quote(column)} IS NOT NULL"
+        counts = self._run(f"SELECT {_quote(column)}, count(*) AS count {source} "
+                           f"GROUP BY {_quote(column)} ORDER BY min(file_row_number)", parameters)
+        return counts.astype({column: object})
+
+
+@st.cache_resource(show_spinner=False)
+def _backend(name):
+    if name == "duckdb":
+        try:
+            return DuckDBBackend()
+        except ImportError:
+            logger.warning("HF_EXPLORER_QUERY_BACKEND=duckdb but the duckdb package is not installed: using pandas")
+    return PandasBackend()
+
+
+def get_backend():
+    """
+    The query backend selected by HF_EXPLORER_QUERY_BACKEND, shared by all sessions.
+    """
+    return _backend(QUERY_BACKEND)
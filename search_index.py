@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import tracing
+
+# Below this share of the query trigrams found in a text, a fuzzy match is discarded
+FUZZY_MIN_SIMILARITY = 0.5
+
+
+def _trigram_keys(chars):
+    # Three code points packed in one int64 (21 bits each: the whole Unicode range)
+    return (chars[:-2] << 42) | (chars[1:-1] << 21) | chars[2:]
+
+
+def _code_points(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+
+
+# Separator between texts, and filler padding the end of each text
+_SEPARATOR = "\x00"
+_FILLER = "\x01"
+
+
+def _terms(query):
+    return query.lower().split()
+
+
+class SearchIndex:
+    """
+    Positional trigram index over a text column (model IDs, article titles), built once per snapshot.
+
+    The lowercased texts are laid end to end, each padded with two filler characters (so that even
+    their last characters start a trigram) and a separator, and every trigram occurrence is recorded:
+    `trigram_at[p]` is the code of the trigram starting at global position `p`, and
+    `positions[offsets[code]:offsets[code + 1]]` lists, in increasing order, the positions where
+    trigram `code` occurs (same postings layout as `TagIndex`). A word is found by chaining its
+    consecutive trigrams, without re-reading the texts. Results are ranked by `scores` (e.g. Likes,
+    relevance), highest first.
+    """
+
+    def __init__(self, texts, scores=None):
+        texts = pd.Series(texts).reset_index(drop=True).fillna("").astype(str).str.lower()
+        texts = texts.str.replace(_SEPARATOR, "", regex=False).str.replace(_FILLER, "", regex=False)
+        self.num_rows = len(texts)
+
+        # No trigram spans two texts: those containing a separator are left out (code -1)
+        padding = _FILLER * 2 + _SEPARATOR
+        chars = _code_points(padding.join(texts) + padding)
+        keys = _trigram_keys(chars)
+        valid = (chars[:-2] != 0) & (chars[1:-1] != 0) & (chars[2:] != 0)
+        self.vocabulary, codes = np.unique(keys[valid], return_inverse=True)
+        index_dtype = np.int32 if len(chars) < 2**31 else np.int64
+        self.row_at = np.repeat(np.arange(self.num_rows, dtype=index_dtype),
+                                texts.str.len().to_numpy(dtype=np.int64) + len(padding))
+        self.trigram_at = np.full(len(chars), -1, dtype=index_dtype)
+        self.trigram_at[:-2][valid] = codes
+
+        order = np.argsort(codes, kind="stable")
+        self.positions = np.flatnonzero(valid)[order].astype(index_dtype)
+        self.offsets = np.searchsorted(codes[order], np.arange(len(self.vocabulary) + 1))
+
+        # Rows in result order (highest score first, ties in row order) and the rank of each row
+        scores = (np.zeros(self.num_rows) if scores is None
+                  else pd.to_numeric(pd.Series(scores), errors="coerce").fillna(-np.inf).to_numpy(dtype=float))
+        self.by_score = np.argsort(-scores, kind="stable")
+        self.rank = np.empty(self.num_rows, dtype=np.int64)
+        self.rank[self.by_score] = np.arange(self.num_rows)
+
+    def _trigram_codes(self, term):
+        """
+        Codes of the consecutive trigrams of `term` (-1 for trigrams absent from every text).
+        """
+        keys = _trigram_keys(_code_points(term))
+        codes = np.searchsorted(self.vocabulary, keys)
+        found = codes < len(self.vocabulary)
+        found[found] = self.vocabulary[codes[found]] == keys[found]
+        return np.where(found, codes, -1)
+
+    def _occurrences(self, code):
+        return self.positions[self.offsets[code]:self.offsets[code + 1]]
+
+    def _rows_of(self, positions):
+        """
+        Distinct rows of increasing global `positions`.
+        """
+        rows = self.row_at[positions].astype(np.int64)
+        return rows[np.r_[True, rows[1:] != rows[:-1]]] if len(rows) else rows
+
+    def _contains(self, term):
+        """
+        Boolean mask of the rows whose text contains `term`.
+        """
+        mask = np.zeros(self.num_rows, dtype=bool)
+        if len(term) < 3:
+            # Shorter than a trigram: occurrences of every trigram starting with `term`, which are
+            # contiguous in the sorted vocabulary
+            low = _trigram_keys(_code_points(term + "\x00" * (3 - len(term))))[0]
+            high = low + (1 << (21 * (3 - len(term))))
+            first, last = np.searchsorted(self.vocabulary, [low, high])
+            mask[self.row_at[self.positions[self.offsets[first]:self.offsets[last]]]] = True
+            return mask
+        codes = self._trigram_codes(term)
+        if (codes < 0).any():
+            return mask
+        # Start from the rarest trigram, then check that each other trigram follows at its offset
+        counts = self.offsets[codes + 1] - self.offsets[codes]
+        rarest = int(np.argmin(counts))
+        starts = self._occurrences(codes[rarest]).astype(np.int64) - rarest
+        # Occurrences too close to either end of the corpus to hold the whole term (the padding after the
+        # last text is shorter than a long term)
+        starts = starts[(starts >= 0) & (starts + len(codes) <= len(self.trigram_at))]
+        for shift in np.argsort(counts, kind="stable"):
+            if shift != rarest and len(starts):
+                starts = starts[self.trigram_at[starts + shift] == codes[shift]]
+        mask[self.row_at[starts]] = True
+        return mask
+
+    def ranked(self, mask):
+        """
+        Positions of the rows of `mask`, highest score first.
+        """
+        return self.by_score[mask[self.by_score]]
+
+    def match(self, query):
+        """
+        Boolean mask of the rows whose text contains every word of `query` (case-insensitive, anywhere
+        in the text: a word matches as a prefix or an infix).
+        """
+        mask = np.ones(self.num_rows, dtype=bool)
+        for term in set(_terms(query)):
+            mask &= self._contains(term)
+        return mask
+
+    def fuzzy_match(self, query, min_similarity=FUZZY_MIN_SIMILARITY):
+        """
+        Row positions sharing at least `min_similarity` of the trigrams of `query` (typos, missing or
+        swapped characters), most similar first, then by score.
+        """
+        codes = np.unique(np.concatenate([self._trigram_codes(term) for term in _terms(query)]
+                                         or [np.empty(0, dtype=np.int64)]))
+        if len(codes) == 0:
+            return np.empty(0, dtype=np.int64)
+        found = codes[codes >= 0]
+        hits = [self._rows_of(self._occurrences(code)) for code in found]
+        counts = np.bincount(np.concatenate(hits or [np.empty(0, dtype=np.int64)]), minlength=self.num_rows)
+        rows = np.flatnonzero(counts >= min_similarity * len(codes))
+        return rows[np.lexsort((self.rank[rows], -counts[rows]))]
+
+    def search(self, query, mask=None, fuzzy=True):
+        """
+        Row positions matching `query`, restricted to the rows of `mask` if given, and whether they
+        are fuzzy matches: the exact matches (see `match`) highest score first, or, when there are
+        none and `fuzzy` is set, the approximate matches of `fuzzy_match`.
+        """
+        matches = self.match(query)
+        if mask is not None:
+            matches &= mask
+        if matches.any() or not fuzzy:
+            return self.ranked(matches), False
+        positions = self.fuzzy_match(query)
+        if mask is not None:
+            positions = positions[mask[positions]]
+        return positions, True
+
+    def mask(self, positions):
+        """
+        Boolean mask over the indexed rows, True at `positions`.
+        """
+        mask = np.zeros(self.num_rows, dtype=bool)
+        mask[positions] = True
+        return mask
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_search_index(_texts, _scores, snapshot, column):
+    """
+    Search index of the `column` texts of a snapshot, shared by all sessions. `_texts` and `_scores`
+    are not hashed: they must be the text and ranking columns of `snapshot`.
+    """
+    tracing.cache_miss()
+    return SearchIndex(_texts, _scores)
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import tracing
+from compact import drop_unused_categories
+
+# Benchmark metrics forming the profile of a model
+PROFILE_COLUMNS = ["IFEval", "BBH", "MATH Lvl 5", "GPQA", "MUSR", "MMLU-PRO"]
+# Below this many metrics reported by both models, two profiles are not compared
+MIN_SHARED_METRICS = 3
+
+
+def _standardize(values):
+    # Centered and scaled by column (a constant column is only centered), missing values kept as NaN
+    with np.errstate(invalid="ignore"):
+        mean, std = np.nanmean(values, axis=0), np.nanstd(values, axis=0)
+    mean, std = np.nan_to_num(mean), np.where(np.nan_to_num(std) > 0, std, 1.0)
+    return (values - mean) / std
+
+
+class SimilarityIndex:
+    """
+    Profiles of the models of a leaderboard snapshot, compared by distance: the six benchmark metrics and
+    the model size (log of the number of parameters), each standardized over the snapshot.
+
+    The distance between two models is the root mean square of their differences, in standard deviations,
+    over the metrics both report (the size counts only with a `size_weight`), so that a missing metric
+    neither counts as zero nor disqualifies a model; models sharing fewer than MIN_SHARED_METRICS metrics
+    are not compared. Queries are answered by brute force over the candidate rows with a few matrix
+    products (`distances`), fast enough for tens of thousands of models and any filter on the candidates.
+    """
+
+    def __init__(self, df, columns=PROFILE_COLUMNS, size_column="params_b"):
+        self.num_rows = len(df)
+        self.columns = list(columns)
+        metrics = df[self.columns].to_numpy(dtype=float, na_value=np.nan)
+        self.params = pd.to_numeric(df[size_column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            size = np.where(self.params > 0, np.log10(self.params), np.nan)
+
+        profiles = _standardize(np.column_stack([metrics, size]))
+        self.present = ~np.isnan(profiles)
+        # Missing values as zeros, masked out by `present` in the products below
+        self.profiles = np.where(self.present, profiles, 0.0)
+        self.squares = self.profiles ** 2
+        # Rows of the same model (other precisions, resubmissions) share a code and are not their own neighbours:
+        # the model link, else the model name; a row with neither is a model of its own
+        models = df["model_name"] if "model_link" not in df.columns else df["model_link"].fillna(df["model_name"])
+        self.models = pd.factorize(models)[0]
+        missing = np.flatnonzero(self.models < 0)
+        self.models[missing] = self.models.max(initial=-1) + 1 + np.arange(len(missing))
+        # "name (precision)" of each row, for the choice of a reference model
+        self.labels = (df["model_name"].astype("str") + " (" + df["precision"].astype("str") + ")").to_numpy(
+            dtype=object)
+
+    def _weights(self, size_weight):
+        return np.r_[np.ones(len(self.columns)), size_weight]
+
+    def distances(self, queries, rows=None, size_weight=0.0):
+        """
+        (len(rows), len(queries)) distances between the rows at positions `rows` (None: every row) and the
+        rows at positions `queries`; NaN for the pairs sharing fewer than MIN_SHARED_METRICS metrics.
+        """
+        rows = slice(None) if rows is None else rows
+        weights = self._weights(size_weight)
+        # Per pair, over the dimensions both rows report: sum of w * (a - b)² = w·a² - 2 w·ab + w·b²
+        candidates = self.present[rows] * weights
+        query_present = self.present[queries].astype(float)
+        query_values, query_squares = self.profiles[queries], self.squares[queries]
+        total = ((candidates * self.squares[rows]) @ query_present.T
+                 - 2 * (candidates * self.profiles[rows]) @ query_values.T
+                 + candidates @ query_squares.T)
+        weight = candidates @ query_present.T
+        shared = self.present[rows, :len(self.columns)].astype(float) @ query_present[:, :len(self.columns)].T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distances = np.sqrt(np.maximum(total, 0.0) / weight)
+        distances[shared < MIN_SHARED_METRICS] = np.nan
+        return distances
+
+    def neighbours(self, position, k=10, max_params=None, rows=None, size_weight=0.0):
+        """
+        (positions, distances) of the `k` models closest to the row at `position`, nearest first (ties in
+        row order), among the rows at positions `rows` (None: every row) with at most `max_params` billion
+        parameters (None: any size), leaving out the rows of the same model.
+        """
+        candidates = np.arange(self.num_rows) if rows is None else np.asarray(rows)
+        keep = self.models[candidates] != self.models[position]
+        if max_params is not None:
+            keep &= self.params[candidates] <= max_params
+        candidates = candidates[keep]
+        distances = self.distances([position], candidates, size_weight)[:, 0]
+        compared = ~np.isnan(distances)
+        candidates, distances = candidates[compared], distances[compared]
+        if len(candidates) > k:
+            nearest = np.argpartition(distances, k - 1)[:k]
+            # Rows tied with the k-th distance outside the partition are compared in row order
+            nearest = np.flatnonzero(distances <= distances[nearest].max())
+            candidates, distances = candidates[nearest], distances[nearest]
+        order = np.lexsort((candidates, distances))[:k]
+        return candidates[order], distances[order]
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_similarity_index(_df, snapshot):
+    """
+    Similarity index of a leaderboard snapshot, shared by all sessions. `_df` is not hashed: it must be
+    the frame of `snapshot`.
+    """
+    tracing.cache_miss()
+    return SimilarityIndex(_df)
+
+
+def similar_models(index, df, position, columns, k=10, max_params=None, rows=None, size_weight=0.0):
+    """
+    `columns` of the `k` models of `df` closest to the row at `position` (see `SimilarityIndex.neighbours`),
+    with their `distance`.
+    """
+    positions, distances = index.neighbours(position, k, max_params, rows, size_weight)
+    return drop_unused_categories(df.iloc[positions][list(columns)].assign(distance=distances))
@@ -0,0 +1,191 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Root directory of the on-disk snapshots (one sub-directory per data source)
+CACHE_DIR = Path(os.getenv("HF_EXPLORER_CACHE_DIR", Path(__file__).resolve().parent / "data_cache"))
+
+_LATEST_FILE = "LATEST"
+_refresh_lock = threading.Lock()
+# Running jobs, each with the event set when it finishes
+_refreshing = {}
+
+
+def _source_dir(source):
+    return CACHE_DIR / source
+
+
+def snapshot_path(source, key):
+    return _source_dir(source) / f"{key}.parquet"
+
+
+def has_snapshot(source, key):
+    return key is not None and snapshot_path(source, key).exists()
+
+
+def latest_snapshot_key(source):
+    """
+    Returns the key of the last snapshot successfully written for `source`, or None.
+    """
+    latest = _source_dir(source) / _LATEST_FILE
+    try:
+        key = latest.read_text().strip()
+    except OSError:
+        return None
+    return key if has_snapshot(source, key) else None
+
+
+def read_snapshot(source, key):
+    """
+    Reads a snapshot back as a DataFrame, tagging it with its key in `df.attrs`.
+    """
+    # Imported here so that the job helpers can be used at startup without loading pandas
+    import pandas as pd
+
+    df = pd.read_parquet(snapshot_path(source, key))
+    df.attrs["snapshot_id"] = f"{source}@{key}"
+    return df
+
+
+def snapshot_age(source, key):
+    """
+    Seconds elapsed since the snapshot `key` of `source` was written.
+    """
+    return time.time() - snapshot_path(source, key).stat().st_mtime
+
+
+def prune_snapshots(source, keep):
+    """
+    Deletes all but the `keep` most recently written snapshots of `source`.
+    """
+    snapshots = sorted(_source_dir(source).glob("*.parquet"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in snapshots[keep:]:
+        # Snapshots are single files, or directories of Parquet parts for streamed sources
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def mark_latest(source, key, keep=3):
+    """
+    Marks the snapshot `key` of `source` as the latest one and only keeps the `keep` most recent snapshots.
+    """
+    directory = _source_dir(source)
+    tmp_latest = directory / f".{_LATEST_FILE}.{threading.get_ident()}.tmp"
+    tmp_latest.write_text(key)
+    os.replace(tmp_latest, directory / _LATEST_FILE)
+
+    prune_snapshots(source, keep)
+
+
+def write_snapshot(source, key, df, keep=3):
+    """
+    Atomically writes `df` as the snapshot `key` of `source`, marks it as the latest one
+    and only keeps the `keep` most recent snapshots.
+    """
+    directory = _source_dir(source)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first so readers never see a half-written snapshot
+    tmp_path = directory / f".{key}.{threading.get_ident()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, snapshot_path(source, key))
+
+    mark_latest(source, key, keep)
+
+
+def _claim(job):
+    # Registers `job` as running; returns None if it already is
+    with _refresh_lock:
+        if job in _refreshing:
+            return None
+        done = _refreshing[job] = threading.Event()
+        return done
+
+
+def _release(job, done):
+    with _refresh_lock:
+        _refreshing.pop(job, None)
+    done.set()
+
+
+def run_in_background(job, func):
+    """
+    Runs `func()` in a daemon thread unless a job with the same name is already running.
+    Returns True if the job was started.
+    """
+    done = _claim(job)
+    if done is None:
+        return False
+
+    def run():
+        try:
+            func()
+        except Exception:
+            logger.exception("Background job %s failed", job)
+        finally:
+            _release(job, done)
+
+    threading.Thread(target=run, name=f"refresh-{job}", daemon=True).start()
+    return True
+
+
+def run_exclusive(job, func, timeout=None):
+    """
+    Runs `func()` in the calling thread, or, if a job with the same name is already running (in the
+    background or in another session), waits for it to finish instead of doing the work twice.
+    Returns True if `func` ran here. Exceptions raised by `func` are propagated.
+    """
+    done = _claim(job)
+    if done is None:
+        with _refresh_lock:
+            running = _refreshing.get(job)
+        if running is not None:
+            running.wait(timeout)
+        return False
+    try:
+        func()
+    finally:
+        _release(job, done)
+    return True
+
+
+def running_jobs():
+    """
+    Names of the jobs currently running.
+    """
+    with _refresh_lock:
+        return list(_refreshing)
+
+
+def refresh_in_background(source, key, builder):
+    """
+    Builds the snapshot `key` of `source` in a daemon thread with `builder()`.
+    Only one refresh per (source, key) runs at a time; returns True if one was started.
+    """
+    return run_in_background((source, key), lambda: write_snapshot(source, key, builder()))
+
+
+def snapshot_id(df):
+    """
+    Identifier of the data snapshot a frame comes from (None for ad-hoc frames).
+    """
+    return df.attrs.get("snapshot_id")
+
+
+def snapshot_file(snapshot):
+    """
+    Parquet file of the snapshot identified by `snapshot` (see `snapshot_id`), or None when it has none
+    (ad-hoc frames, stores written as directories of parts).
+    """
+    source, _, key = (snapshot or "").partition("@")
+    if not key:
+        return None
+    path = snapshot_path(source, key)
+    return path if path.is_file() else None
@@ -0,0 +1,65 @@
+import streamlit as st
+
+import tracing
+from query_engine import get_backend
+
+
+def link_column(names, links):
+    """
+    Builds `<a href=...>name</a>` cells for a whole column at once; rows without a link keep their name.
+    """
+    names = names.astype(object)
+    anchors = '<a href="' + links.astype(str) + '" target="_blank">' + names.astype(str) + '</a>'
+    return anchors.where(links.notna(), names)
+
+
+def render_paginated_table(df, key, columns, link=None, page_size_options=(25, 50, 100, 250), clauses=()):
+    """
+    Renders `columns` of the rows of the snapshot frame `df` matching the filter `clauses` as an HTML
+    table, one page at a time.
+
+    Counting, sorting and slicing the visible page go through the query backend (`query_engine`):
+    only the rows of that page are fetched, formatted and sent to the browser. `link` is an optional
+    (text column, link column) pair whose cells are rendered as hyperlinks.
+    """
+    backend = get_backend()
+    total_rows = backend.count(df, clauses)
+
+    col_sort, col_order, col_size, col_page = st.columns([3, 2, 2, 2])
+    with col_sort:
+        sort_column = st.selectbox("Trier par", options=[None] + list(columns), key=f"{key}_sort",
+                                   format_func=lambda c: "Ordre d'origine" if c is None else c)
+    with col_order:
+        ascending = st.radio("Ordre", options=[False, True], key=f"{key}_ascending", horizontal=True,
+                             format_func=lambda a: "Croissant" if a else "Décroissant")
+    with col_size:
+        page_size = st.selectbox("Lignes par page", options=page_size_options, index=1, key=f"{key}_page_size")
+
+    total_pages = max((total_rows + page_size - 1) // page_size, 1)
+    # Filters may have shrunk the table since the last rerun: go back to the first page
+    if st.session_state.get(f"{key}_page", 1) > total_pages:
+        st.session_state[f"{key}_page"] = 1
+    with col_page:
+        current_page = st.number_input(f"Page (sur {total_pages})", min_value=1, max_value=total_pages,
+                                       key=f"{key}_page")
+
+    start = (current_page - 1) * page_size
+    fetched = list(columns) + ([link[1]] if link is not None and link[1] not in columns else [])
+    with tracing.stage("page", total_rows) as span:
+        window = span.out(backend.page(df, clauses, fetched, sort_column, ascending, start, page_size))
+
+    # Format only the visible rows
+    with tracing.stage("to_html", window) as span:
+        page_df = window[list(columns)].copy()
+        if link is not None:
+            text_column, link_col = link
+            page_df[text_column] = link_column(window[text_column], window[link_col])
+
+        html_table = page_df.to_html(escape=False, index=False, classes=['dataframe'])
+        span.out(page_df)
+    st.markdown("""
+        <div style="height: 400px; overflow-y: scroll; margin: 10px 0px">
+            {}
+        </div>
+    """.format(html_table), unsafe_allow_html=True)
+    st.caption(f"Lignes {min(start + 1, total_rows)}–{min(start + page_size, total_rows)} sur {total_rows:,}")
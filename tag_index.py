@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import tracing
+from compact import TAGS_DTYPE, tag_codes
+
+
+class TagIndex:
+    """
+    Inverted index tag -> sorted row positions, built once from a column of tag lists.
+
+    Postings are stored as one array of row positions grouped by tag (`rows`), with `offsets[code]`
+    pointing to the start of each tag's postings.
+    """
+
+    def __init__(self, tags):
+        tags = pd.Series(tags)
+        if tags.dtype == TAGS_DTYPE:
+            # Already dictionary-encoded: reuse the codes as they are
+            row_ids, codes, vocabulary = tag_codes(tags)
+        else:
+            exploded = tags.reset_index(drop=True).explode().dropna()
+            row_ids = exploded.index.to_numpy(dtype=np.int64)
+            codes, vocabulary = pd.factorize(exploded.astype(str))
+
+        # Group by tag, rows in increasing order, and drop tags repeated within a row
+        order = np.lexsort((row_ids, codes))
+        codes, row_ids = codes[order], row_ids[order]
+        unique = np.r_[True, (codes[1:] != codes[:-1]) | (row_ids[1:] != row_ids[:-1])]
+
+        self.num_rows = len(tags)
+        self.vocabulary = np.asarray(vocabulary, dtype=object)
+        self.codes = codes[unique]
+        self.rows = row_ids[unique]
+        self.offsets = np.searchsorted(self.codes, np.arange(len(self.vocabulary) + 1))
+        self.sizes = np.diff(self.offsets)
+        self._lookup = {tag: code for code, tag in enumerate(self.vocabulary)}
+
+    def postings(self, tag):
+        """
+        Sorted row positions of the rows carrying `tag`.
+        """
+        code = self._lookup.get(tag)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+    def tags_by_frequency(self):
+        """
+        All tags, most frequent first.
+        """
+        return self.vocabulary[np.argsort(-self.sizes, kind="stable")].tolist()
+
+    def match(self, tags, mode="any"):
+        """
+        Row positions carrying at least one of `tags` (mode="any") or all of them (mode="all").
+        """
+        postings = [self.postings(tag) for tag in tags]
+        if not postings:
+            return np.arange(self.num_rows)
+        if mode == "all":
+            result = postings[0]
+            for rows in postings[1:]:
+                result = np.intersect1d(result, rows, assume_unique=True)
+            return result
+        return np.unique(np.concatenate(postings))
+
+    def mask(self, tags, mode="any"):
+        """
+        Boolean mask over the indexed rows, see `match`.
+        """
+        mask = np.zeros(self.num_rows, dtype=bool)
+        mask[self.match(tags, mode)] = True
+        return mask
+
+    def top(self, n, mask=None):
+        """
+        The `n` most frequent tags as a (tag, count) frame, over all rows or only the rows in `mask`.
+        """
+        if mask is None:
+            counts = self.sizes
+        else:
+            counts = np.bincount(self.codes[mask[self.rows]], minlength=len(self.vocabulary))
+        best = np.argsort(-counts, kind="stable")[:n]
+        best = best[counts[best] > 0]
+        return pd.DataFrame({"tag": self.vocabulary[best], "count": counts[best]})
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_tag_index(_tags, snapshot):
+    """
+    Tag index of a catalog snapshot, shared by all sessions. `_tags` is not hashed: it must be the
+    tag column of `snapshot`.
+    """
+    tracing.cache_miss()
+    return TagIndex(_tags)
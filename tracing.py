@@ -0,0 +1,215 @@
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Set HF_EXPLORER_TRACE_LOG=1 to log every stage as one JSON line
+TRACE_LOG = os.getenv("HF_EXPLORER_TRACE_LOG", "0") == "1"
+# File rewritten after each page run with the Prometheus counters (e.g. for the node_exporter textfile collector)
+METRICS_FILE = os.getenv("HF_EXPLORER_METRICS_FILE")
+
+if TRACE_LOG and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+# Per thread: the stages being measured (innermost last), and the page being rendered with its records
+_local = threading.local()
+# Process-wide counters: (metric, labels) -> value
+_counters = defaultdict(float)
+_counters_lock = threading.Lock()
+_starts = itertools.count()
+
+# Metric -> help text of the Prometheus export
+METRICS = {
+    "hf_explorer_stage_calls_total": "Number of times the stage ran.",
+    "hf_explorer_stage_seconds_total": "Wall time spent in the stage, in seconds.",
+    "hf_explorer_stage_rows_in_total": "Rows received by the stage.",
+    "hf_explorer_stage_rows_out_total": "Rows produced by the stage.",
+    "hf_explorer_stage_cache_total": "Cache lookups of the stage, by result (hit or miss).",
+}
+
+
+def _rows(value):
+    # Row count of a frame, series or array (a plain int is taken as is); None for anything else
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, int):
+        return value
+    shape = getattr(value, "shape", None)
+    return shape[0] if shape else None
+
+
+class Stage:
+    """
+    Measurement of one stage: name, page, nesting depth, rows in and out, cache result and wall time.
+    """
+
+    def __init__(self, name, page, depth, rows_in=None, cache=None):
+        # Start order: records complete innermost first, they are displayed in start order
+        self.started = next(_starts)
+        self.name = name
+        self.page = page
+        self.depth = depth
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.cache = cache
+        self.seconds = None
+
+    def out(self, result):
+        """
+        Records the size of `result` as the rows out of the stage and returns it unchanged.
+        """
+        self.rows_out = _rows(result)
+        return result
+
+    def as_dict(self):
+        return {"page": self.page, "stage": self.name, "depth": self.depth, "seconds": self.seconds,
+                "rows_in": self.rows_in, "rows_out": self.rows_out, "cache": self.cache}
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def stage(name, rows_in=None, cached=False):
+    """
+    Measures the block as stage `name` of the page being rendered. `rows_in` is a frame or a row count;
+    call `.out(result)` on the yielded `Stage` to record the rows out. With `cached`, the stage counts as
+    a cache hit unless `cache_miss()` is called while it runs (from the body of the cached function).
+    """
+    stack = _stack()
+    record = Stage(name, getattr(_local, "page", None) or "", len(stack), _rows(rows_in), "hit" if cached else None)
+    stack.append(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        stack.pop()
+        _record(record)
+
+
+def traced(name, cached=False):
+    """
+    Decorator measuring each call as stage `name`: rows in from the first argument, rows out from the result.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, args[0] if args else None, cached=cached) as record:
+                return record.out(func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def cache_miss():
+    """
+    To be called from the body of a cached function (which only runs on a miss): marks the innermost
+    enclosing cached stage as a miss.
+    """
+    for record in reversed(_stack()):
+        if record.cache is not None:
+            record.cache = "miss"
+            return
+
+
+def _record(record):
+    labels = (("page", record.page), ("stage", record.name))
+    with _counters_lock:
+        _counters["hf_explorer_stage_calls_total", labels] += 1
+        _counters["hf_explorer_stage_seconds_total", labels] += record.seconds
+        if record.rows_in is not None:
+            _counters["hf_explorer_stage_rows_in_total", labels] += record.rows_in
+        if record.rows_out is not None:
+            _counters["hf_explorer_stage_rows_out_total", labels] += record.rows_out
+        if record.cache is not None:
+            _counters["hf_explorer_stage_cache_total", labels + (("result", record.cache),)] += 1
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.append(record)
+    if TRACE_LOG:
+        logger.info(json.dumps({"event": "stage", **record.as_dict()}, ensure_ascii=False))
+
+
+@contextmanager
+def page_trace(page):
+    """
+    Collects the stages measured while `page` renders; yields the list of their `Stage` records, in
+    completion order (nested stages before the stage containing them).
+    """
+    _local.page, _local.trace = page, []
+    try:
+        yield _local.trace
+    finally:
+        _local.page, _local.trace = None, None
+        if METRICS_FILE:
+            write_metrics(METRICS_FILE)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    """
+    Every counter in the Prometheus text exposition format.
+    """
+    with _counters_lock:
+        counters = sorted(_counters.items())
+    lines = []
+    for metric, help_text in METRICS.items():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for (name, labels), value in counters:
+            if name == metric:
+                rendered = ",".join(f'{label}="{_escape(text)}"' for label, text in labels)
+                lines.append(f"{metric}{{{rendered}}} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    # Written next to the target then renamed: readers never see a partial file
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(temporary, path)
+
+
+def trace_lines(trace):
+    """
+    The records of `trace` as JSON lines.
+    """
+    return "".join(json.dumps(record.as_dict(), ensure_ascii=False) + "\n" for record in trace)
+
+
+def render_debug_panel(trace):
+    """
+    Sidebar toggle showing the stages of the last page run (time, rows, cache) with their exports.
+    """
+    if not st.sidebar.toggle("🛠️ Mesures de performance", key="debug_panel"):
+        return
+    rows = [{
+        "Étape": "\u00a0\u00a0" * record.depth + record.name,
+        "Durée (ms)": round(record.seconds * 1000, 1),
+        "Cache": record.cache or "",
+        "Lignes en entrée": record.rows_in,
+        "Lignes en sortie": record.rows_out,
+    } for record in sorted(trace, key=lambda record: record.started)]
+    st.sidebar.dataframe(rows, hide_index=True)
+    total = sum(record.seconds for record in trace if record.depth == 0)
+    st.sidebar.caption(f"{len(trace)} étape(s) mesurée(s), {total * 1000:.0f} ms au total")
+    st.sidebar.download_button("Exporter (JSON lines)", trace_lines(trace), file_name="trace.jsonl",
+                               mime="application/x-ndjson")
+    st.sidebar.download_button("Exporter (Prometheus)", prometheus_text(), file_name="metrics.prom",
+                               mime="text/plain")
@@ -0,0 +1,69 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+import streamlit as st
+
+import snapshot_cache
+
+logger = logging.getLogger(__name__)
+
+# Source (as named in snapshot_cache) -> (label shown while it refreshes, page module, warm-up function)
+SOURCES = {
+    "models": ("catalogue des modèles", "app", "warm_models_data"),
+    "leaderboard": ("leaderboard", "benchmark", "warm_leaderboard_data"),
+    "articles": ("actualités", "actu", "warm_articles"),
+}
+# Seconds between two checks; sources expiring before the next check are refreshed ahead of time
+WARMUP_CHECK_INTERVAL = int(os.getenv("HF_EXPLORER_WARMUP_INTERVAL", 300))
+# Set HF_EXPLORER_WARMUP=0 to disable the warm-up (pages then fetch their data on first visit)
+WARMUP_ENABLED = os.getenv("HF_EXPLORER_WARMUP", "1") != "0"
+
+
+def warm_source(source, ahead=0):
+    """
+    Refreshes `source` if it is missing or expires within `ahead` seconds, and loads it into the
+    shared caches. The page module is imported here, off the request path.
+    """
+    _, module_name, function_name = SOURCES[source]
+    getattr(importlib.import_module(module_name), function_name)(ahead)
+
+
+def warm_all(ahead=0):
+    """
+    Starts the warm-up of every source, concurrently, each in its own background job.
+    Returns the sources whose warm-up was started (the others were still running).
+    """
+    return [source for source in SOURCES
+            if snapshot_cache.run_in_background(("warmup", source), lambda source=source: warm_source(source, ahead))]
+
+
+def _warm_forever(interval):
+    while True:
+        warm_all(ahead=interval)
+        time.sleep(interval)
+
+
+@st.cache_resource(show_spinner=False)
+def start(interval=WARMUP_CHECK_INTERVAL):
+    """
+    Starts, once per server process, the thread that warms every source now and then every `interval`
+    seconds. Returns the thread (None when the warm-up is disabled).
+    """
+    if not WARMUP_ENABLED:
+        return None
+    thread = threading.Thread(target=_warm_forever, args=(interval,), name="warmup", daemon=True)
+    thread.start()
+    logger.info("Data warm-up started (every %s s)", interval)
+    return thread
+
+
+def refreshing():
+    """
+    Labels of the sources being downloaded or loaded right now.
+    """
+    running = {job[1] if job[0] == "warmup" else job[0] for job in snapshot_cache.running_jobs()
+               if isinstance(job, tuple)}
+    return [label for source, (label, _, _) in SOURCES.items() if source in running]